@@ -0,0 +1,114 @@
+import carb
+import omni.kit.commands
+import omni.usd
+from pxr import Usd, Sdf
+
+from ..sdf_utils import unique_name, retarget_specs, restore_retargeted_specs
+from .engine import get_renamed_path
+
+
+class BatchRenamePrimsCommand(omni.kit.commands.Command):
+    """
+    Rename many prims as one namespace edit.
+
+    The renames are applied deepest first as a single Sdf.BatchNamespaceEdit on every
+    layer of the stage layer stack holding specs of the renamed prims, inside one
+    Sdf.ChangeBlock, so the stage is recomposed once. A batch edit is applied one rename
+    after another, so siblings trading names (swaps, chains) go through temporary names.
+    The relationship targets and attribute connections of the layers follow the renamed
+    prims. When a layer can not be edited, the layers already renamed are restored and
+    nothing is renamed.
+
+    Args:
+        renames: [(prim path, new name)] ordered deepest first, see batch_rename.engine.plan_renames.
+    """
+
+    def __init__(self, renames, stage: Usd.Stage = None):
+        self._renames = [(Sdf.Path(str(path)), new_name) for path, new_name in renames]
+        self._stage = stage or omni.usd.get_context().get_stage()
+        self._applied = []
+        self._retargeted = []
+
+    def do(self):
+        self._applied = []
+        self._retargeted = []
+        groups = self._group_renames()
+        renamed = dict(self._renames)
+
+        def move(path):
+            prim_path = path.GetPrimPath()
+            return path.ReplacePrefix(prim_path, get_renamed_path(prim_path, renamed))
+
+        with Sdf.ChangeBlock():
+            for layer in self._stage.GetLayerStack():
+                layer_groups = []
+                for parent_path, renames in groups:
+                    renames = [rename for rename in renames if layer.GetPrimAtPath(parent_path.AppendChild(rename[0]))]
+                    if renames:
+                        layer_groups.append((parent_path, renames))
+                if not layer_groups:
+                    continue
+
+                if not layer.Apply(_rename_edit(layer_groups)):
+                    carb.log_error(f"[xiaopeng.vr.tools] Failed to rename prims in layer {layer.identifier}, "
+                                   "nothing was renamed")
+                    self._undo_renames()
+                    return
+                self._applied.append((layer, layer_groups))
+
+            for layer in self._stage.GetLayerStack():
+                if layer.permissionToEdit:
+                    retargeted = retarget_specs(layer, move)
+                    if retargeted:
+                        self._retargeted.append((layer, retargeted))
+
+    def _group_renames(self):
+        """
+        [(parent path, [(name, new name, temporary name)])] deepest first, the temporary names
+        are only set for the siblings taking the name of another renamed sibling
+        """
+        groups = {}
+        for path, new_name in self._renames:
+            groups.setdefault(path.GetParentPath(), []).append((path.name, new_name))
+
+        result = []
+        for parent_path, renames in groups.items():
+            names = {name for name, _ in renames}
+            new_names = {new_name for _, new_name in renames}
+            if names.isdisjoint(new_names):
+                result.append((parent_path, [(name, new_name, None) for name, new_name in renames]))
+                continue
+
+            parent = self._stage.GetPrimAtPath(parent_path)
+            taken = set(parent.GetAllChildrenNames()) if parent else set()
+            taken |= names | new_names
+            result.append((parent_path, [(name, new_name, unique_name(name + "_renaming", taken))
+                                         for name, new_name in renames]))
+        return result
+
+    def _undo_renames(self):
+        for layer, groups in reversed(self._applied):
+            # shallowest first, the parent of every group already has its old name back
+            inverse = [(parent_path, [(new_name, name, tmp_name) for name, new_name, tmp_name in renames])
+                       for parent_path, renames in reversed(groups)]
+            if not layer.Apply(_rename_edit(inverse)):
+                carb.log_error(f"[xiaopeng.vr.tools] Failed to restore the prim names in layer {layer.identifier}")
+        self._applied = []
+
+    def undo(self):
+        with Sdf.ChangeBlock():
+            for layer, retargeted in reversed(self._retargeted):
+                restore_retargeted_specs(layer, retargeted)
+            self._undo_renames()
+        self._retargeted = []
+
+
+def _rename_edit(groups) -> Sdf.BatchNamespaceEdit:
+    edit = Sdf.BatchNamespaceEdit()
+    for parent_path, renames in groups:
+        for name, new_name, tmp_name in renames:
+            edit.Add(Sdf.NamespaceEdit.Rename(parent_path.AppendChild(name), tmp_name or new_name))
+        for name, new_name, tmp_name in renames:
+            if tmp_name:
+                edit.Add(Sdf.NamespaceEdit.Rename(parent_path.AppendChild(tmp_name), new_name))
+    return edit
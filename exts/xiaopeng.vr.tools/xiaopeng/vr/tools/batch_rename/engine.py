@@ -0,0 +1,125 @@
+import fnmatch
+import re
+import omni.usd
+from typing import Dict, List, Tuple
+from pxr import Usd, Sdf, UsdShade
+
+
+def plan_renames(stage: Usd.Stage, renames: Dict[str, str]) -> Tuple[List[Tuple[Sdf.Path, str]], List[str]]:
+    """
+    Check a batch of renames against the stage before anything is authored.
+
+    Args:
+        renames: {prim path: new name}
+
+    Returns:
+        The renames ordered deepest first, so renaming a parent never invalidates the path
+        of one of its renamed children, and the list of errors (invalid names, prims that
+        can not be renamed, sibling name collisions).
+    """
+    errors = []
+    edits = {}
+    for path, new_name in renames.items():
+        path = Sdf.Path(str(path))
+        if path.name == new_name:
+            continue
+
+        if not Sdf.Path.IsValidIdentifier(new_name):
+            errors.append(f"{path}: '{new_name}' is not a valid prim name")
+            continue
+
+        prim = stage.GetPrimAtPath(path)
+        if not prim:
+            errors.append(f"{path}: prim does not exist")
+            continue
+        if omni.usd.check_ancestral(prim):
+            errors.append(f"{path}: prim is brought in by a reference or payload of an ancestor")
+            continue
+
+        edits[path] = new_name
+
+    # the final children names of every parent must stay unique
+    paths_by_parent = {}
+    for path in edits:
+        paths_by_parent.setdefault(path.GetParentPath(), []).append(path)
+
+    for parent_path, paths in paths_by_parent.items():
+        parent = stage.GetPrimAtPath(parent_path)
+        taken = set(parent.GetAllChildrenNames()) - {path.name for path in paths}
+        for path in paths:
+            new_name = edits[path]
+            if new_name in taken:
+                errors.append(f"{path}: '{new_name}' collides with a sibling")
+                del edits[path]
+            else:
+                taken.add(new_name)
+
+    ordered = sorted(edits.items(), key=lambda edit: edit[0].pathElementCount, reverse=True)
+    return ordered, errors
+
+
+def get_renamed_path(path, renames: Dict[Sdf.Path, str]) -> Sdf.Path:
+    """
+    path of the prim once the renames of the prim and of its ancestors are applied
+    """
+    path = Sdf.Path(str(path))
+    prefixes = path.GetPrefixes()
+    renamed = Sdf.Path.absoluteRootPath
+    for prefix in prefixes:
+        renamed = renamed.AppendChild(renames.get(prefix, prefix.name))
+    return renamed
+
+
+def iter_pattern_renames(stage: Usd.Stage, root_path, pattern: str, template: str, use_regex: bool = False):
+    """
+    Stream the renames of the prims under root_path whose name matches the pattern.
+
+    The hierarchy is walked with a Usd.PrimRange, nothing is collected up front. Subtrees
+    that can not hold renamable prims are pruned: the descendants of prims with references
+    or payloads, and the shading networks of materials.
+
+    Args:
+        pattern: glob pattern matched against the whole name, or a regular expression searched in it.
+        template: new name, "{name}" is replaced by the current name and "{index}" by the match
+            number. In regex mode the template is a re.sub replacement, so "\\1" refers to groups.
+
+    Yields:
+        (prim path, new name)
+    """
+    # compiled here so a bad pattern or template raises re.error on the call, not on the first iteration
+    if use_regex:
+        regex = re.compile(pattern)
+        # the replacement template is parsed even without a match, a bad group reference fails here
+        try:
+            regex.sub(template, "")
+        except IndexError as e:
+            raise re.error(str(e)) from e
+    else:
+        regex = re.compile(fnmatch.translate(pattern))
+    return _iter_pattern_renames(stage, root_path, regex, template, use_regex)
+
+
+def _iter_pattern_renames(stage: Usd.Stage, root_path, regex, template: str, use_regex: bool):
+    root = stage.GetPrimAtPath(str(root_path))
+    if not root:
+        return
+
+    index = 0
+    prim_range = iter(Usd.PrimRange(root))
+    for prim in prim_range:
+        if prim.HasAuthoredReferences() or prim.HasAuthoredPayloads() or prim.IsA(UsdShade.Material):
+            prim_range.PruneChildren()
+
+        name = prim.GetName()
+        if use_regex:
+            if not regex.search(name):
+                continue
+            new_name = regex.sub(template, name)
+        else:
+            if not regex.match(name):
+                continue
+            new_name = template
+
+        new_name = new_name.replace("{name}", name).replace("{index}", str(index))
+        index += 1
+        yield prim.GetPrimPath(), new_name
@@ -1,22 +1,33 @@
 import omni.ext
 import omni.ui as ui
 import omni.usd
+import omni.kit.commands
 from typing import Union
 from pxr import Usd, Sdf, UsdGeom, UsdShade
 import os
+import re
+import itertools
 from omni.kit.widget.stage import StageIcons
 
+from ..task_runner import TaskRunner
+from .engine import plan_renames, get_renamed_path, iter_pattern_renames
+
 class BatchRenameWindow(ui.Window):
+    PREVIEW_PAGE_SIZE = 50
+
     def __init__(self, title: str, delegate=None, **kwargs):
         super().__init__(title, **kwargs)
 
         self.rename_add = None
         self.replace_path = None
         self.current_selection = 1
+        self._task_runner = TaskRunner()
+        self._preview_renames = None
 
         self.frame.set_build_fn(self._build_fn)
 
     def destroy(self):
+        self._task_runner.cancel()
         # It will destroy all the children
         super().destroy()
 
@@ -46,6 +57,33 @@ class BatchRenameWindow(ui.Window):
                         rename_field.model.add_value_changed_fn(self.rename_field_changed)
                 ui.Button(f" {omni.kit.ui.get_custom_glyph_code('${glyphs}/menu_rename.svg')}  Rename ", 
                           width=50, height=22, clicked_fn=self.rename)
+
+                with ui.CollapsableFrame("Pattern Rename", height=0):
+                    with ui.VStack(spacing=5):
+                        with ui.HStack(spacing=5, height=0):
+                            ui.Label('Root', width=60)
+                            self.root_path_field = ui.StringField(height=22)
+                            ui.Button('Set', width=50, height=22, clicked_fn=self.set_root_path)
+                        with ui.HStack(spacing=5, height=0):
+                            ui.Label('Filter', width=60)
+                            self.pattern_field = ui.StringField(height=22)
+                            ui.Label('Regex', width=40)
+                            self.regex_checkbox = ui.CheckBox(width=20)
+                        with ui.HStack(spacing=5, height=0):
+                            ui.Label('Template', width=60)
+                            self.template_field = ui.StringField(height=22)
+                            self.template_field.model.set_value("{name}")
+                        with ui.HStack(spacing=5, height=0):
+                            ui.Button("Preview", height=22, clicked_fn=self.preview_pattern_rename)
+                            ui.Button("More", height=22, clicked_fn=self.load_preview_page)
+                            ui.Button("Apply", height=22, clicked_fn=self.apply_pattern_rename)
+                        with ui.ScrollingFrame(height=120):
+                            self.preview_stack = ui.VStack(height=0)
+
+                with ui.HStack(spacing=5, height=0):
+                    self.progressbar = ui.ProgressBar(height=20)
+                    ui.Button("Cancel", width=60, height=20, clicked_fn=self._task_runner.cancel)
+                self._task_runner.progressbar = self.progressbar
     
     def rename_field_changed(self, model):
         self.rename_add = model.as_string
@@ -57,20 +95,94 @@ class BatchRenameWindow(ui.Window):
         if self.rename_add:
             paths = self.get_select_prim_paths()
             if paths:
-                with omni.kit.undo.group():
-                    for path in paths:
-                        sub_paths = path.split('/')
-                        prim_name = sub_paths[-1]
-                        parent_path = '/'.join(sub_paths[:-1])
-                        if self.current_selection == 0:
-                            path_to = parent_path + '/' + self.rename_add + '_' + prim_name
-                        else:
-                            path_to = parent_path + '/' + prim_name + '_' + self.rename_add
-
-                        omni.kit.commands.execute('MovePrim',
-                                path_from=path,
-                                path_to=path_to)
+                self._task_runner.run(self.iter_rename(paths, self.rename_add, self.current_selection))
+
+    def iter_rename(self, paths, rename_add, current_selection):
+        renames = {}
+        for i, path in enumerate(paths):
+            prim_name = Sdf.Path(path).name
+            if current_selection == 0:
+                renames[path] = rename_add + '_' + prim_name
+            else:
+                renames[path] = prim_name + '_' + rename_add
+            if i % 1000 == 0:
+                yield (i + 1) / len(paths)
+
+        # check every name up front, nothing is renamed if one of them fails
+        stage = omni.usd.get_context().get_stage()
+        ordered, errors = plan_renames(stage, renames)
+        if errors:
+            for error in errors:
+                print(error)
+            return
+
+        omni.kit.commands.execute('BatchRenamePrimsCommand', renames=ordered)
+
+        renamed = dict(ordered)
+        omni.usd.get_context().get_selection().set_selected_prim_paths(
+            [str(get_renamed_path(path, renamed)) for path in paths], True)
+
+    def set_root_path(self):
+        paths = self.get_select_prim_paths()
+        if paths:
+            self.root_path_field.model.set_value(paths[0])
+
+    def get_pattern_renames(self):
+        stage = omni.usd.get_context().get_stage()
+        return iter_pattern_renames(stage,
+                                    self.root_path_field.model.get_value_as_string(),
+                                    self.pattern_field.model.get_value_as_string(),
+                                    self.template_field.model.get_value_as_string(),
+                                    self.regex_checkbox.model.get_value_as_bool())
+
+    def preview_pattern_rename(self):
+        """dry run, the matches are only walked one page at a time"""
+        self.preview_stack.clear()
+        try:
+            self._preview_renames = self.get_pattern_renames()
+        except re.error as e:
+            print(e)
+            self._preview_renames = None
+            return
+        self.load_preview_page()
+
+    def load_preview_page(self):
+        if self._preview_renames is None:
+            return
+
+        with self.preview_stack:
+            try:
+                for path, new_name in itertools.islice(self._preview_renames, self.PREVIEW_PAGE_SIZE):
+                    ui.Label(f"{path}  ->  {new_name}", height=20)
+            except re.error as e:
+                print(e)
+                self._preview_renames = None
+
+    def apply_pattern_rename(self):
+        self._preview_renames = None
+        self.preview_stack.clear()
+        try:
+            pattern_renames = self.get_pattern_renames()
+        except re.error as e:
+            print(e)
+            return
+        self._task_runner.run(self.iter_apply_pattern_rename(pattern_renames))
+
+    def iter_apply_pattern_rename(self, pattern_renames):
+        renames = {}
+        for path, new_name in pattern_renames:
+            renames[path] = new_name
+            if len(renames) % 1000 == 0:
+                yield None
+
+        stage = omni.usd.get_context().get_stage()
+        ordered, errors = plan_renames(stage, renames)
+        if errors:
+            for error in errors:
+                print(error)
+            return
 
+        omni.kit.commands.execute('BatchRenamePrimsCommand', renames=ordered)
 
     def get_select_prim_paths(self):
         _selection = omni.usd.get_context().get_selection()
@@ -0,0 +1,281 @@
+import itertools
+import omni.usd
+from typing import Dict, List
+from pxr import Usd, Sdf, Tf, UsdShade
+
+
+class BindingIndex:
+    """
+    Material path <-> bound prim paths index of one stage.
+
+    The index is built with a single traversal and a single ComputeBoundMaterials
+    call, then kept up to date from Usd.Notice.ObjectsChanged. Notices only record
+    the dirty paths, they are resolved the next time the index is queried.
+
+    Collection-based bindings reach prims outside the subtree of the prim holding them,
+    so a change to a collection binding or to any collection membership rebuilds the
+    whole index instead.
+    """
+
+    CHUNK_SIZE = 5000
+
+    def __init__(self, stage: Usd.Stage):
+        self._stage = stage
+        self._prim_to_material: Dict[Sdf.Path, Sdf.Path] = {}
+        self._material_to_prims: Dict[Sdf.Path, Dict[Sdf.Path, None]] = {}
+
+        self._needs_rebuild = True
+        # the stage changed while a chunked build was suspended
+        self._build_stale = False
+        # prim count of the last build, to report the progress of the next one
+        self._prim_count = 0
+        # prims whose binding changed, their subtree is unchanged
+        self._dirty_bindings = set()
+        # prims whose subtree was recomposed (created, removed, (de)activated...)
+        self._dirty_resyncs = set()
+
+        self._listener = Tf.Notice.Register(Usd.Notice.ObjectsChanged, self._on_objects_changed, stage)
+
+    @property
+    def stage(self):
+        return self._stage
+
+    def destroy(self):
+        if self._listener:
+            self._listener.Revoke()
+            self._listener = None
+        self._prim_to_material = {}
+        self._material_to_prims = {}
+
+    def get_bound_prim_paths(self, material_path) -> List[Sdf.Path]:
+        """
+        get the paths of the prims bound to the material
+        """
+        self._flush()
+        return list(self._material_to_prims.get(Sdf.Path(str(material_path)), ()))
+
+    def get_material_path(self, prim_path):
+        """
+        get the path of the material resolved for the prim, None if it is not bound
+        """
+        self._flush()
+        return self._prim_to_material.get(Sdf.Path(str(prim_path)))
+
+    def get_bound_prims_index(self) -> Dict[Sdf.Path, List[Sdf.Path]]:
+        """
+        get the whole material path -> bound prim paths index
+        """
+        self._flush()
+        return {material_path: list(prim_paths) for material_path, prim_paths in self._material_to_prims.items()}
+
+    def invalidate(self):
+        self._needs_rebuild = True
+
+    def _on_objects_changed(self, notice, sender):
+        if self._needs_rebuild:
+            # a chunked build in progress has to start over
+            self._build_stale = True
+            return
+
+        resynced_paths = notice.GetResyncedPaths()
+        changed_paths = notice.GetChangedInfoOnlyPaths()
+        for path in itertools.chain(resynced_paths, changed_paths):
+            if path.IsPropertyPath() and self._is_collection_property(path):
+                self._needs_rebuild = True
+                return
+
+        for path in resynced_paths:
+            if path.IsPropertyPath():
+                if self._is_binding_property(path):
+                    self._dirty_bindings.add(path.GetPrimPath())
+            else:
+                self._dirty_resyncs.add(path)
+
+        for path in changed_paths:
+            if path.IsPropertyPath() and self._is_binding_property(path):
+                self._dirty_bindings.add(path.GetPrimPath())
+
+    def _is_binding_property(self, path: Sdf.Path):
+        return path.name.startswith(UsdShade.Tokens.materialBinding)
+
+    def _is_collection_property(self, path: Sdf.Path):
+        """collection bindings and the includes, excludes... of the collections they use"""
+        return path.name.startswith(UsdShade.Tokens.materialBindingCollection) or path.name.startswith("collection:")
+
+    def _flush(self):
+        if self._needs_rebuild:
+            self._rebuild()
+            return
+
+        if not self._dirty_bindings and not self._dirty_resyncs:
+            return
+
+        resync_roots = Sdf.Path.RemoveDescendentPaths(list(self._dirty_resyncs))
+        binding_roots = Sdf.Path.RemoveDescendentPaths(list(self._dirty_bindings) + resync_roots)
+        self._dirty_bindings = set()
+        self._dirty_resyncs = set()
+
+        # adding, removing or moving materials changes what everything resolves to
+        for root in resync_roots:
+            if self._touches_materials(root):
+                self._rebuild()
+                return
+
+        for root in resync_roots:
+            self._remove_recomposed(root)
+
+        stage_prims = []
+        for root in binding_roots:
+            prim = self._stage.GetPrimAtPath(root)
+            if not self._is_traversed(prim):
+                continue
+            for stage_prim in Usd.PrimRange(prim):
+                self._remove_prim(stage_prim.GetPrimPath())
+                stage_prims.append(stage_prim)
+        self._add_prims(stage_prims)
+
+    def iter_flush(self):
+        """
+        generator version of the index update for the task runner, yields the build progress
+
+        The index is built into new dicts swapped in once complete, until then the other
+        queries see that it needs a rebuild and do a synchronous one.
+        """
+        if not self._needs_rebuild:
+            self._flush()
+            return
+
+        while self._needs_rebuild:
+            self._build_stale = False
+            work = self._iter_build()
+            try:
+                while True:
+                    yield next(work)
+                    # a synchronous rebuild completed the index meanwhile
+                    if not self._needs_rebuild:
+                        return
+                    # the stage changed while the work was suspended, start over
+                    if self._build_stale:
+                        break
+            except StopIteration as e:
+                self._swap(*e.value)
+
+    def _rebuild(self):
+        work = self._iter_build()
+        while True:
+            try:
+                next(work)
+            except StopIteration as e:
+                self._swap(*e.value)
+                return
+
+    def _iter_build(self):
+        """
+        traverse the stage into new dicts, yields the progress and returns (prim to material, material to prims)
+        """
+        prim_to_material = {}
+        material_to_prims = {}
+        prim_count = 0
+        stage_prims = []
+        for stage_prim in self._stage.Traverse():
+            stage_prims.append(stage_prim)
+            if len(stage_prims) < self.CHUNK_SIZE:
+                continue
+
+            self._add_prims(stage_prims, prim_to_material, material_to_prims)
+            prim_count += len(stage_prims)
+            stage_prims = []
+            yield min(0.99, prim_count / self._prim_count) if self._prim_count else 0
+
+        self._add_prims(stage_prims, prim_to_material, material_to_prims)
+        self._prim_count = prim_count + len(stage_prims)
+        return prim_to_material, material_to_prims
+
+    def _swap(self, prim_to_material, material_to_prims):
+        self._prim_to_material = prim_to_material
+        self._material_to_prims = material_to_prims
+        self._dirty_bindings = set()
+        self._dirty_resyncs = set()
+        self._needs_rebuild = False
+
+    def _add_prims(self, stage_prims, prim_to_material=None, material_to_prims=None):
+        if not stage_prims:
+            return
+        if prim_to_material is None:
+            prim_to_material = self._prim_to_material
+            material_to_prims = self._material_to_prims
+
+        bounds = UsdShade.MaterialBindingAPI.ComputeBoundMaterials(stage_prims, UsdShade.Tokens.allPurpose)
+        for stage_prim, material, relationship in zip(stage_prims, bounds[0], bounds[1]):
+            material_prim = material.GetPrim()
+            if not material_prim.IsValid():
+                continue
+
+            prim_path = stage_prim.GetPrimPath()
+            material_path = material_prim.GetPrimPath()
+            prim_to_material[prim_path] = material_path
+            material_to_prims.setdefault(material_path, {})[prim_path] = None
+
+    def _remove_prim(self, prim_path):
+        material_path = self._prim_to_material.pop(prim_path, None)
+        if material_path is None:
+            return
+
+        prim_paths = self._material_to_prims[material_path]
+        prim_paths.pop(prim_path, None)
+        if not prim_paths:
+            del self._material_to_prims[material_path]
+
+    def _remove_recomposed(self, root: Sdf.Path):
+        # the subtree may not exist anymore, so look it up in the index itself
+        removed = [prim_path for prim_path in self._prim_to_material if prim_path.HasPrefix(root)]
+        for prim_path in removed:
+            self._remove_prim(prim_path)
+
+    def _touches_materials(self, root: Sdf.Path):
+        if root == Sdf.Path.absoluteRootPath:
+            return True
+
+        for material_path in self._material_to_prims:
+            if material_path.HasPrefix(root):
+                return True
+
+        prim = self._stage.GetPrimAtPath(root)
+        return bool(prim) and prim.IsA(UsdShade.Material)
+
+    def _is_traversed(self, prim: Usd.Prim):
+        """
+        whether stage.Traverse() visits the prim, i.e. it and all its ancestors pass the default predicate
+        """
+        while prim and not prim.IsPseudoRoot():
+            if not (prim.IsActive() and prim.IsLoaded() and prim.IsDefined() and not prim.IsAbstract()):
+                return False
+            prim = prim.GetParent()
+        return bool(prim)
+
+
+_binding_index = None
+
+
+def get_binding_index(stage: Usd.Stage = None) -> BindingIndex:
+    """
+    get the binding index of the stage, it is built once per stage and shared by all tools,
+    the extension destroys it when the stage is closed or another one is opened
+    """
+    global _binding_index
+
+    if stage is None:
+        stage = omni.usd.get_context().get_stage()
+
+    if _binding_index is None or _binding_index.stage != stage:
+        destroy_binding_index()
+        _binding_index = BindingIndex(stage)
+    return _binding_index
+
+
+def destroy_binding_index():
+    global _binding_index
+
+    if _binding_index is not None:
+        _binding_index.destroy()
+        _binding_index = None
@@ -0,0 +1,114 @@
+import omni.kit.commands
+import omni.usd
+import numpy as np
+from pxr import Usd, Sdf, UsdGeom
+
+from ..sdf_utils import remove_specs, get_or_create_prim_spec
+
+
+def _to_vt_array(type_name: Sdf.ValueTypeName, array):
+    return type_name.type.pythonClass.FromNumpy(np.ascontiguousarray(array))
+
+
+class CleanupMeshesCommand(omni.kit.commands.Command):
+    """
+    Write cleaned mesh arrays and remove unused primvars.
+
+    All the edits are authored on the edit target layer inside one Sdf.ChangeBlock. The
+    attribute specs are copied to an anonymous layer before they are touched, undo copies
+    them back. A primvar only authored on the edit target is removed, one with opinions in
+    other layers is blocked. The indices of the face subsets are rewritten with the mesh.
+
+    Args:
+        cleanups: MeshCleanup list, see cleanup.engine.iter_clean_meshes.
+    """
+
+    def __init__(self, cleanups, stage: Usd.Stage = None):
+        self._cleanups = cleanups
+        self._stage = stage or omni.usd.get_context().get_stage()
+        self._layer = None
+        self._backup = None
+        self._touched = []
+        self._created = []
+
+    def do(self):
+        edit_target = self._stage.GetEditTarget()
+        self._layer = edit_target.GetLayer()
+        self._backup = Sdf.Layer.CreateAnonymous()
+        self._touched = []
+        self._created = []
+
+        # read everything from the composed stage before authoring
+        edits = []
+        for cleanup in self._cleanups:
+            prim = self._stage.GetPrimAtPath(cleanup.prim_path)
+            if not prim:
+                continue
+            spec_path = edit_target.MapToSpecPath(cleanup.prim_path)
+            values = []
+            for name, (type_name, array) in cleanup.values.items():
+                attr = prim.GetAttribute(name)
+                variability = attr.GetVariability() if attr else Sdf.VariabilityVarying
+                values.append((name, type_name, variability, _to_vt_array(type_name, array)))
+            removed = []
+            for name in cleanup.removed:
+                attr = prim.GetAttribute(name)
+                if not attr:
+                    continue
+                layers = {spec.layer for spec in attr.GetPropertyStack()}
+                removed.append((name, attr.GetTypeName(), attr.GetVariability(), layers == {self._layer}))
+            edits.append((spec_path, values, removed))
+
+            # the face subsets of the mesh follow the faces left
+            for subset_path, (type_name, array) in cleanup.subset_indices.items():
+                subset_spec_path = edit_target.MapToSpecPath(subset_path)
+                indices = [(UsdGeom.Tokens.indices, type_name, Sdf.VariabilityVarying, _to_vt_array(type_name, array))]
+                edits.append((subset_spec_path, indices, []))
+
+        with Sdf.ChangeBlock():
+            for spec_path, values, removed in edits:
+                prim_spec, created_path = get_or_create_prim_spec(self._layer, spec_path)
+                if created_path:
+                    self._created.append(created_path)
+
+                for name, type_name, variability, value in values:
+                    attr_spec = self._backup_attribute(prim_spec, name)
+                    if not attr_spec:
+                        attr_spec = Sdf.AttributeSpec(prim_spec, name, type_name, variability)
+                    attr_spec.default = value
+
+                for name, type_name, variability, only_here in removed:
+                    attr_spec = self._backup_attribute(prim_spec, name)
+                    if only_here:
+                        prim_spec.RemoveProperty(attr_spec)
+                        continue
+                    if not attr_spec:
+                        attr_spec = Sdf.AttributeSpec(prim_spec, name, type_name, variability)
+                    attr_spec.default = Sdf.ValueBlock()
+
+    def _backup_attribute(self, prim_spec: Sdf.PrimSpec, name: str):
+        path = prim_spec.path.AppendProperty(name)
+        attr_spec = self._layer.GetAttributeAtPath(path)
+        if attr_spec:
+            Sdf.CreatePrimInLayer(self._backup, prim_spec.path)
+            Sdf.CopySpec(self._layer, path, self._backup, path)
+        self._touched.append((path, bool(attr_spec)))
+        return attr_spec
+
+    def undo(self):
+        if not self._layer:
+            return
+
+        with Sdf.ChangeBlock():
+            for path, existed in reversed(self._touched):
+                prim_spec = self._layer.GetPrimAtPath(path.GetPrimPath())
+                if not prim_spec:
+                    continue
+                attr_spec = self._layer.GetAttributeAtPath(path)
+                if attr_spec:
+                    prim_spec.RemoveProperty(attr_spec)
+                if existed:
+                    Sdf.CopySpec(self._backup, path, self._layer, path)
+            remove_specs(self._layer, self._created)
+        self._touched = []
+        self._created = []
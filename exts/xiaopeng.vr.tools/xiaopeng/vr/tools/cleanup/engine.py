@@ -0,0 +1,294 @@
+from typing import Dict, List, Optional
+import numpy as np
+from pxr import Usd, Sdf, UsdGeom, UsdShade
+
+from ..binding_index import get_binding_index
+
+DEFAULT_TOLERANCE = 1e-5
+# smaller tolerances, 0 included, are clamped to it, the positions are divided by the tolerance
+MIN_TOLERANCE = 1e-9
+# vertex values closer than this are the same when welding
+VALUE_PRECISION = 1e-5
+# subdivision and animation data that refers to the faces or vertices, meshes carrying it are skipped
+UNSUPPORTED_ATTRIBUTES = ("holeIndices", "cornerIndices", "creaseIndices", "velocities", "accelerations")
+# 2d vector types kept for opaque shaders, a float2 "st" is often authored without the texCoord role
+_TEXTURE_COORDINATE_TYPES = {Sdf.ValueTypeNames.Float2.type, Sdf.ValueTypeNames.Double2.type,
+                             Sdf.ValueTypeNames.Half2.type}
+
+
+class MeshCleanup:
+    def __init__(self, prim_path: Sdf.Path):
+        self.prim_path = prim_path
+        # attribute name -> (type name, new array)
+        self.values: Dict[str, tuple] = {}
+        # attributes to remove
+        self.removed: List[str] = []
+        # GeomSubset path -> (type name, new indices), the faces are renumbered when some are dropped
+        self.subset_indices: Dict[Sdf.Path, tuple] = {}
+        self.bytes_before = 0
+        self.bytes_after = 0
+
+    @property
+    def bytes_saved(self):
+        return self.bytes_before - self.bytes_after
+
+
+class _Field:
+    """an array attribute following the points, faces or corners of the mesh"""
+
+    def __init__(self, name, type_name, interpolation, values, indices_name=None, indices=None):
+        self.name = name
+        self.type_name = type_name
+        self.interpolation = interpolation
+        self.values = values
+        self.indices_name = indices_name
+        self.indices = indices
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + (self.indices.nbytes if self.indices is not None else 0)
+
+    def elements(self):
+        """the array indexed by vertex, face or corner"""
+        return self.indices if self.indices is not None else self.values
+
+
+def get_material_primvars(material: Usd.Prim) -> Optional[set]:
+    """
+    names of the primvars read by the shading network of the material. The primvars an opaque
+    shader (MDL) may read are not known, None is added to the names so every 2d primvar,
+    the texture coordinates, is kept for them.
+    """
+    names = set()
+    opaque = False
+    for prim in Usd.PrimRange(material):
+        shader = UsdShade.Shader(prim)
+        if not shader:
+            continue
+        if shader.GetImplementationSource() != UsdShade.Tokens.id:
+            opaque = True
+            continue
+        shader_id = shader.GetIdAttr().Get() or ""
+        if shader_id.startswith("UsdPrimvarReader"):
+            varname = shader.GetInput("varname")
+            value = varname.Get() if varname else None
+            if value:
+                names.add(str(value))
+    if opaque:
+        names.add(None)
+    return names
+
+
+def _primvar_is_used(primvar: UsdGeom.Primvar, used: Optional[set]) -> bool:
+    if used is None:
+        return True
+    name = primvar.GetPrimvarName()
+    if name in used or name == "normals" or name.startswith("skel:"):
+        return True
+    # opaque shaders read the texture coordinates, authored with the texCoord role or not
+    if None not in used:
+        return False
+    type_name = primvar.GetTypeName()
+    return (type_name.role == Sdf.ValueRoleNames.TextureCoordinate or
+            type_name.scalarType.type in _TEXTURE_COORDINATE_TYPES)
+
+
+def clean_mesh(mesh: UsdGeom.Mesh, tolerance: float, used_primvars: Optional[set]) -> Optional[MeshCleanup]:
+    """
+    Weld the vertices within the tolerance, drop the degenerate faces and the unused vertices,
+    and drop the primvars the material does not read, all with array operations.
+
+    Returns None when there is nothing to clean or the mesh can not be cleaned.
+    """
+    tolerance = max(float(tolerance), MIN_TOLERANCE)
+    prim = mesh.GetPrim()
+    points_attr = mesh.GetPointsAttr()
+    counts_attr = mesh.GetFaceVertexCountsAttr()
+    indices_attr = mesh.GetFaceVertexIndicesAttr()
+    for attr in (points_attr, counts_attr, indices_attr):
+        if attr.GetNumTimeSamples() > 0:
+            return None
+    for name in UNSUPPORTED_ATTRIBUTES:
+        attr = prim.GetAttribute(name)
+        if attr and attr.HasValue() and len(attr.Get() or []):
+            return None
+
+    points = points_attr.Get()
+    counts = counts_attr.Get()
+    indices = indices_attr.Get()
+    if points is None or counts is None or indices is None or not len(points) or not len(counts):
+        return None
+    points = np.asarray(points)
+    counts = np.asarray(counts)
+    indices = np.asarray(indices)
+    face_ids = np.repeat(np.arange(len(counts)), counts)
+    if len(face_ids) != len(indices) or indices.max() >= len(points):
+        return None
+
+    # the face subsets follow the faces, the other element types can not be remapped
+    subsets = []
+    for subset in UsdGeom.Subset.GetAllGeomSubsets(mesh):
+        subset_attr = subset.GetIndicesAttr()
+        if subset.GetElementTypeAttr().Get() != UsdGeom.Tokens.face or subset_attr.GetNumTimeSamples() > 0:
+            return None
+        subsets.append((subset.GetPath(), subset_attr.GetTypeName(), np.asarray(subset_attr.Get() or [])))
+
+    result = MeshCleanup(prim.GetPath())
+    fields = []
+    normals_attr = mesh.GetNormalsAttr()
+    if normals_attr.HasValue() and normals_attr.GetNumTimeSamples() == 0:
+        fields.append(_Field(normals_attr.GetName(), normals_attr.GetTypeName(), mesh.GetNormalsInterpolation(),
+                             np.asarray(normals_attr.Get())))
+
+    for primvar in UsdGeom.PrimvarsAPI(mesh).GetPrimvarsWithValues():
+        attr = primvar.GetAttr()
+        indices_name = primvar.GetIndicesAttr().GetName() if primvar.IsIndexed() else None
+        if not _primvar_is_used(primvar, used_primvars):
+            result.removed.append(attr.GetName())
+            if indices_name:
+                result.removed.append(indices_name)
+            continue
+
+        interpolation = primvar.GetInterpolation()
+        if interpolation == UsdGeom.Tokens.constant:
+            continue
+        if attr.GetNumTimeSamples() > 0:
+            return None
+        values = np.asarray(primvar.Get())
+        if values.dtype.kind not in "biuf":
+            return None
+        fields.append(_Field(attr.GetName(), attr.GetTypeName(), interpolation, values,
+                             indices_name, np.asarray(primvar.GetIndices()) if indices_name else None))
+
+    # weld: vertices with the same quantized position and vertex values become one
+    keys = [np.round(points / tolerance).astype(np.int64)]
+    for field in fields:
+        if field.interpolation in (UsdGeom.Tokens.vertex, UsdGeom.Tokens.varying):
+            elements = field.elements()
+            if len(elements) != len(points):
+                return None
+            if elements.dtype.kind == "f":
+                elements = np.round(elements / VALUE_PRECISION).astype(np.int64)
+            keys.append(elements.reshape(len(points), -1).astype(np.int64))
+    _, first_vertex, weld = np.unique(np.concatenate(keys, axis=1), axis=0, return_index=True, return_inverse=True)
+    weld = weld.reshape(-1)
+    welded = weld[indices]
+
+    # drop the corners repeating the next one, then the faces left with less than 3 corners or no area
+    starts = np.zeros(len(counts), dtype=np.int64)
+    np.cumsum(counts[:-1], out=starts[1:])
+    k = np.arange(len(indices)) - starts[face_ids]
+    next_corner = starts[face_ids] + (k + 1) % counts[face_ids]
+    corners = np.flatnonzero(welded != welded[next_corner])
+    corner_faces = face_ids[corners]
+    new_counts = np.bincount(corner_faces, minlength=len(counts))
+
+    corner_points = points[first_vertex[welded[corners]]].astype(np.float64)
+    new_starts = np.zeros(len(counts), dtype=np.int64)
+    np.cumsum(new_counts[:-1], out=new_starts[1:])
+    k = np.arange(len(corners)) - new_starts[corner_faces]
+    next_point = corner_points[new_starts[corner_faces] + (k + 1) % new_counts[corner_faces]]
+    cross = np.cross(corner_points, next_point)
+    area = 0.5 * np.linalg.norm(np.stack([np.bincount(corner_faces, cross[:, axis], minlength=len(counts))
+                                          for axis in range(3)], axis=1), axis=1)
+    keep_faces = (new_counts >= 3) & (area > tolerance * tolerance * 1e-2)
+    corners = corners[keep_faces[corner_faces]]
+    kept_faces = np.flatnonzero(keep_faces)
+
+    # compact: only the welded vertices still used stay
+    used, new_indices = np.unique(welded[corners], return_inverse=True)
+    source_vertices = first_vertex[used]
+
+    if (len(source_vertices) == len(points) and len(corners) == len(indices) and not result.removed):
+        return None
+
+    result.bytes_before = points.nbytes + counts.nbytes + indices.nbytes + sum(field.nbytes for field in fields)
+    result.values[points_attr.GetName()] = (points_attr.GetTypeName(), points[source_vertices])
+    result.values[counts_attr.GetName()] = (counts_attr.GetTypeName(), new_counts[kept_faces].astype(counts.dtype))
+    result.values[indices_attr.GetName()] = (indices_attr.GetTypeName(), new_indices.reshape(-1).astype(indices.dtype))
+
+    if len(kept_faces) != len(counts):
+        new_face_ids = np.full(len(counts), -1, dtype=np.int64)
+        new_face_ids[kept_faces] = np.arange(len(kept_faces))
+        for subset_path, type_name, subset_indices in subsets:
+            valid = subset_indices[(subset_indices >= 0) & (subset_indices < len(counts))]
+            remapped = new_face_ids[valid]
+            result.subset_indices[subset_path] = (type_name, remapped[remapped >= 0].astype(np.int32))
+
+    lookups = {
+        UsdGeom.Tokens.vertex: source_vertices,
+        UsdGeom.Tokens.varying: source_vertices,
+        UsdGeom.Tokens.faceVarying: corners,
+        UsdGeom.Tokens.uniform: kept_faces,
+    }
+    for field in fields:
+        lookup = lookups.get(field.interpolation)
+        if lookup is None:
+            continue
+        if field.indices is not None:
+            result.values[field.indices_name] = (Sdf.ValueTypeNames.IntArray, field.indices[lookup])
+        else:
+            result.values[field.name] = (field.type_name, field.values[lookup])
+
+    # removed primvars are not part of the data left
+    result.bytes_after = sum(value.nbytes for _, value in result.values.values())
+    for field in fields:
+        if field.indices is not None:
+            result.bytes_after += field.values.nbytes
+    for name in result.removed:
+        value = prim.GetAttribute(name).Get()
+        try:
+            result.bytes_before += np.asarray(value).nbytes
+        except (TypeError, ValueError):
+            pass
+    return result
+
+
+def iter_clean_meshes(stage: Usd.Stage, root_paths, tolerance: float = DEFAULT_TOLERANCE,
+                      strip_primvars: bool = True):
+    """
+    generator for the task runner, returns the MeshCleanup of every mesh at or under root_paths
+    """
+    tolerance = max(float(tolerance), MIN_TOLERANCE)
+    index = get_binding_index(stage)
+    if strip_primvars:
+        yield from index.iter_flush()
+
+    material_primvars = {}
+    results = []
+    visited = set()
+    for root_path in Sdf.Path.RemoveDescendentPaths([Sdf.Path(str(path)) for path in root_paths]):
+        root = stage.GetPrimAtPath(root_path)
+        if not root:
+            continue
+        prim_range = iter(Usd.PrimRange(root))
+        for prim in prim_range:
+            if prim.IsInstance():
+                prim_range.PruneChildren()
+                continue
+            if not prim.IsA(UsdGeom.Mesh) or prim.GetPath() in visited:
+                continue
+            visited.add(prim.GetPath())
+
+            used = None
+            if strip_primvars:
+                material_path = index.get_material_path(prim.GetPath())
+                # without a material the viewport draws the display color, nothing is stripped
+                if material_path is not None:
+                    # the materials of the face subsets read the primvars of the mesh as well
+                    material_paths = {material_path}
+                    for subset in UsdGeom.Subset.GetAllGeomSubsets(UsdGeom.Imageable(prim)):
+                        subset_material_path = index.get_material_path(subset.GetPath())
+                        if subset_material_path is not None:
+                            material_paths.add(subset_material_path)
+                    used = set()
+                    for path in material_paths:
+                        if path not in material_primvars:
+                            material_primvars[path] = get_material_primvars(stage.GetPrimAtPath(path))
+                        used |= material_primvars[path]
+
+            cleanup = clean_mesh(UsdGeom.Mesh(prim), tolerance, used)
+            if cleanup is not None:
+                results.append(cleanup)
+            yield None
+    return results
@@ -0,0 +1,94 @@
+import omni.ext
+import omni.ui as ui
+import omni.usd
+import omni.kit.commands
+
+from ..task_runner import TaskRunner
+from .engine import DEFAULT_TOLERANCE, MIN_TOLERANCE, iter_clean_meshes
+
+
+class MeshCleanupWindow(ui.Window):
+    def __init__(self, title: str, delegate=None, **kwargs):
+        super().__init__(title, **kwargs)
+
+        self._cleanups = []
+        self._task_runner = TaskRunner()
+
+        self.frame.set_build_fn(self._build_fn)
+
+    def destroy(self):
+        self._task_runner.cancel()
+        # It will destroy all the children
+        super().destroy()
+
+    def on_shutdown(self):
+        self._win = None
+
+    def show(self):
+        self.visible = True
+        self.focus()
+
+    def hide(self):
+        self.visible = False
+
+    def _build_fn(self):
+
+        with self.frame:
+            with ui.VStack(spacing=5):
+                with ui.HStack(spacing=5, height=0):
+                    # the selected prims are cleaned when it is empty
+                    ui.Label('Root', width=70)
+                    self.root_path_field = ui.StringField(height=22)
+                    ui.Button('Set', width=50, height=22, clicked_fn=self.set_root_path)
+                with ui.HStack(spacing=5, height=0):
+                    ui.Label('Tolerance', width=70)
+                    self.tolerance_field = ui.FloatField(width=80, height=22)
+                    self.tolerance_field.model.set_value(DEFAULT_TOLERANCE)
+                    ui.Label('Strip Unused Primvars', width=140)
+                    self.strip_checkbox = ui.CheckBox(width=20)
+                    self.strip_checkbox.model.set_value(True)
+
+                ui.Button("Clean Up", height=40, clicked_fn=self.clean_up)
+
+                with ui.ScrollingFrame():
+                    self.report_frame = ui.Frame(build_fn=self._build_report)
+
+                with ui.HStack(spacing=5, height=0):
+                    self.progressbar = ui.ProgressBar(height=20)
+                    ui.Button("Cancel", width=60, height=20, clicked_fn=self._task_runner.cancel)
+                self._task_runner.progressbar = self.progressbar
+
+    def _build_report(self):
+        with ui.VStack(height=0, spacing=2):
+            total = sum(cleanup.bytes_saved for cleanup in self._cleanups)
+            ui.Label(f"{len(self._cleanups)} meshes cleaned, {total / 1024:.1f} KB saved", height=20)
+            for cleanup in sorted(self._cleanups, key=lambda cleanup: cleanup.bytes_saved, reverse=True):
+                with ui.HStack(spacing=5, height=20):
+                    ui.Label(str(cleanup.prim_path))
+                    ui.Label(f"{cleanup.bytes_saved / 1024:.1f} KB", width=80)
+
+    def set_root_path(self):
+        paths = omni.usd.get_context().get_selection().get_selected_prim_paths()
+        if paths:
+            self.root_path_field.model.set_value(paths[0])
+
+    def clean_up(self):
+        root_path = self.root_path_field.model.get_value_as_string()
+        paths = [root_path] if root_path else omni.usd.get_context().get_selection().get_selected_prim_paths()
+        if not paths:
+            return
+
+        def on_done(cleanups):
+            self._cleanups = cleanups or []
+            if self._cleanups:
+                omni.kit.commands.execute('CleanupMeshesCommand', cleanups=self._cleanups)
+            self.report_frame.rebuild()
+
+        tolerance = self.tolerance_field.model.get_value_as_float()
+        if tolerance < MIN_TOLERANCE:
+            tolerance = MIN_TOLERANCE
+            self.tolerance_field.model.set_value(tolerance)
+
+        stage = omni.usd.get_context().get_stage()
+        self._task_runner.run(iter_clean_meshes(stage, paths, tolerance,
+                                                self.strip_checkbox.model.get_value_as_bool()), on_done)
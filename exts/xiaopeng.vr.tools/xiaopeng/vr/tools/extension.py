@@ -1,10 +1,14 @@
-from .window import VRToolsWindow
+from .window import VRToolsWindow, unregister_tool_commands
+from .binding_index import destroy_binding_index
 
 from functools import partial
 import asyncio
+import time
+import carb
 import omni.ext
 import omni.kit.ui
 import omni.ui as ui
+import omni.usd
 
 
 # Functions and vars are available to other extension as usual in python: `example.python_ext.some_public_function(x)`
@@ -23,6 +27,13 @@ class XiaopengVrToolsExtension(omni.ext.IExt):
     MENU_PATH = f"Window/XPeng/{WINDOW_NAME}"
 
     def on_startup(self):
+        start = time.perf_counter()
+        self._window = None
+        # the binding index holds the stage, it goes with it
+        self._stage_event_sub = omni.usd.get_context().get_stage_event_stream().create_subscription_to_pop(
+            self._on_stage_event, name="xiaopeng.vr.tools binding index"
+        )
+
         # The ability to show up the window if the system requires it. We use it
         # in QuickLayout.
         ui.Workspace.set_show_window_fn(XiaopengVrToolsExtension.WINDOW_NAME, partial(self.show_window, None))
@@ -37,15 +48,24 @@ class XiaopengVrToolsExtension(omni.ext.IExt):
         # Show the window. It will call `self.show_window`
         # ui.Workspace.show_window(XiaopengVrToolsExtension.WINDOW_NAME)
 
+        carb.log_info(f"[xiaopeng.vr.tools] started in {(time.perf_counter() - start) * 1000:.1f} ms")
+
     def on_shutdown(self):
         self._menu = None
         if self._window:
             self._window.destroy()
             self._window = None
+        self._stage_event_sub = None
+        destroy_binding_index()
+        unregister_tool_commands()
 
         # Deregister the function that shows the window from omni.ui
         ui.Workspace.set_show_window_fn(XiaopengVrToolsExtension.WINDOW_NAME, None)
 
+    def _on_stage_event(self, event):
+        if event.type in (int(omni.usd.StageEventType.CLOSED), int(omni.usd.StageEventType.OPENED)):
+            destroy_binding_index()
+
     def _set_menu(self, value):
         """Set the menu to create this window on and off"""
         editor_menu = omni.kit.ui.get_editor_menu()
@@ -0,0 +1,116 @@
+import omni.kit.commands
+import omni.usd
+from pxr import Usd, Sdf, UsdGeom
+
+from ..sdf_utils import bind_material_spec, unique_name, author_transform, retarget_specs, restore_retargeted_specs
+
+
+class CollapseXformsCommand(omni.kit.commands.Command):
+    """
+    Collapse single-child Xform chains into the prim at their end.
+
+    The survivor is moved under the parent of the top of its chain, in the place of the top
+    among its siblings and under the name picked by the engine, with an
+    Sdf.BatchNamespaceEdit. Its transform becomes the composed transform of the chain as a
+    single xformOp:transform and it gets the binding of the chain when it has none. The
+    relationships and connections of the layer pointing into a moved subtree follow it.
+    Every edit is authored on the edit target layer inside one Sdf.ChangeBlock, the chains
+    are copied to an anonymous layer first so undo can copy them back.
+
+    Args:
+        chains: CollapseChain list ordered deepest first, see hierarchy.engine.iter_find_chains.
+    """
+
+    def __init__(self, chains, stage: Usd.Stage = None):
+        self._chains = chains
+        self._stage = stage or omni.usd.get_context().get_stage()
+        self._layer = None
+        self._backup = None
+        self._backed_up = []
+        self._retargeted = []
+
+    def do(self):
+        edit_target = self._stage.GetEditTarget()
+        self._layer = edit_target.GetLayer()
+        self._backup = Sdf.Layer.CreateAnonymous()
+        self._backed_up = []
+        self._retargeted = []
+
+        chains = [(edit_target.MapToSpecPath(chain.top_path), edit_target.MapToSpecPath(chain.survivor_path),
+                   edit_target.MapToSpecPath(chain.path), chain)
+                  for chain in self._chains]
+        # the nested chains are part of the subtree of the outermost ones
+        outermost = []
+        for top_path, _, _, _ in sorted(chains, key=lambda item: item[0].pathElementCount):
+            if not any(top_path.HasPrefix(path) for path in outermost):
+                Sdf.CreatePrimInLayer(self._backup, top_path)
+                Sdf.CopySpec(self._layer, top_path, self._backup, top_path)
+                outermost.append(top_path)
+
+        moves = []
+        with Sdf.ChangeBlock():
+            for top_path, survivor_path, path, chain in chains:
+                moved = self._move(top_path, survivor_path, path)
+                if top_path in outermost:
+                    # restored in the reverse order, a sibling may have taken the name of the top
+                    self._backed_up.append((top_path, path if moved else top_path))
+                if not moved:
+                    continue
+                moves.append((survivor_path, path))
+
+                prim_spec = self._layer.GetPrimAtPath(path)
+                if chain.matrix is not None:
+                    for attr_spec in list(prim_spec.attributes):
+                        if attr_spec.name.startswith("xformOp:") or attr_spec.name == UsdGeom.Tokens.xformOpOrder:
+                            prim_spec.RemoveProperty(attr_spec)
+                    author_transform(prim_spec, chain.matrix)
+                if chain.material_path is not None:
+                    bind_material_spec(self._layer, path, chain.material_path, chain.has_binding_api)
+
+            if moves:
+                self._retarget(moves)
+
+    def _move(self, top_path: Sdf.Path, survivor_path: Sdf.Path, path: Sdf.Path) -> bool:
+        parent_path = top_path.GetParentPath()
+        parent_spec = self._layer.GetPrimAtPath(parent_path)
+        siblings = [child.name for child in parent_spec.nameChildren]
+        index = siblings.index(top_path.name)
+        tmp_name = unique_name(top_path.name + "_collapsed", set(siblings) | {path.name})
+        tmp_path = parent_path.AppendChild(tmp_name)
+
+        # the survivor takes the place of the top, then the rest of the chain goes
+        edit = Sdf.BatchNamespaceEdit()
+        edit.Add(Sdf.NamespaceEdit.Rename(top_path, tmp_name))
+        edit.Add(Sdf.NamespaceEdit.ReparentAndRename(survivor_path.ReplacePrefix(top_path, tmp_path), parent_path,
+                                                     path.name, index))
+        edit.Add(Sdf.NamespaceEdit.Remove(tmp_path))
+        if not self._layer.Apply(edit):
+            print(f"{top_path}: can not be collapsed")
+            return False
+        return True
+
+    def _retarget(self, moves):
+        def move(path):
+            # applied in the order of the moves, the nested ones come first
+            for survivor_path, new_path in moves:
+                if path.HasPrefix(survivor_path):
+                    path = path.ReplacePrefix(survivor_path, new_path)
+            return path
+
+        self._retargeted = retarget_specs(self._layer, move)
+
+    def undo(self):
+        if not self._layer:
+            return
+
+        with Sdf.ChangeBlock():
+            restore_retargeted_specs(self._layer, self._retargeted)
+            for top_path, path in reversed(self._backed_up):
+                # renamed in place first, so the top gets its place among the siblings back
+                if path != top_path:
+                    edit = Sdf.BatchNamespaceEdit()
+                    edit.Add(Sdf.NamespaceEdit.Rename(path, top_path.name))
+                    self._layer.Apply(edit)
+                Sdf.CopySpec(self._backup, top_path, self._layer, top_path)
+        self._retargeted = []
+        self._backed_up = []
@@ -0,0 +1,156 @@
+from typing import List, Optional
+from pxr import Usd, Sdf, Gf, UsdGeom, UsdShade
+
+from ..sdf_utils import unique_name
+
+
+class CollapseChain:
+    """
+    A single-child chain of Xforms collapsed into the prim at its end.
+
+    The survivor takes the place of the top of the chain among its siblings and the composed
+    transform of the whole chain. It keeps its own name, made unique among its new siblings.
+    """
+
+    def __init__(self, top_path: Sdf.Path, survivor_path: Sdf.Path, path: Sdf.Path, removed: int,
+                 matrix: Optional[Gf.Matrix4d], material_path: Optional[Sdf.Path], has_binding_api: bool):
+        self.top_path = top_path
+        self.survivor_path = survivor_path
+        # path of the survivor once collapsed, under the parent of the top
+        self.path = path
+        # prims removed by the collapse
+        self.removed = removed
+        # None when the survivor keeps its own transform untouched
+        self.matrix = matrix
+        # binding moved down to the survivor, None when it has its own
+        self.material_path = material_path
+        self.has_binding_api = has_binding_api
+
+
+def _local_specs_in(prim: Usd.Prim, layer: Sdf.Layer, layer_stack) -> bool:
+    """the prim is only authored on the layer within the stage layer stack"""
+    return all(spec.layer == layer for spec in prim.GetPrimStack() if spec.layer in layer_stack)
+
+
+def _has_static_transform(prim: Usd.Prim) -> bool:
+    xformable = UsdGeom.Xformable(prim)
+    return not xformable.TransformMightBeTimeVarying() and not xformable.GetResetXformStack()
+
+
+def _get_direct_binding(prim: Usd.Prim) -> Optional[Sdf.Path]:
+    rel = prim.GetRelationship(UsdShade.Tokens.materialBinding)
+    targets = rel.GetTargets() if rel else []
+    return targets[0] if targets else None
+
+
+def is_collapsible(prim: Usd.Prim, layer: Sdf.Layer, layer_stack) -> bool:
+    """
+    an Xform with a single child and nothing but a transform and a material binding on it
+    """
+    if prim.GetTypeName() != "Xform" or len(prim.GetAllChildren()) != 1:
+        return False
+    if prim.IsInstanceable() or prim.HasAuthoredReferences() or prim.HasAuthoredPayloads() or \
+            prim.HasAuthoredInherits() or prim.HasAuthoredSpecializes() or prim.GetVariantSets().GetNames():
+        return False
+    if Usd.ModelAPI(prim).GetKind():
+        return False
+    for prop in prim.GetAuthoredProperties():
+        name = prop.GetName()
+        if not (name.startswith("xformOp:") or name == UsdGeom.Tokens.xformOpOrder or
+                name == UsdShade.Tokens.materialBinding):
+            return False
+    return _has_static_transform(prim) and _local_specs_in(prim, layer, layer_stack)
+
+
+def get_hierarchy_stats(stage: Usd.Stage, root_path):
+    """(prim count, deepest level) under root_path"""
+    root = stage.GetPrimAtPath(str(root_path))
+    if not root:
+        return 0, 0
+    base = root.GetPath().pathElementCount
+    count = 0
+    depth = 0
+    for prim in Usd.PrimRange(root):
+        count += 1
+        depth = max(depth, prim.GetPath().pathElementCount - base)
+    return count, depth
+
+
+def iter_find_chains(stage: Usd.Stage, root_path):
+    """
+    generator for the task runner, returns the chains under root_path that can be collapsed,
+    deepest first so collapsing one never moves another that is not collapsed yet, the chains
+    of the same parent in the order their names were picked
+    """
+    root = stage.GetPrimAtPath(str(root_path))
+    if not root:
+        return []
+
+    layer = stage.GetEditTarget().GetLayer()
+    layer_stack = set(stage.GetLayerStack())
+    xform_cache = UsdGeom.XformCache()
+
+    chains: List[CollapseChain] = []
+    linked = set()
+    # parent path -> children names once the chains under it are collapsed
+    taken_names = {}
+    prim_range = iter(Usd.PrimRange(root))
+    for i, prim in enumerate(prim_range):
+        if i % 1000 == 0:
+            yield None
+        if prim.IsInstance():
+            prim_range.PruneChildren()
+            continue
+        if prim.GetPath() in linked:
+            continue
+        # the top level prims keep their paths
+        if prim == root or prim.GetPath().pathElementCount < 2 or not is_collapsible(prim, layer, layer_stack):
+            continue
+
+        chain = [prim]
+        survivor = prim.GetAllChildren()[0]
+        while is_collapsible(survivor, layer, layer_stack):
+            chain.append(survivor)
+            survivor = survivor.GetAllChildren()[0]
+        # the opinions of other layers on the moved subtree (binding overs...) would stay at the old paths
+        if not all(_local_specs_in(descendant, layer, layer_stack)
+                   for descendant in Usd.PrimRange(survivor, Usd.PrimAllPrimsPredicate)):
+            continue
+
+        # child first, row vectors
+        matrix = Gf.Matrix4d(1)
+        for link in reversed(chain):
+            matrix = matrix * xform_cache.GetLocalTransformation(link)[0]
+
+        if survivor.IsA(UsdGeom.Xformable):
+            if not _has_static_transform(survivor):
+                continue
+            matrix = xform_cache.GetLocalTransformation(survivor)[0] * matrix
+            if matrix == Gf.Matrix4d(1) and not UsdGeom.Xformable(survivor).GetOrderedXformOps():
+                matrix = None
+        elif matrix != Gf.Matrix4d(1):
+            continue
+        else:
+            matrix = None
+
+        material_path = None
+        if _get_direct_binding(survivor) is None:
+            for link in reversed(chain):
+                material_path = _get_direct_binding(link)
+                if material_path is not None:
+                    break
+
+        parent_path = prim.GetPath().GetParentPath()
+        if parent_path not in taken_names:
+            taken_names[parent_path] = set(prim.GetParent().GetAllChildrenNames())
+        taken = taken_names[parent_path]
+        taken.discard(prim.GetName())
+        path = parent_path.AppendChild(unique_name(survivor.GetName(), taken))
+
+        chains.append(CollapseChain(prim.GetPath(), survivor.GetPath(), path, len(chain), matrix, material_path,
+                                    survivor.HasAPI(UsdShade.MaterialBindingAPI)))
+        # the rest of the chain is handled, the survivor subtree is walked normally
+        linked.update(link.GetPath() for link in chain[1:])
+
+    chains.sort(key=lambda chain: chain.top_path.pathElementCount, reverse=True)
+    return chains
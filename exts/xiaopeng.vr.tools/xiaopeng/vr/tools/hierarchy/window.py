@@ -0,0 +1,91 @@
+import omni.ext
+import omni.ui as ui
+import omni.usd
+import omni.kit.commands
+
+from ..task_runner import TaskRunner
+from .engine import get_hierarchy_stats, iter_find_chains
+
+
+class CollapseHierarchyWindow(ui.Window):
+    def __init__(self, title: str, delegate=None, **kwargs):
+        super().__init__(title, **kwargs)
+
+        self._chains = []
+        self._before = None
+        self._after = None
+        self._task_runner = TaskRunner()
+
+        self.frame.set_build_fn(self._build_fn)
+
+    def destroy(self):
+        self._task_runner.cancel()
+        # It will destroy all the children
+        super().destroy()
+
+    def on_shutdown(self):
+        self._win = None
+
+    def show(self):
+        self.visible = True
+        self.focus()
+
+    def hide(self):
+        self.visible = False
+
+    def _build_fn(self):
+
+        with self.frame:
+            with ui.VStack(spacing=5):
+                with ui.HStack(spacing=5, height=0):
+                    ui.Label('Root', width=50)
+                    self.root_path_field = ui.StringField(height=22)
+                    ui.Button('Set', width=50, height=22, clicked_fn=self.set_root_path)
+
+                ui.Button("Collapse", height=40, clicked_fn=self.collapse)
+
+                with ui.ScrollingFrame():
+                    self.report_frame = ui.Frame(build_fn=self._build_report)
+
+                with ui.HStack(spacing=5, height=0):
+                    self.progressbar = ui.ProgressBar(height=20)
+                    ui.Button("Cancel", width=60, height=20, clicked_fn=self._task_runner.cancel)
+                self._task_runner.progressbar = self.progressbar
+
+    def _build_report(self):
+        with ui.VStack(height=0, spacing=2):
+            if self._before is None:
+                return
+            prims_before, depth_before = self._before
+            prims_after, depth_after = self._after or self._before
+            ui.Label(f"{len(self._chains)} chains collapsed", height=20)
+            ui.Label(f"Prims: {prims_before} -> {prims_after}", height=20)
+            ui.Label(f"Depth: {depth_before} -> {depth_after}", height=20)
+            for chain in self._chains:
+                ui.Label(f"{chain.survivor_path} -> {chain.path}", height=20)
+
+    def set_root_path(self):
+        paths = omni.usd.get_context().get_selection().get_selected_prim_paths()
+        if paths:
+            self.root_path_field.model.set_value(paths[0])
+
+    def collapse(self):
+        stage = omni.usd.get_context().get_stage()
+        root_path = self.root_path_field.model.get_value_as_string()
+        if not root_path:
+            default_prim = stage.GetDefaultPrim()
+            if not default_prim:
+                return
+            root_path = str(default_prim.GetPath())
+
+        self._before = get_hierarchy_stats(stage, root_path)
+        self._after = None
+
+        def on_done(chains):
+            self._chains = chains or []
+            if self._chains:
+                omni.kit.commands.execute('CollapseXformsCommand', chains=self._chains)
+                self._after = get_hierarchy_stats(stage, root_path)
+            self.report_frame.rebuild()
+
+        self._task_runner.run(iter_find_chains(stage, root_path), on_done)
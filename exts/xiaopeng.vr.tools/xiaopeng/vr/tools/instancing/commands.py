@@ -0,0 +1,186 @@
+import omni.kit.commands
+import omni.usd
+import numpy as np
+from pxr import Usd, Sdf, UsdGeom, Gf, Vt
+
+from ..sdf_utils import (unique_name, create_prim_spec, author_attribute, author_binding, author_transform,
+                         deactivate_prim_spec, restore_active_spec, remove_specs)
+
+
+def _read_mesh_attributes(prim: Usd.Prim):
+    """composed values of the authored attributes of a mesh, its transform left out"""
+    attributes = []
+    for attr in prim.GetAuthoredAttributes():
+        name = attr.GetName()
+        if name.startswith("xformOp") or name == UsdGeom.Tokens.xformOpOrder:
+            continue
+        value = attr.Get()
+        if value is None:
+            continue
+        metadata = {key: attr.GetMetadata(key) for key in ("interpolation", "elementSize") if attr.HasMetadata(key)}
+        attributes.append((name, attr.GetTypeName(), attr.GetVariability(), metadata, value))
+    return attributes
+
+
+def _author_mesh(layer: Sdf.Layer, path: Sdf.Path, attributes, material_path: Sdf.Path, offset=None):
+    """
+    define a mesh from attribute values read with _read_mesh_attributes, its points moved by -offset
+    """
+    prim_spec = create_prim_spec(layer, path, "Mesh")
+    for name, type_name, variability, metadata, value in attributes:
+        if offset is not None and name == UsdGeom.Tokens.points:
+            points = np.asarray(value, dtype=np.float64) - offset
+            value = Vt.Vec3fArray.FromNumpy(points.astype(np.float32))
+        elif offset is not None and name == UsdGeom.Tokens.extent:
+            extent = np.asarray(value, dtype=np.float64) - offset
+            value = Vt.Vec3fArray.FromNumpy(extent.astype(np.float32))
+        author_attribute(prim_spec, name, type_name, value, variability, metadata)
+    if material_path:
+        author_binding(prim_spec, material_path)
+    return prim_spec
+
+
+class InstanceMeshesCommand(omni.kit.commands.Command):
+    """
+    Replace groups of identical meshes by instances of one prototype per group.
+
+    The prototype is a copy of the first mesh of the group centered on its centroid, every
+    mesh is deactivated and replaced by an instanceable prim referencing the prototype, or
+    by one point of a UsdGeom.PointInstancer per group. The material of the group is bound
+    on the instances, or on the prototype of the point instancer. Everything is authored on
+    the edit target layer inside one Sdf.ChangeBlock.
+
+    Args:
+        groups: [(material path, [(prim path, centroid)])], see instancing.engine.iter_find_duplicates.
+        root_path: the prototypes, or the point instancers, are created under it.
+    """
+
+    def __init__(self, groups, root_path, use_point_instancer: bool = False, stage: Usd.Stage = None):
+        self._groups = [(Sdf.Path(str(material_path)) if material_path else None,
+                         [(Sdf.Path(str(prim_path)), np.asarray(centroid, dtype=np.float64))
+                          for prim_path, centroid in members])
+                        for material_path, members in groups]
+        self._root_path = Sdf.Path(str(root_path))
+        self._use_point_instancer = use_point_instancer
+        self._stage = stage or omni.usd.get_context().get_stage()
+        self._layer = None
+        self._created = []
+        self._deactivated = []
+
+    def do(self):
+        edit_target = self._stage.GetEditTarget()
+        self._layer = edit_target.GetLayer()
+        self._created = []
+        self._deactivated = []
+
+        root = self._stage.GetPrimAtPath(self._root_path)
+        if not root:
+            return
+
+        # read everything from the composed stage before authoring
+        xform_cache = UsdGeom.XformCache()
+        root_inverse = xform_cache.GetLocalToWorldTransform(root).GetInverse()
+        taken_names = {}
+        prototype_names = set()
+        plans = []
+        for material_path, members in self._groups:
+            first = self._stage.GetPrimAtPath(members[0][0])
+            if not first:
+                continue
+
+            instances = []
+            for prim_path, centroid in members:
+                prim = self._stage.GetPrimAtPath(prim_path)
+                if not prim or not prim.IsActive():
+                    continue
+                centered = Gf.Matrix4d().SetTranslate(Gf.Vec3d(*centroid.tolist()))
+                if self._use_point_instancer:
+                    matrix = centered * xform_cache.GetLocalToWorldTransform(prim) * root_inverse
+                    instance_path = None
+                else:
+                    matrix = centered * xform_cache.GetLocalTransformation(prim)[0]
+                    parent_path = prim_path.GetParentPath()
+                    if parent_path not in taken_names:
+                        taken_names[parent_path] = set(prim.GetParent().GetAllChildrenNames())
+                    instance_path = parent_path.AppendChild(
+                        unique_name(prim_path.name + "_instance", taken_names[parent_path]))
+                instances.append((prim_path, instance_path, matrix))
+
+            if len(instances) > 1:
+                name = unique_name(members[0][0].name, prototype_names)
+                plans.append((name, material_path, _read_mesh_attributes(first), members[0][1], instances))
+
+        if not plans:
+            return
+
+        scope_name = unique_name("Instancers" if self._use_point_instancer else "InstancePrototypes",
+                                  set(root.GetAllChildrenNames()))
+        scope_path = edit_target.MapToSpecPath(self._root_path.AppendChild(scope_name))
+
+        with Sdf.ChangeBlock():
+            # a class scope is not drawn, only the instances of its prototypes are
+            create_prim_spec(self._layer, scope_path, "Scope",
+                              Sdf.SpecifierDef if self._use_point_instancer else Sdf.SpecifierClass)
+            self._created.append(scope_path)
+
+            for name, material_path, attributes, centroid, instances in plans:
+                if self._use_point_instancer:
+                    self._author_point_instancer(scope_path.AppendChild(name), material_path, attributes,
+                                                 centroid, instances)
+                else:
+                    self._author_instances(edit_target, scope_path.AppendChild(name), material_path, attributes,
+                                           centroid, instances)
+
+                for prim_path, _, _ in instances:
+                    self._deactivated.append(deactivate_prim_spec(self._layer, edit_target.MapToSpecPath(prim_path)))
+
+    def _author_instances(self, edit_target, prototype_path, material_path, attributes, centroid, instances):
+        create_prim_spec(self._layer, prototype_path, "Xform")
+        _author_mesh(self._layer, prototype_path.AppendChild("mesh"), attributes, None, centroid)
+
+        for _, instance_path, matrix in instances:
+            instance_path = edit_target.MapToSpecPath(instance_path)
+            prim_spec = create_prim_spec(self._layer, instance_path, "Xform")
+            prim_spec.referenceList.Prepend(Sdf.Reference("", prototype_path))
+            prim_spec.instanceable = True
+            author_transform(prim_spec, matrix)
+            # bound outside of the prototype, the instances inherit it
+            if material_path:
+                author_binding(prim_spec, material_path)
+            self._created.append(instance_path)
+
+    def _author_point_instancer(self, instancer_path, material_path, attributes, centroid, instances):
+        prim_spec = create_prim_spec(self._layer, instancer_path, "PointInstancer")
+        create_prim_spec(self._layer, instancer_path.AppendChild("Prototypes"), "Scope")
+        mesh_path = instancer_path.AppendChild("Prototypes").AppendChild("mesh")
+        _author_mesh(self._layer, mesh_path, attributes, material_path, centroid)
+
+        positions, orientations, scales = [], [], []
+        for _, _, matrix in instances:
+            transform = Gf.Transform()
+            transform.SetMatrix(matrix)
+            positions.append(Gf.Vec3f(transform.GetTranslation()))
+            orientations.append(Gf.Quath(transform.GetRotation().GetQuat()))
+            scales.append(Gf.Vec3f(transform.GetScale()))
+
+        rel_spec = Sdf.RelationshipSpec(prim_spec, UsdGeom.Tokens.prototypes, False)
+        rel_spec.targetPathList.explicitItems = [mesh_path]
+        author_attribute(prim_spec, UsdGeom.Tokens.protoIndices, Sdf.ValueTypeNames.IntArray,
+                          Vt.IntArray(len(instances)))
+        author_attribute(prim_spec, UsdGeom.Tokens.positions, Sdf.ValueTypeNames.Point3fArray,
+                          Vt.Vec3fArray(positions))
+        author_attribute(prim_spec, UsdGeom.Tokens.orientations, Sdf.ValueTypeNames.QuathArray,
+                          Vt.QuathArray(orientations))
+        author_attribute(prim_spec, UsdGeom.Tokens.scales, Sdf.ValueTypeNames.Float3Array,
+                          Vt.Vec3fArray(scales))
+
+    def undo(self):
+        if not self._layer:
+            return
+
+        with Sdf.ChangeBlock():
+            for previous in reversed(self._deactivated):
+                restore_active_spec(self._layer, previous)
+            remove_specs(self._layer, self._created)
+        self._created = []
+        self._deactivated = []
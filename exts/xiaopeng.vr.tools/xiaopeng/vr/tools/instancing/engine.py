@@ -0,0 +1,154 @@
+import hashlib
+from typing import Dict, List
+import numpy as np
+from pxr import Usd, Sdf, UsdGeom
+
+from ..binding_index import get_binding_index
+
+# mesh positions closer than this are the same
+DEFAULT_TOLERANCE = 1e-4
+# primvar values are compared with a fixed precision
+PRIMVAR_PRECISION = 1e-5
+
+
+class DuplicateGroup:
+    """meshes with the same geometry and the same material"""
+
+    def __init__(self, material_path: Sdf.Path):
+        self.material_path = material_path
+        self.prim_paths: List[Sdf.Path] = []
+        # centroid of every mesh, the prototype is centered on it
+        self.centroids: List[np.ndarray] = []
+        # bytes of the geometry arrays of one mesh
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self.prim_paths)
+
+
+def _quantize(array, precision):
+    array = np.asarray(array)
+    if array.dtype.kind == "f":
+        return np.round(array / precision).astype(np.int64)
+    return array
+
+
+def hash_mesh(mesh: UsdGeom.Mesh, tolerance: float = DEFAULT_TOLERANCE):
+    """
+    Hash of the geometry of a mesh centered on its centroid, so translated copies match.
+
+    The points are quantized with the tolerance, the topology and the primvars are part of
+    the hash since instances share all of them.
+
+    Returns:
+        (digest, centroid, bytes of the geometry arrays) or None when the mesh can not be instanced
+    """
+    points_attr = mesh.GetPointsAttr()
+    if points_attr.GetNumTimeSamples() > 0:
+        return None
+    points = points_attr.Get()
+    counts = mesh.GetFaceVertexCountsAttr().Get()
+    indices = mesh.GetFaceVertexIndicesAttr().Get()
+    if not points or counts is None or indices is None:
+        return None
+
+    points = np.asarray(points, dtype=np.float64)
+    centroid = points.mean(axis=0)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(_quantize(points - centroid, tolerance).tobytes())
+    digest.update(np.asarray(counts, dtype=np.int32).tobytes())
+    digest.update(np.asarray(indices, dtype=np.int32).tobytes())
+    nbytes = points.size * 4 + len(counts) * 4 + len(indices) * 4
+
+    for token in (mesh.GetOrientationAttr().Get(), mesh.GetSubdivisionSchemeAttr().Get(),
+                  mesh.GetDoubleSidedAttr().Get()):
+        digest.update(str(token).encode("utf8"))
+
+    normals = mesh.GetNormalsAttr().Get()
+    if normals:
+        normals = np.asarray(normals)
+        digest.update(b"normals" + _quantize(normals, PRIMVAR_PRECISION).tobytes())
+        nbytes += normals.nbytes
+
+    for primvar in sorted(UsdGeom.PrimvarsAPI(mesh).GetPrimvarsWithValues(), key=lambda p: p.GetName()):
+        value = primvar.Get()
+        if value is None:
+            continue
+        digest.update(primvar.GetName().encode("utf8") + primvar.GetInterpolation().encode("utf8"))
+        try:
+            value = np.asarray(value)
+            if value.dtype.kind not in "biuf":
+                raise TypeError(value.dtype)
+            digest.update(_quantize(value, PRIMVAR_PRECISION).tobytes())
+            nbytes += value.nbytes
+        except (TypeError, ValueError):
+            digest.update(str(value).encode("utf8"))
+        if primvar.IsIndexed():
+            digest.update(np.asarray(primvar.GetIndices(), dtype=np.int32).tobytes())
+
+    return digest.digest(), centroid, nbytes
+
+
+def iter_find_duplicates(stage: Usd.Stage, root_path, tolerance: float = DEFAULT_TOLERANCE):
+    """
+    generator for the task runner, returns the groups of at least two identical meshes under root_path
+    """
+    root = stage.GetPrimAtPath(str(root_path))
+    if not root:
+        return []
+
+    index = get_binding_index(stage)
+    yield from index.iter_flush()
+
+    groups: Dict[tuple, DuplicateGroup] = {}
+    prim_range = iter(Usd.PrimRange(root))
+    for i, prim in enumerate(prim_range):
+        if prim.IsInstance():
+            prim_range.PruneChildren()
+            continue
+        if not prim.IsA(UsdGeom.Mesh):
+            continue
+        # meshes with children would lose them
+        prim_range.PruneChildren()
+        if prim.GetAllChildren():
+            continue
+
+        hashed = hash_mesh(UsdGeom.Mesh(prim), tolerance)
+        if hashed is None:
+            continue
+        digest, centroid, nbytes = hashed
+
+        material_path = index.get_material_path(prim.GetPath())
+        group = groups.get((digest, material_path))
+        if group is None:
+            group = groups[(digest, material_path)] = DuplicateGroup(material_path)
+            group.nbytes = nbytes
+        group.prim_paths.append(prim.GetPath())
+        group.centroids.append(centroid)
+
+        if i % 200 == 0:
+            yield None
+
+    return sorted((group for group in groups.values() if len(group) > 1), key=len, reverse=True)
+
+
+def get_savings(groups: List[DuplicateGroup], use_point_instancer: bool = False) -> Dict:
+    """
+    geometry bytes and prims before and after instancing the groups
+    """
+    meshes = sum(len(group) for group in groups)
+    saved_bytes = sum(group.nbytes * (len(group) - 1) for group in groups)
+    if use_point_instancer:
+        # one instancer and one prototype per group
+        prims_after = 2 * len(groups)
+    else:
+        # one instance per mesh, one prototype per group
+        prims_after = meshes + len(groups)
+    return {
+        "groups": len(groups),
+        "meshes": meshes,
+        "saved_bytes": saved_bytes,
+        "meshes_after": len(groups),
+        "prims_before": meshes,
+        "prims_after": prims_after,
+    }
@@ -0,0 +1,117 @@
+import omni.ext
+import omni.ui as ui
+import omni.usd
+import omni.kit.commands
+
+from ..task_runner import TaskRunner
+from .engine import DEFAULT_TOLERANCE, iter_find_duplicates, get_savings
+
+
+class InstancingWindow(ui.Window):
+    def __init__(self, title: str, delegate=None, **kwargs):
+        super().__init__(title, **kwargs)
+
+        self.current_selection = 0
+        self._groups = []
+        self._root_path = None
+        self._task_runner = TaskRunner()
+
+        self.frame.set_build_fn(self._build_fn)
+
+    def destroy(self):
+        self._task_runner.cancel()
+        # It will destroy all the children
+        super().destroy()
+
+    def on_shutdown(self):
+        self._win = None
+
+    def show(self):
+        self.visible = True
+        self.focus()
+
+    def hide(self):
+        self.visible = False
+
+    def _build_fn(self):
+
+        with self.frame:
+            with ui.VStack(spacing=5):
+                with ui.HStack(spacing=5, height=0):
+                    ui.Label('Root', width=70)
+                    self.root_path_field = ui.StringField(height=22)
+                    ui.Button('Set', width=50, height=22, clicked_fn=self.set_root_path)
+                with ui.HStack(spacing=5, height=0):
+                    ui.Label('Tolerance', width=70)
+                    self.tolerance_field = ui.FloatField(width=80, height=22)
+                    self.tolerance_field.model.set_value(DEFAULT_TOLERANCE)
+                    ui.Label('Mode', width=40)
+                    mode_option = ui.ComboBox(self.current_selection, "Instanceable References", "Point Instancer")
+                    mode_option.model.add_item_changed_fn(self.option_changed)
+
+                ui.Button("Find Duplicates", height=30, clicked_fn=self.find_duplicates)
+
+                with ui.ScrollingFrame():
+                    self.groups_frame = ui.Frame(build_fn=self._build_groups)
+
+                self.report_label = ui.Label("", height=20)
+                ui.Button("Instance", height=40, clicked_fn=self.instance)
+
+                with ui.HStack(spacing=5, height=0):
+                    self.progressbar = ui.ProgressBar(height=20)
+                    ui.Button("Cancel", width=60, height=20, clicked_fn=self._task_runner.cancel)
+                self._task_runner.progressbar = self.progressbar
+
+    def _build_groups(self):
+        with ui.VStack(height=0, spacing=2):
+            for group in self._groups:
+                with ui.HStack(spacing=5, height=20):
+                    ui.Label(f"{len(group)} x", width=50)
+                    ui.Label(group.prim_paths[0].name, tooltip="\n".join(str(path) for path in group.prim_paths))
+                    ui.Label(group.material_path.name if group.material_path else "-", width=150)
+
+    def option_changed(self, model, item):
+        self.current_selection = model.get_item_value_model().as_int
+        self.show_savings()
+
+    def set_root_path(self):
+        paths = omni.usd.get_context().get_selection().get_selected_prim_paths()
+        if paths:
+            self.root_path_field.model.set_value(paths[0])
+
+    def find_duplicates(self):
+        stage = omni.usd.get_context().get_stage()
+        root_path = self.root_path_field.model.get_value_as_string()
+        if not root_path and stage.GetDefaultPrim():
+            root_path = str(stage.GetDefaultPrim().GetPath())
+        if not root_path:
+            return
+
+        def on_done(groups):
+            self._groups = groups or []
+            self._root_path = root_path
+            self.groups_frame.rebuild()
+            self.show_savings()
+
+        self._task_runner.run(
+            iter_find_duplicates(stage, root_path, self.tolerance_field.model.get_value_as_float()), on_done)
+
+    def show_savings(self):
+        if not self._groups:
+            self.report_label.text = "No duplicates"
+            return
+        savings = get_savings(self._groups, self.current_selection == 1)
+        self.report_label.text = (f"{savings['meshes']} meshes -> {savings['meshes_after']} prototypes, "
+                                  f"~{savings['saved_bytes'] / (1024 * 1024):.1f} MB saved, "
+                                  f"prims {savings['prims_before']} -> {savings['prims_after']}")
+
+    def instance(self):
+        if not self._groups:
+            return
+
+        groups = [(group.material_path, list(zip(group.prim_paths, group.centroids))) for group in self._groups]
+        omni.kit.commands.execute('InstanceMeshesCommand', groups=groups, root_path=self._root_path,
+                                  use_point_instancer=self.current_selection == 1)
+        print(f"[xiaopeng.vr.tools] {self.report_label.text}")
+        self._groups = []
+        self.groups_frame.rebuild()
@@ -0,0 +1,134 @@
+import os
+from typing import Dict, List
+from pxr import Usd, Sdf
+
+
+# resolved payload file -> (mtime, size), kept across scans
+_size_cache = {}
+
+_RULES = {
+    "all": Usd.StageLoadRules.AllRule,
+    "only": Usd.StageLoadRules.OnlyRule,
+    "none": Usd.StageLoadRules.NoneRule,
+}
+
+
+class PayloadInfo:
+    def __init__(self, path: Sdf.Path, asset_paths: List[str], size: int):
+        self.path = path
+        self.asset_paths = asset_paths
+        # bytes on disk of the payload files, an estimate of what loading the prim costs
+        self.size = size
+        self.loaded = False
+
+
+def get_file_size(path: str) -> int:
+    """size of a file, cached until its mtime changes"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return 0
+    cached = _size_cache.get(path)
+    if cached is None or cached[0] != stat.st_mtime_ns:
+        cached = (stat.st_mtime_ns, stat.st_size)
+        _size_cache[path] = cached
+    return cached[1]
+
+
+class LoadSetManager:
+    """
+    Payloads of a stage and the named load sets saved with it.
+
+    A load set is the StageLoadRules of the stage when it was saved, stored in the
+    customLayerData of the root layer. Restoring one sets the rules in one call, so the
+    stage recomposes once instead of being reopened.
+    """
+
+    LOAD_SETS_KEY = "vrtools:loadSets"
+
+    def __init__(self, stage: Usd.Stage):
+        self.stage = stage
+        self.payloads: List[PayloadInfo] = []
+
+    def iter_scan(self):
+        """generator for the task runner, collects the payload prims loaded or not"""
+        payloads = []
+        prim_range = iter(Usd.PrimRange(self.stage.GetPseudoRoot(), Usd.PrimAllPrimsPredicate))
+        for i, prim in enumerate(prim_range):
+            if prim.HasAuthoredPayloads():
+                asset_paths = self._get_payload_files(prim)
+                payloads.append(PayloadInfo(prim.GetPath(), asset_paths,
+                                            sum(get_file_size(path) for path in asset_paths)))
+            if i % 1000 == 0:
+                yield None
+
+        self.payloads = payloads
+        self.refresh()
+        return payloads
+
+    def refresh(self):
+        """update the loaded state of the scanned payloads"""
+        for payload in self.payloads:
+            prim = self.stage.GetPrimAtPath(payload.path)
+            payload.loaded = bool(prim) and prim.IsLoaded()
+
+    def load(self, paths):
+        self.load_and_unload(paths, [])
+
+    def unload(self, paths):
+        self.load_and_unload([], paths)
+
+    def load_and_unload(self, load_paths, unload_paths):
+        self.stage.LoadAndUnload([Sdf.Path(str(path)) for path in load_paths],
+                                 [Sdf.Path(str(path)) for path in unload_paths],
+                                 Usd.LoadWithDescendants)
+        self.refresh()
+
+    def get_load_sets(self) -> Dict[str, Dict[str, str]]:
+        """{name: {prim path: rule}}"""
+        load_sets = self.stage.GetRootLayer().customLayerData.get(self.LOAD_SETS_KEY, {})
+        return {name: dict(rules) for name, rules in load_sets.items()}
+
+    def save_load_set(self, name: str):
+        rules = {}
+        for path, rule in self.stage.GetLoadRules().GetRules():
+            rules[str(path)] = next(key for key, value in _RULES.items() if value == rule)
+        self._set_load_set(name, rules)
+
+    def delete_load_set(self, name: str):
+        self._set_load_set(name, None)
+
+    def restore_load_set(self, name: str) -> bool:
+        rules = self.get_load_sets().get(name)
+        if rules is None:
+            return False
+
+        load_rules = Usd.StageLoadRules()
+        load_rules.SetRules([(Sdf.Path(path), _RULES[rule]) for path, rule in sorted(rules.items())])
+        load_rules.Minimize()
+        # one recomposition of the prims whose load state changed
+        self.stage.SetLoadRules(load_rules)
+        self.refresh()
+        return True
+
+    def _set_load_set(self, name, rules):
+        layer = self.stage.GetRootLayer()
+        data = dict(layer.customLayerData)
+        load_sets = dict(data.get(self.LOAD_SETS_KEY, {}))
+        if rules is None:
+            load_sets.pop(name, None)
+        else:
+            load_sets[name] = rules
+        data[self.LOAD_SETS_KEY] = load_sets
+        layer.customLayerData = data
+
+    def _get_payload_files(self, prim: Usd.Prim) -> List[str]:
+        files = []
+        for spec in prim.GetPrimStack():
+            for payload in spec.payloadList.GetAddedOrExplicitItems():
+                if not payload.assetPath:
+                    continue
+                path = spec.layer.ComputeAbsolutePath(payload.assetPath)
+                if path not in files:
+                    files.append(path)
+        return files
@@ -0,0 +1,178 @@
+import omni.ext
+import omni.ui as ui
+import omni.usd
+from pxr import Sdf
+
+from ..task_runner import TaskRunner
+from .manager import LoadSetManager
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class LoadSetWindow(ui.Window):
+    def __init__(self, title: str, delegate=None, **kwargs):
+        super().__init__(title, **kwargs)
+
+        self._manager = None
+        # payload prim paths ticked in the list
+        self._checked = set()
+        self._load_set_names = []
+        self._task_runner = TaskRunner()
+
+        self.frame.set_build_fn(self._build_fn)
+
+    def destroy(self):
+        self._task_runner.cancel()
+        # It will destroy all the children
+        super().destroy()
+
+    def on_shutdown(self):
+        self._win = None
+
+    def show(self):
+        self.visible = True
+        self.focus()
+
+    def hide(self):
+        self.visible = False
+
+    def _build_fn(self):
+
+        with self.frame:
+            with ui.VStack(spacing=5):
+                with ui.HStack(spacing=5, height=0):
+                    ui.Button("Scan", width=60, height=22, clicked_fn=self.scan)
+                    ui.Label('Filter', width=40)
+                    self.filter_field = ui.StringField(height=22)
+                    self.filter_field.model.add_value_changed_fn(lambda model: self.payloads_frame.rebuild())
+
+                with ui.ScrollingFrame():
+                    self.payloads_frame = ui.Frame(build_fn=self._build_payloads)
+
+                self.status_label = ui.Label("", height=20)
+
+                with ui.HStack(spacing=5, height=0):
+                    ui.Button("Check Selected", height=22, clicked_fn=self.check_selected)
+                    ui.Button("Load", height=22, clicked_fn=lambda: self.load_checked(True))
+                    ui.Button("Unload", height=22, clicked_fn=lambda: self.load_checked(False))
+                    ui.Button("Load All", height=22, clicked_fn=lambda: self.load_all(True))
+                    ui.Button("Unload All", height=22, clicked_fn=lambda: self.load_all(False))
+
+                with ui.HStack(spacing=5, height=0):
+                    ui.Label('Load Set', width=60)
+                    self.set_name_field = ui.StringField(height=22)
+                    ui.Button("Save", width=60, height=22, clicked_fn=self.save_load_set)
+
+                with ui.HStack(spacing=5, height=0):
+                    ui.Spacer(width=60)
+                    self.load_sets_frame = ui.Frame(height=22, build_fn=self._build_load_sets)
+                    ui.Button("Restore", width=60, height=22, clicked_fn=self.restore_load_set)
+                    ui.Button("Delete", width=60, height=22, clicked_fn=self.delete_load_set)
+
+                with ui.HStack(spacing=5, height=0):
+                    self.progressbar = ui.ProgressBar(height=20)
+                    ui.Button("Cancel", width=60, height=20, clicked_fn=self._task_runner.cancel)
+                self._task_runner.progressbar = self.progressbar
+
+    def _build_payloads(self):
+        manager = self.get_manager()
+        text = self.filter_field.model.get_value_as_string().lower()
+        with ui.VStack(height=0, spacing=2):
+            for payload in manager.payloads:
+                path = str(payload.path)
+                if text and text not in path.lower():
+                    continue
+                with ui.HStack(spacing=5, height=22):
+                    checkbox = ui.CheckBox(width=20)
+                    checkbox.model.set_value(path in self._checked)
+                    checkbox.model.add_value_changed_fn(
+                        lambda model, path=path: self.set_checked(path, model.as_bool))
+                    ui.Label(path, tooltip="\n".join(payload.asset_paths))
+                    ui.Label(format_size(payload.size), width=70)
+                    ui.Label("loaded" if payload.loaded else "unloaded", width=60)
+
+        loaded = [payload for payload in manager.payloads if payload.loaded]
+        self.status_label.text = (f"{len(loaded)}/{len(manager.payloads)} loaded, "
+                                  f"~{format_size(sum(payload.size for payload in loaded))}")
+
+    def _build_load_sets(self):
+        self._load_set_names = sorted(self.get_manager().get_load_sets())
+        self.load_sets_combo = ui.ComboBox(0, *self._load_set_names)
+
+    def get_manager(self) -> LoadSetManager:
+        stage = omni.usd.get_context().get_stage()
+        if self._manager is None or self._manager.stage != stage:
+            self._manager = LoadSetManager(stage)
+            self._checked.clear()
+        return self._manager
+
+    def scan(self):
+        def on_done(result):
+            self._checked &= {str(payload.path) for payload in self._manager.payloads}
+            self.payloads_frame.rebuild()
+            self.load_sets_frame.rebuild()
+
+        self._task_runner.run(self.get_manager().iter_scan(), on_done)
+
+    def set_checked(self, path, checked):
+        if checked:
+            self._checked.add(path)
+        else:
+            self._checked.discard(path)
+
+    def check_selected(self):
+        """check the scanned payloads at or under the selected prims"""
+        selected = [Sdf.Path(path) for path in omni.usd.get_context().get_selection().get_selected_prim_paths()]
+        for payload in self.get_manager().payloads:
+            if any(payload.path.HasPrefix(path) for path in selected):
+                self._checked.add(str(payload.path))
+        self.payloads_frame.rebuild()
+
+    def load_checked(self, load: bool):
+        paths = sorted(self._checked)
+        if not paths:
+            return
+        if load:
+            self.get_manager().load(paths)
+        else:
+            self.get_manager().unload(paths)
+        self.payloads_frame.rebuild()
+
+    def load_all(self, load: bool):
+        manager = self.get_manager()
+        paths = [payload.path for payload in manager.payloads]
+        if load:
+            manager.load(paths)
+        else:
+            manager.unload(paths)
+        self.payloads_frame.rebuild()
+
+    def get_current_load_set(self):
+        if not self._load_set_names:
+            return None
+        index = self.load_sets_combo.model.get_item_value_model().as_int
+        return self._load_set_names[index]
+
+    def save_load_set(self):
+        name = self.set_name_field.model.get_value_as_string().strip()
+        if not name:
+            return
+        self.get_manager().save_load_set(name)
+        self.load_sets_frame.rebuild()
+
+    def restore_load_set(self):
+        name = self.get_current_load_set()
+        if name and self.get_manager().restore_load_set(name):
+            self.set_name_field.model.set_value(name)
+            self.payloads_frame.rebuild()
+
+    def delete_load_set(self):
+        name = self.get_current_load_set()
+        if name:
+            self.get_manager().delete_load_set(name)
+            self.load_sets_frame.rebuild()
@@ -3,7 +3,9 @@ import omni.ui as ui
 import omni.kit.commands
 import omni.usd
 from typing import Union
-from pxr import Usd, Sdf, UsdGeom, UsdShade
+from pxr import Usd, Sdf, UsdGeom
+
+from ..binding_index import get_binding_index
 
 
 class MaterialAssignWindow(ui.Window):
@@ -114,21 +116,10 @@ class MaterialAssignWindow(ui.Window):
         # get the material path of select prim
         material_path = self.get_material_path_from_mesh(path)
 
-        # get the material prim
-        stage = omni.usd.get_context().get_stage()
-
-        prim_paths = []
-        stage_prims = list(stage.Traverse())
-        bounds = UsdShade.MaterialBindingAPI.ComputeBoundMaterials(stage_prims, UsdShade.Tokens.allPurpose)
-        for stage_prim, material, relationship in zip(stage_prims, bounds[0], bounds[1]):
-            material_prim = material.GetPrim()
-            if not material_prim.IsValid():
-                continue
-            
-            if material_prim.GetPrimPath() != material_path:
-                continue
-                
-            prim_paths.append(str(stage_prim.GetPrimPath()))
+        if not material_path:
+            return
+
+        prim_paths = [str(prim_path) for prim_path in get_binding_index().get_bound_prim_paths(material_path)]
 
         omni.kit.commands.execute('SelectPrimsCommand',
             old_selected_paths=[],
@@ -0,0 +1,125 @@
+import omni.kit.commands
+import omni.usd
+from typing import Dict, List
+from pxr import Usd, Sdf, UsdShade
+
+from ..sdf_utils import bind_material_spec, restore_material_spec
+
+
+class BindMaterialsCommand(omni.kit.commands.Command):
+    """
+    Bind many materials at once.
+
+    All the bindings are authored with the Sdf API on the edit target layer inside a
+    single Sdf.ChangeBlock, so the stage is recomposed once for the whole batch.
+
+    Args:
+        bindings: {material path: [prim paths]}, a prim listed more than once gets the last material.
+    """
+
+    def __init__(self, bindings: Dict[str, List[str]], stage: Usd.Stage = None):
+        self._bindings = [(Sdf.Path(str(material_path)), [Sdf.Path(str(prim_path)) for prim_path in prim_paths])
+                          for material_path, prim_paths in bindings.items()]
+        self._stage = stage or omni.usd.get_context().get_stage()
+        self._layer = None
+        self._previous = []
+
+    def do(self):
+        edit_target = self._stage.GetEditTarget()
+        self._layer = edit_target.GetLayer()
+        self._previous = []
+
+        # read everything from the composed stage before authoring
+        bindings = []
+        api_applied = set()
+        for material_path, prim_paths in self._bindings:
+            for prim_path in prim_paths:
+                prim = self._stage.GetPrimAtPath(prim_path)
+                if not prim or prim.IsInstanceProxy():
+                    continue
+                spec_path = edit_target.MapToSpecPath(prim_path)
+                has_api = spec_path in api_applied or prim.HasAPI(UsdShade.MaterialBindingAPI)
+                api_applied.add(spec_path)
+                bindings.append((spec_path, material_path, has_api))
+
+        with Sdf.ChangeBlock():
+            for spec_path, material_path, has_api in bindings:
+                self._previous.append(bind_material_spec(self._layer, spec_path, material_path, has_api))
+
+    def undo(self):
+        if not self._layer:
+            return
+
+        with Sdf.ChangeBlock():
+            for previous in reversed(self._previous):
+                restore_material_spec(self._layer, previous)
+        self._previous = []
+
+
+class ReferenceMaterialsCommand(omni.kit.commands.Command):
+    """
+    Reference library materials into the stage.
+
+    Args:
+        references: [(material path, asset path, prim path in the asset)], every material
+            path is defined as a Material prim referencing the library material.
+    """
+
+    def __init__(self, references, stage: Usd.Stage = None):
+        self._references = [(Sdf.Path(str(path)), asset_path, Sdf.Path(str(prim_path)) if prim_path else Sdf.Path())
+                            for path, asset_path, prim_path in references]
+        self._stage = stage or omni.usd.get_context().get_stage()
+        self._layer = None
+        self._created = []
+
+    def do(self):
+        edit_target = self._stage.GetEditTarget()
+        self._layer = edit_target.GetLayer()
+        self._created = []
+
+        references = [(edit_target.MapToSpecPath(path), asset_path, prim_path)
+                      for path, asset_path, prim_path in self._references
+                      if not self._stage.GetPrimAtPath(path)]
+
+        with Sdf.ChangeBlock():
+            for spec_path, asset_path, prim_path in references:
+                created_path = spec_path
+                while not self._layer.GetPrimAtPath(created_path.GetParentPath()) and \
+                        created_path.GetParentPath() != Sdf.Path.absoluteRootPath:
+                    created_path = created_path.GetParentPath()
+                previous = None
+                prim_spec = self._layer.GetPrimAtPath(spec_path)
+                if prim_spec:
+                    created_path = None
+                    # the references the prim already had come back on undo
+                    old_references = prim_spec.GetInfo("references") if prim_spec.HasInfo("references") else None
+                    previous = (prim_spec.specifier, prim_spec.typeName, old_references)
+                else:
+                    prim_spec = Sdf.CreatePrimInLayer(self._layer, spec_path)
+
+                prim_spec.specifier = Sdf.SpecifierDef
+                prim_spec.typeName = "Material"
+                prim_spec.referenceList.Prepend(Sdf.Reference(asset_path, prim_path))
+                self._created.append((spec_path, created_path, previous))
+
+    def undo(self):
+        if not self._layer:
+            return
+
+        with Sdf.ChangeBlock():
+            for spec_path, created_path, previous in reversed(self._created):
+                if created_path:
+                    edit = Sdf.BatchNamespaceEdit()
+                    edit.Add(created_path, Sdf.Path.emptyPath)
+                    self._layer.Apply(edit)
+                    continue
+
+                prim_spec = self._layer.GetPrimAtPath(spec_path)
+                if prim_spec:
+                    specifier, type_name, old_references = previous
+                    if old_references is None:
+                        prim_spec.ClearInfo("references")
+                    else:
+                        prim_spec.SetInfo("references", old_references)
+                    prim_spec.specifier, prim_spec.typeName = specifier, type_name
+        self._created = []
@@ -0,0 +1,128 @@
+import carb.tokens
+import hashlib
+import json
+import os
+import re
+from pxr import Sdf
+
+
+class LibraryIndex:
+    """
+    Compact on-disk index of the materials of a MDL/USD material library folder.
+
+    The library files are scanned once, USD files at the Sdf level without composing
+    them into a stage, and the material names, source files and prim
+    paths are stored as columns in a JSON file of the Kit data folder. Rescanning only
+    reads the files whose size or modification time changed.
+    """
+
+    INDEX_DIR = "${data}/xiaopeng.vr.tools/library_indexes"
+    EXTENSIONS = (".mdl", ".usd", ".usda", ".usdc")
+    VERSION = 2
+    MDL_MATERIAL_RE = re.compile(r"^\s*export\s+material\s+(\w+)\s*\(", re.MULTILINE)
+
+    def __init__(self, root: str):
+        self.root = os.path.normpath(root)
+        # relative file path -> [mtime, size, [[name, prim path], ...]]
+        self.files = {}
+
+    @property
+    def index_path(self):
+        key = hashlib.sha1(os.path.normcase(self.root).encode("utf8")).hexdigest()
+        return os.path.join(carb.tokens.get_tokens_interface().resolve(self.INDEX_DIR), key + ".json")
+
+    @classmethod
+    def load_or_build(cls, root: str):
+        """load the index of the folder, it is built or refreshed when the library changed"""
+        index = cls(root)
+        index.load()
+        if index.update():
+            index.save()
+        return index
+
+    def load(self):
+        if not os.path.isfile(self.index_path):
+            return
+
+        try:
+            with open(self.index_path, "r", encoding="utf8") as f:
+                data = json.loads(f.read())
+        except (OSError, ValueError) as e:
+            print(e)
+            return
+        # an index of another format is rebuilt
+        if data.get("version") == self.VERSION:
+            self.files = data.get("files", {})
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf8") as f:
+            f.write(json.dumps({"version": self.VERSION, "root": self.root, "files": self.files}))
+        os.replace(tmp_path, self.index_path)
+
+    def update(self):
+        """scan the library folder, returns True if the index changed"""
+        changed = False
+        found = set()
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            for filename in filenames:
+                if os.path.splitext(filename)[1].lower() not in self.EXTENSIONS:
+                    continue
+
+                file_path = os.path.join(dirpath, filename)
+                rel_path = os.path.relpath(file_path, self.root).replace("\\", "/")
+                found.add(rel_path)
+
+                stat = os.stat(file_path)
+                entry = self.files.get(rel_path)
+                if entry and entry[0] == stat.st_mtime and entry[1] == stat.st_size:
+                    continue
+
+                self.files[rel_path] = [stat.st_mtime, stat.st_size, self._scan_file(file_path)]
+                changed = True
+
+        for rel_path in list(self.files.keys()):
+            if rel_path not in found:
+                del self.files[rel_path]
+                changed = True
+        return changed
+
+    def get_materials(self):
+        """returns [(name, absolute file path, prim path)], prim path is empty for MDL materials"""
+        materials = []
+        for rel_path, (mtime, size, entries) in self.files.items():
+            file_path = os.path.join(self.root, rel_path)
+            for name, prim_path in entries:
+                materials.append((name, file_path, prim_path))
+        return materials
+
+    def _scan_file(self, file_path):
+        if file_path.lower().endswith(".mdl"):
+            return self._scan_mdl(file_path)
+        return self._scan_usd(file_path)
+
+    def _scan_mdl(self, file_path):
+        try:
+            with open(file_path, "r", encoding="utf8", errors="ignore") as f:
+                source = f.read()
+        except OSError as e:
+            print(e)
+            return []
+        return [[name, ""] for name in self.MDL_MATERIAL_RE.findall(source)]
+
+    def _scan_usd(self, file_path):
+        layer = Sdf.Layer.FindOrOpen(file_path)
+        if not layer:
+            return []
+
+        material_paths = []
+
+        def visit(path):
+            if path.IsPrimPath():
+                prim_spec = layer.GetPrimAtPath(path)
+                if prim_spec and prim_spec.typeName == "Material":
+                    material_paths.append(path)
+
+        layer.Traverse(Sdf.Path.absoluteRootPath, visit)
+        return [[path.name, str(path)] for path in material_paths]
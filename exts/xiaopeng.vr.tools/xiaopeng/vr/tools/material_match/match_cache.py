@@ -0,0 +1,90 @@
+import carb.tokens
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+
+class MatchCache:
+    """
+    On-disk cache of confirmed material matches.
+
+    Entries are keyed by the source material name and a fingerprint of the replacement
+    library names, they keep the match and whether it was picked by hand. The cache is
+    size bounded, the least recently used entries are evicted first.
+    """
+
+    DEFAULT_PATH = "${data}/xiaopeng.vr.tools/match_cache.json"
+
+    def __init__(self, path: str = None, max_entries: int = 50000):
+        self.path = path or carb.tokens.get_tokens_interface().resolve(self.DEFAULT_PATH)
+        self.max_entries = max_entries
+
+        # "fingerprint:name" -> [match, user override]
+        self._entries = OrderedDict()
+        self._dirty = False
+        self._load()
+
+    @staticmethod
+    def fingerprint(labels):
+        """fingerprint of the replacement library names"""
+        digest = hashlib.sha1()
+        for label in sorted(set(labels)):
+            digest.update(label.encode("utf8"))
+            digest.update(b"\n")
+        return digest.hexdigest()
+
+    def get(self, fingerprint, name):
+        """returns (match, user override) or None"""
+        key = self._key(fingerprint, name)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0], entry[1]
+
+    def put(self, fingerprint, name, match, user=False):
+        key = self._key(fingerprint, name)
+        entry = self._entries.get(key)
+        # an automatic match never replaces a manual one
+        if entry is not None and entry[1] and not user:
+            self._entries.move_to_end(key)
+            return
+
+        if entry is None or entry[0] != match or entry[1] != user:
+            self._dirty = True
+        self._entries[key] = [match, user]
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf8") as f:
+            f.write(json.dumps([[key, match, user] for key, (match, user) in self._entries.items()]))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def _key(self, fingerprint, name):
+        return fingerprint + ":" + name
+
+    def _load(self):
+        if not os.path.isfile(self.path):
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf8") as f:
+                entries = json.loads(f.read())
+        except (OSError, ValueError) as e:
+            print(e)
+            return
+
+        # saved from least to most recently used
+        for key, match, user in entries[-self.max_entries:]:
+            self._entries[key] = [match, user]
@@ -0,0 +1,134 @@
+import numpy as np
+from fuzzywuzzy import fuzz, utils
+
+
+class FuzzyMatcher:
+    """
+    Match names against a fixed list of labels with fuzz.token_set_ratio semantics.
+
+    Every name is normalized and tokenized once. token_set_ratio is the max of three
+    difflib ratios 2*M/T between strings made of the name tokens, and M can never exceed
+    the character histogram overlap of the two strings, so an upper bound of every
+    score is computed for a whole block of names at once with NumPy. The token inverted
+    index tightens the bound for pairs without a common token. Only the labels whose
+    bound can still reach the threshold and beat the best score so far are scored exactly.
+    """
+
+    def __init__(self, labels, threshold=60):
+        self.labels = list(labels)
+        self.threshold = threshold
+
+        self._label_tokens, self._label_lengths, self._label_hists = self._prepare(self.labels)
+
+        # token -> indices of the labels containing it
+        self._token_index = {}
+        for label_id, tokens in enumerate(self._label_tokens):
+            for token in tokens:
+                self._token_index.setdefault(token, []).append(label_id)
+
+    def match(self, texts):
+        """
+        returns {text: best label}, "None" when no label reaches the threshold
+        """
+        categorized_dict = {}
+        for _ in self.iter_match(texts, categorized_dict):
+            pass
+        return categorized_dict
+
+    def iter_match(self, texts, categorized_dict):
+        """
+        generator version of match for the task runner, fills categorized_dict and yields the progress
+        """
+        texts = list(texts)
+        if not texts:
+            return
+
+        text_tokens, text_lengths, text_hists = self._prepare(texts)
+
+        # only the characters present on both sides can overlap
+        columns = np.flatnonzero(text_hists.any(axis=0) & self._label_hists.any(axis=0))
+        text_hists = text_hists[:, columns]
+        label_hists = self._label_hists[:, columns]
+
+        label_count = len(self.labels)
+        chunk = max(1, 4000000 // max(1, label_count * max(1, len(columns))))
+        for start in range(0, len(texts), chunk):
+            stop = min(start + chunk, len(texts))
+            upper = self._upper_bounds(text_tokens[start:stop], text_lengths[start:stop],
+                                       text_hists[start:stop], label_hists)
+            for row, text_id in enumerate(range(start, stop)):
+                categorized_dict[texts[text_id]] = self._best_label(texts[text_id], text_lengths[text_id], upper[row])
+                yield (text_id + 1) / len(texts)
+
+    def _prepare(self, names):
+        """
+        normalize like fuzz.token_set_ratio and build the character histograms of the joined tokens
+        """
+        tokens_list = []
+        joined_list = []
+        for name in names:
+            tokens = frozenset(utils.full_process(name, force_ascii=True).split())
+            tokens_list.append(tokens)
+            joined_list.append(" ".join(sorted(tokens)))
+
+        lengths = np.array([len(joined) for joined in joined_list], dtype=np.int32)
+        hists = np.zeros((len(names), 128), dtype=np.int32)
+        data = np.frombuffer("".join(joined_list).encode("ascii"), dtype=np.uint8)
+        if len(data):
+            rows = np.repeat(np.arange(len(names)), lengths)
+            np.add.at(hists, (rows, data), 1)
+        return tokens_list, lengths, hists
+
+    def _upper_bounds(self, text_tokens, text_lengths, text_hists, label_hists):
+        overlap = np.minimum(text_hists[:, None, :], label_hists[None, :, :]).sum(axis=2)
+
+        shares_token = np.zeros(overlap.shape, dtype=bool)
+        for row, tokens in enumerate(text_tokens):
+            for token in tokens:
+                label_ids = self._token_index.get(token)
+                if label_ids:
+                    shares_token[row, label_ids] = True
+
+        text_lengths = text_lengths[:, None].astype(np.float64)
+        label_lengths = self._label_lengths[None, :].astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # without a common token only ratio(combined_1to2, combined_2to1) is non zero
+            combined_bound = 2.0 * overlap / (text_lengths + label_lengths)
+            # otherwise ratio(sorted_sect, combined) dominates, len(sorted_sect) <= overlap
+            sect_bound = 2.0 * overlap / (overlap + np.minimum(text_lengths, label_lengths))
+            bound = np.where(shares_token, sect_bound, combined_bound)
+        bound = np.nan_to_num(bound)
+
+        upper = np.ceil(bound * 100.0 - 1e-9)
+        # empty strings always score 0
+        upper[:, self._label_lengths == 0] = 0
+        return upper
+
+    def _best_label(self, text, text_length, upper):
+        if text_length == 0:
+            return "None"
+
+        candidates = np.flatnonzero(upper >= self.threshold)
+        if not len(candidates):
+            return "None"
+
+        # best bound first, ties in label order like the plain nested loop
+        order = candidates[np.lexsort((candidates, -upper[candidates]))]
+
+        max_ratio = 0
+        best_id = None
+        for label_id in order:
+            # a label scoring 0 is never picked, and neither is one that can not beat the best
+            if upper[label_id] <= 0 or upper[label_id] < max_ratio:
+                break
+            if best_id is not None and upper[label_id] == max_ratio and label_id > best_id:
+                break
+
+            ratio = fuzz.token_set_ratio(text, self.labels[label_id])
+            if ratio > max_ratio or (ratio == max_ratio and best_id is not None and label_id < best_id):
+                max_ratio = ratio
+                best_id = label_id
+
+        if best_id is None or max_ratio < self.threshold:
+            return "None"
+        return self.labels[best_id]
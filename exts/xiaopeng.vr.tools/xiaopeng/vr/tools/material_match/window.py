@@ -1,97 +1,93 @@
 import omni.ext
 import omni.ui as ui
 import omni.kit.commands
+import omni.kit.undo
 import omni.usd
 from typing import Union
 from pxr import Usd, Sdf, UsdGeom, UsdShade
 import os
 import json
+import numpy as np
 from omni.kit.widget.stage import StageIcons
 from omni.kit.window.file_importer import get_file_importer
 
-import omni.kit.pipapi
-omni.kit.pipapi.install("fuzzywuzzy")
-
-# from fuzzywuzzy import process
-from fuzzywuzzy import fuzz
+from ..binding_index import get_binding_index
+from ..task_runner import TaskRunner
 
-class MatchItem(ui.AbstractItem):
-    """Single item of the model"""
+# this module is only imported when Material Match is first opened, skip pip when it is importable
+import omni.kit.pipapi
+omni.kit.pipapi.install("fuzzywuzzy", module="fuzzywuzzy")
 
-    def __init__(self, material, match, matchs):
-        super().__init__()
-        self.material_model = ui.SimpleStringModel(material)
-        self.match_model = ComboModel(matchs, match)
+from .matcher import FuzzyMatcher
+from .match_cache import MatchCache
+from .library_index import LibraryIndex
 
-class MatchModel(ui.AbstractItemModel):
+class MatchModel:
     """
-    Represents the list of commands registered in Kit.
-    It is used to make a single level tree appear like a simple list.
+    Array backed model of the match table.
+
+    Material names are kept in a list, the chosen replacement of every row is an index
+    into one candidate list shared by all the rows.
     """
 
     def __init__(self):
-        super().__init__()
-        self._childrens = []
+        self.materials = []
+        self.candidates = ["None"]
+        self.match_indices = np.zeros(0, dtype=np.int32)
+        self._changed_fns = []
 
-    def get_item_children(self, item):
-        """Returns all the children when the widget asks it."""
-        if item is not None:
-            # Since we are doing a flat list, we return the children of root only.
-            # If it's not root we return.
-            return []
+    def __len__(self):
+        return len(self.materials)
 
-        return self._childrens
-    
-    def add_item(self, material, match, matchs):
-        self._childrens.append(MatchItem(material, match, matchs))
-        self._item_changed(None)
+    def add_changed_fn(self, fn):
+        self._changed_fns.append(fn)
+
+    def _changed(self):
+        for fn in self._changed_fns:
+            fn()
+
+    def load(self, materials, matches, candidates):
+        """Load all the rows at once, listeners are notified a single time"""
+        self.materials = list(materials)
+        self.candidates = list(candidates)
+
+        candidate_indices = {}
+        for index, candidate in enumerate(self.candidates):
+            candidate_indices.setdefault(candidate, index)
+        self.match_indices = np.fromiter((candidate_indices.get(match, 0) for match in matches),
+                                         dtype=np.int32, count=len(self.materials))
+        self._changed()
+
+    def set_match_index(self, row, index):
+        self.match_indices[row] = index
 
     def get_values_dict(self):
-        value_dict = {}
-        for child in self._childrens:
-            material = child.material_model.as_string
-            match = child.match_model.get_value_as_string()
-            value_dict[material] = match
-        return value_dict
+        return {material: self.candidates[index] for material, index in zip(self.materials, self.match_indices)}
 
     def clear(self):
-        self._childrens = []
-        self._item_changed(None)
+        self.load([], [], ["None"])
 
-    def get_item_value_model_count(self, item):
-        """The number of columns"""
-        return 2
 
-    def get_item_value_model(self, item, column_id):
-        """
-        Return value model.
-        It's the object that tracks the specific value.
-        In our case we use ui.SimpleStringModel.
-        """
-        if item and isinstance(item, MatchItem):
-            return item.match_model if column_id == 1 else item.material_model
-        
 class ComboItem(ui.AbstractItem):
     def __init__(self, text):
         super().__init__()
         self.model = ui.SimpleStringModel(text)
 
-class ComboModel(ui.AbstractItemModel):
-    def __init__(self, matchs, match):
+
+class RowComboModel(ui.AbstractItemModel):
+    """Combo model of one visible row, the candidate items are shared with the other rows"""
+
+    def __init__(self, items, match_model, row):
         super().__init__()
-        self.matchs = matchs
+        self._items = items
 
-        self._current_index = ui.SimpleIntModel()
+        self._current_index = ui.SimpleIntModel(int(match_model.match_indices[row]))
         self._current_index.add_value_changed_fn(
-            lambda a: self._item_changed(None))
-
-        self._items = [
-            ComboItem(text)
-            for text in matchs
-        ]
+            lambda a: self._on_index_changed(match_model, row, a))
 
-        self._current_index.set_value(self.matchs.index(match))
-        
+    def _on_index_changed(self, match_model, row, model):
+        match_model.set_match_index(row, model.get_value_as_int())
+        self._item_changed(None)
 
     def get_item_children(self, item):
         return self._items
@@ -100,36 +96,69 @@ class ComboModel(ui.AbstractItemModel):
         if item is None:
             return self._current_index
         return item.model
-    
-    def get_value_as_string(self):
-        return self.matchs[self._current_index.get_value_as_int()]
-         
-class EditableDelegate(ui.AbstractItemDelegate):
+
+
+class MatchListView:
     """
-    Delegate is the representation layer. TreeView calls the methods
-    of the delegate to create custom widgets for each item.
+    Virtualized view of the match table, only the rows in the visible part of the
+    scrolling frame are built. Spacers above and below stand in for the others.
     """
 
-    def __init__(self):
-        super().__init__()
-        self.subscription = None
-
-    def build_branch(self, model, item, column_id, level, expanded):
-        """Create a branch widget that opens or closes subtree"""
-        pass
-
-    def build_widget(self, model, item, column_id, level, expanded):
-        """Create a widget per column per item"""
-        stack = ui.ZStack(height=20)
-        with stack:
-            value_model = model.get_item_value_model(item, column_id)           
-            if column_id == 1:
-                with ui.VStack():
-                    ui.Spacer(height=2)
-                    field = ui.ComboBox(value_model)
-                    ui.Spacer(height=2)
-            else:
-                label = ui.Label(value_model.as_string)
+    ROW_HEIGHT = 24
+    OVERSCAN = 10
+
+    def __init__(self, match_model: MatchModel):
+        self._model = match_model
+        self._model.add_changed_fn(self._on_model_changed)
+        self._combo_items = []
+        self._first = 0
+        self._last = 0
+
+        self._scrolling_frame = ui.ScrollingFrame(
+            horizontal_scrollbar_policy=ui.ScrollBarPolicy.SCROLLBAR_ALWAYS_OFF,
+            vertical_scrollbar_policy=ui.ScrollBarPolicy.SCROLLBAR_AS_NEEDED,
+            style_type_name_override="TreeView",
+        )
+        with self._scrolling_frame:
+            with ui.VStack(height=0):
+                self._top_spacer = ui.Spacer(height=0)
+                self._rows_frame = ui.Frame(height=0, build_fn=self._build_rows)
+                self._bottom_spacer = ui.Spacer(height=0)
+        self._scrolling_frame.set_scroll_y_changed_fn(lambda y: self._update_range())
+        self._scrolling_frame.set_computed_content_size_changed_fn(self._update_range)
+
+    def _on_model_changed(self):
+        self._combo_items = [ComboItem(text) for text in self._model.candidates]
+        self._first = self._last = 0
+        self._scrolling_frame.scroll_y = 0
+        self._update_range(force=True)
+
+    def _update_range(self, force=False):
+        row_count = len(self._model)
+        visible = int(self._scrolling_frame.computed_height // self.ROW_HEIGHT) + 1
+        first = max(0, int(self._scrolling_frame.scroll_y // self.ROW_HEIGHT) - self.OVERSCAN)
+        last = min(row_count, first + visible + 2 * self.OVERSCAN)
+
+        # keep the built rows while they still cover the visible part
+        if not force and self._first <= first and last <= self._last:
+            return
+        self._first = first
+        self._last = min(row_count, last + self.OVERSCAN)
+
+        self._top_spacer.height = ui.Pixel(self._first * self.ROW_HEIGHT)
+        self._bottom_spacer.height = ui.Pixel((row_count - self._last) * self.ROW_HEIGHT)
+        self._rows_frame.rebuild()
+
+    def _build_rows(self):
+        with ui.VStack(height=0):
+            for row in range(self._first, self._last):
+                with ui.HStack(height=self.ROW_HEIGHT):
+                    ui.Label(self._model.materials[row])
+                    with ui.VStack():
+                        ui.Spacer(height=2)
+                        ui.ComboBox(RowComboModel(self._combo_items, self._model, row))
+                        ui.Spacer(height=2)
+
 
 class MaterialMatchWindow(ui.Window):
     def __init__(self, title: str, delegate=None, **kwargs):
@@ -139,9 +168,18 @@ class MaterialMatchWindow(ui.Window):
         self.replace_path = None
         self.ovmt_path = None
 
+        self.library_paths = None
+        self._library_materials = None
+
+        self._match_cache = None
+        self._task_runner = TaskRunner()
+        self._fingerprint = None
+        self._auto_results = {}
+
         self.frame.set_build_fn(self._build_fn)
 
     def destroy(self):
+        self._task_runner.cancel()
         # It will destroy all the children
         super().destroy()
 
@@ -175,6 +213,14 @@ class MaterialMatchWindow(ui.Window):
                         self.replace_path_field.model.add_value_changed_fn(self.replace_path_changed)
                     ui.Button('Set', width=50, height=22, clicked_fn=self.set_replace_path)
 
+                with ui.HStack(spacing=5, height=0):
+                    ui.Label('Library Paths', width=140)
+                    with ui.VStack(height=0):
+                        ui.Spacer(height=3)
+                        self.library_paths_field = ui.StringField(width=ui.Fraction(2), height=22)
+                        self.library_paths_field.model.add_value_changed_fn(self.library_paths_changed)
+                    ui.Button('Index', width=50, height=22, clicked_fn=self.index_libraries)
+
                 with ui.HStack(spacing=5, height=0):
                     ui.Label('Ovmt Path', width=140)
                     with ui.VStack(height=0):
@@ -191,26 +237,22 @@ class MaterialMatchWindow(ui.Window):
                     ui.Label('Material')
                     ui.Label('Replace')
                 
-                with ui.ScrollingFrame(
-                    horizontal_scrollbar_policy=ui.ScrollBarPolicy.SCROLLBAR_ALWAYS_OFF,
-                    vertical_scrollbar_policy=ui.ScrollBarPolicy.SCROLLBAR_AS_NEEDED,
-                    style_type_name_override="TreeView",
-                ):
-                    self._match_model = MatchModel()
-                    self._delegate = EditableDelegate()
-                    tree_view = ui.TreeView(
-                        self._match_model,
-                        delegate=self._delegate,
-                        root_visible=False,
-                        header_visible=False,
-                        style_type_name_override="TreeView",
-                    )
-                
+                self._match_model = MatchModel()
+                self._match_list = MatchListView(self._match_model)
+
+                with ui.HStack(spacing=5, height=0):
+                    self.progressbar = ui.ProgressBar(height=20)
+                    ui.Button("Cancel", width=60, height=20, clicked_fn=self.cancel)
+                self._task_runner.progressbar = self.progressbar
+
                 with ui.HStack(spacing=5, height=0):
                     ui.Separator()
                     self.process_btn = ui.Button(f" {omni.kit.ui.get_custom_glyph_code('${glyphs}/menu_material.svg')}  Replace ",
                                     width=200, height=30, clicked_fn=self.process, enabled=False)
                     
+    def cancel(self):
+        self._task_runner.cancel()
+
     def import_handler(self, filename: str, dirname: str, selections):
         print(f"> Import '{filename}' from '{dirname}' or selected files '{selections}'")
         self.ovmt_path_field.model.set_value(dirname + filename)
@@ -234,32 +276,69 @@ class MaterialMatchWindow(ui.Window):
     def replace_path_changed(self, model):
         self.replace_path = model.as_string
 
+    def library_paths_changed(self, model):
+        self.library_paths = model.as_string
+
+    def get_library_roots(self):
+        if not self.library_paths:
+            return []
+        return [path.strip().strip('"') for path in self.library_paths.split(';') if path.strip()]
+
+    def index_libraries(self):
+        """扫描材质库, 建立或更新磁盘上的索引"""
+        library_materials = {}
+        for root in self.get_library_roots():
+            if not os.path.isdir(root):
+                print(f"Library path '{root}' does not exist")
+                continue
+            index = LibraryIndex.load_or_build(root)
+            for name, file_path, prim_path in index.get_materials():
+                # the first library wins when names collide
+                library_materials.setdefault(name, (file_path, prim_path))
+        self._library_materials = library_materials
+        print(f"Indexed {len(library_materials)} library materials")
+
     def replace_with_ovmt(self):
         """用ovmt格式的材质字典恢复vred默认材质"""
         if self.ovmt_path and self.materials_path:
             if os.path.isfile(self.ovmt_path):
-                with omni.kit.undo.group():
-                    with open(self.ovmt_path, "r", encoding="utf8") as f:
-                        material_dict = json.loads(f.read())
-                        for material, bound_objs in material_dict.items():
-                            material_path = self.materials_path + '/' + material
-
-                            # 获取prim路径
-                            prims_paths = []
-                            for obj_name in bound_objs:
-                                prims = self.find_prims_by_name(obj_name)
-                                prims_paths += [x.GetPrimPath() for x in prims]
-                            
-                            omni.kit.commands.execute('BindMaterialCommand',
-                                prim_path=prims_paths,
-                                material_path=material_path)
-        
-    def find_prims_by_name(self, prim_name: str):
-        """通过名字寻找prims"""
+                with open(self.ovmt_path, "r", encoding="utf8") as f:
+                    material_dict = json.loads(f.read())
+
+                self._task_runner.run(self.iter_replace_with_ovmt(material_dict))
+
+    def iter_replace_with_ovmt(self, material_dict):
+        # 只遍历一次stage, 建立名字到prims的索引
+        name_index = {}
+        yield from self.iter_name_index(name_index)
+
+        bindings = {}
+        for material, bound_objs in material_dict.items():
+            material_path = self.materials_path + '/' + material
+
+            # 获取prim路径
+            prims_paths = bindings.setdefault(material_path, [])
+            for obj_name in bound_objs:
+                prims_paths += name_index.get(obj_name, [])
+
+        # 所有绑定在一个change block里完成, 只需一次undo
+        omni.kit.commands.execute('BindMaterialsCommand', bindings=bindings)
+
+    def build_name_index(self):
+        """遍历一次stage, 建立名字到prim路径的索引"""
+        name_index = {}
+        for _ in self.iter_name_index(name_index):
+            pass
+        return name_index
+
+    def iter_name_index(self, name_index):
         stage = omni.usd.get_context().get_stage()
-        found_prims = [x for x in stage.Traverse() if x.GetName() == prim_name]
-        return found_prims
-                
+        for i, prim in enumerate(stage.Traverse()):
+            name_index.setdefault(prim.GetName(), []).append(prim.GetPrimPath())
+            if i % 1000 == 0:
+                # the prim count is unknown before the traversal ends
+                yield None
+
     def set_materials_path(self):
         path = self.get_select_prim_path()
         if path:
@@ -290,35 +369,113 @@ class MaterialMatchWindow(ui.Window):
         self.process_btn.enabled=False
         try:
             material_paths = self.get_children_paths(self.materials_path)
-            replace_path = self.get_children_paths(self.replace_path)
+            if self.get_library_roots():
+                # match against the library indexes, nothing is loaded into the stage yet
+                self.index_libraries()
+                matchs = list(self._library_materials.keys())
+            else:
+                self._library_materials = None
+                replace_path = self.get_children_paths(self.replace_path)
+                matchs = self.get_names_from_paths(replace_path)
         except Exception as e:
             print(e)
             return
 
         material_names = self.get_names_from_paths(material_paths)
 
-        matchs = self.get_names_from_paths(replace_path)
+        def on_done(results):
+            matchs.insert(0, "None")
+            self._match_model.load(results.keys(), results.values(), matchs)
+            self.process_btn.enabled=True
+
+        self._task_runner.run(self.iter_match(material_names, matchs), on_done)
 
-        results = self.classify_by_similarity(material_names, matchs)
+    def iter_match(self, material_names, matchs):
+        # confirmed matches are reused, only the new names are scored
+        match_cache = self.get_match_cache()
+        self._fingerprint = MatchCache.fingerprint(matchs)
+        cached = {}
+        for name in material_names:
+            entry = match_cache.get(self._fingerprint, name)
+            if entry is not None:
+                cached[name] = entry[0]
 
-        self._match_model.clear()
-        matchs.insert(0, "None")
-        for key, value in results.items():
-            self._match_model.add_item(key, value, matchs)
-        self.process_btn.enabled=True
+        # 设置相似度阈值
+        threshold = 60
+
+        scored = {}
+        matcher = FuzzyMatcher(matchs, threshold=threshold)
+        yield from matcher.iter_match([name for name in material_names if name not in cached], scored)
+
+        for name, match in scored.items():
+            match_cache.put(self._fingerprint, name, match)
+        match_cache.save()
+
+        results = {name: cached[name] if name in cached else scored[name] for name in material_names}
+        self._auto_results = results
+        return results
     
     def process(self):
         results = self._match_model.get_values_dict()
+
+        # remember the matches fixed by hand in the combo boxes
+        if self._fingerprint:
+            match_cache = self.get_match_cache()
+            for name, match in results.items():
+                if name in self._auto_results and match != self._auto_results[name]:
+                    match_cache.put(self._fingerprint, name, match, user=True)
+            match_cache.save()
+
+        # resolve the bound prims of every source material from one index lookup
+        bound_index = get_binding_index().get_bound_prims_index()
+
+        replace_path = self.get_replace_scope_path()
+        bindings = {}
+        for name in results.keys():
+            if results[name] != "None":
+                material_path = Sdf.Path(self.materials_path + '/' + name)
+                prims_paths = bound_index.get(material_path, [])
+                target_material_path = replace_path + '/' + results[name]
+                bindings.setdefault(target_material_path, []).extend(prims_paths)
+
         with omni.kit.undo.group():
-            for name in results.keys():
-                if results[name] != "None":
-                    material_path = self.materials_path + '/' + name
-                    prims_paths = self.get_bound_objects_paths(material_path)
-                    target_material_path = self.replace_path + '/' + results[name]
-                    
-                    omni.kit.commands.execute('BindMaterialCommand',
-                        prim_path=prims_paths,
-                        material_path=target_material_path)
+            if self._library_materials is not None:
+                self.reference_library_materials(set(results.values()) - {"None"})
+            omni.kit.commands.execute('BindMaterialsCommand', bindings=bindings)
+
+    def get_replace_scope_path(self):
+        if self._library_materials is not None and not self.replace_path:
+            return "/World/Looks"
+        return self.replace_path
+
+    def reference_library_materials(self, names):
+        """只把选中的库材质引用进stage"""
+        stage = omni.usd.get_context().get_stage()
+        replace_path = self.get_replace_scope_path()
+
+        references = []
+        for name in sorted(names):
+            material_path = replace_path + '/' + name
+            if stage.GetPrimAtPath(material_path):
+                continue
+
+            file_path, prim_path = self._library_materials[name]
+            if prim_path:
+                references.append((material_path, file_path, prim_path))
+            else:
+                omni.kit.commands.execute('CreateMdlMaterialPrimCommand',
+                    mtl_url=file_path,
+                    mtl_name=name,
+                    mtl_path=material_path,
+                    select_new_prim=False)
+
+        if references:
+            omni.kit.commands.execute('ReferenceMaterialsCommand', references=references)
+
+    def get_match_cache(self):
+        if self._match_cache is None:
+            self._match_cache = MatchCache()
+        return self._match_cache
 
     def get_children_paths(self, parent_path):
         stage = omni.usd.get_context().get_stage()
@@ -326,56 +483,16 @@ class MaterialMatchWindow(ui.Window):
         return [child.GetPrimPath() for child in parent_prim.GetAllChildren()]
     
     def get_bound_objects_paths(self, material_path):
-        stage = omni.usd.get_context().get_stage()
-        material_prim = stage.GetPrimAtPath(material_path)
-
-        prim_paths = []
-        stage_prims = list(stage.Traverse())
-        bounds = UsdShade.MaterialBindingAPI.ComputeBoundMaterials(stage_prims, UsdShade.Tokens.allPurpose)
-        for stage_prim, material, relationship in zip(stage_prims, bounds[0], bounds[1]):
-            material_prim = material.GetPrim()
-            if not material_prim.IsValid():
-                continue
-            
-            if material_prim.GetPrimPath() != material_path:
-                continue
-                
-            prim_paths.append(stage_prim.GetPrimPath())
-        return prim_paths
+        return get_binding_index().get_bound_prim_paths(material_path)
 
-            
     def get_prim_name(self, prim_path):
         stage = omni.usd.get_context().get_stage()
         prim = stage.GetPrimAtPath(prim_path)
         return prim.GetName()
     
     def classify_by_similarity(self, texts, labels):
-        # results = {}
-        # classifications = [process.extractOne(text, labels)[0] for text in texts]
-        # for text, classification in zip(texts, classifications):
-        #     results[text] = classification
-
-        # return results
-
-
         # 设置相似度阈值
         threshold = 60
 
-        # 初始化分类结果字典
-        categorized_dict = {}
-
-        # 对于每一个待分类项
-        for item in texts:
-            max_ratio = 0
-            matched_label = "None"
-            for label in labels:
-                ratio = fuzz.token_set_ratio(item, label)
-                if ratio > max_ratio:
-                    max_ratio = ratio
-                    matched_label = label if max_ratio >= threshold else "None"
-            
-            categorized_dict[item] = matched_label
-
-        return categorized_dict
-
-    
\ No newline at end of file
+        matcher = FuzzyMatcher(labels, threshold=threshold)
+        return matcher.match(texts)
@@ -9,16 +9,21 @@ from omni.kit.widget.stage import StageIcons
 from omni.kit.window.file_exporter import get_file_exporter
 import json
 
+from ..binding_index import get_binding_index
+from ..task_runner import TaskRunner
+
 class MaterialOutputWindow(ui.Window):
     def __init__(self, title: str, delegate=None, **kwargs):
         super().__init__(title, **kwargs)
 
         self.materials_path = None
         self.save_path = ""
+        self._task_runner = TaskRunner()
 
         self.frame.set_build_fn(self._build_fn)
 
     def destroy(self):
+        self._task_runner.cancel()
         # It will destroy all the children
         super().destroy()
 
@@ -44,6 +49,10 @@ class MaterialOutputWindow(ui.Window):
                         self.materials_path_field.model.add_value_changed_fn(self.materials_path_changed)
                     ui.Button('Set', width=50, height=22, clicked_fn=self.set_materials_path)
                 ui.Button("Output", height=40, clicked_fn=self.open_file_dialog)
+                with ui.HStack(spacing=5, height=0):
+                    self.progressbar = ui.ProgressBar(height=20)
+                    ui.Button("Cancel", width=60, height=20, clicked_fn=self._task_runner.cancel)
+                self._task_runner.progressbar = self.progressbar
 
     def materials_path_changed(self, model):
         self.materials_path = model.as_string
@@ -85,12 +94,19 @@ class MaterialOutputWindow(ui.Window):
             print(e)
             return
         
+        self._task_runner.run(self.iter_export(material_paths, self.save_path + extension))
+
+    def iter_export(self, material_paths, file_path):
+        # one traversal for the whole export instead of one per material, spread over several frames
+        yield from get_binding_index().iter_flush()
+        bound_index = self.get_bound_objects_index()
+
         material_data = {}
         for material_path in material_paths:
-            material_name, bound_objs = self.get_bound_object_names(material_path)  # get the material binding objects
+            material_name, bound_objs = self.get_bound_object_names(material_path, bound_index)  # get the material binding objects
             material_data[material_name] = bound_objs
 
-        with open(self.save_path + extension, "w", encoding="utf8") as f:
+        with open(file_path, "w", encoding="utf8") as f:
             f.write(json.dumps(material_data))
 
     
@@ -99,24 +115,23 @@ class MaterialOutputWindow(ui.Window):
         parent_prim = stage.GetPrimAtPath(parent_path)
         return [child.GetPrimPath() for child in parent_prim.GetAllChildren()]
     
-    def get_bound_object_names(self, material_path):
+    def get_bound_objects_index(self):
+        """
+        get the material path -> bound prim names index from the shared stage binding index
+        """
+        bound_index = get_binding_index().get_bound_prims_index()
+        return {material_path: [prim_path.name for prim_path in prim_paths]
+                for material_path, prim_paths in bound_index.items()}
+
+    def get_bound_object_names(self, material_path, bound_index=None):
         stage = omni.usd.get_context().get_stage()
         material_prim_obj = stage.GetPrimAtPath(material_path)
 
-        prim_names = []
-        stage_prims = list(stage.Traverse())
-        bounds = UsdShade.MaterialBindingAPI.ComputeBoundMaterials(stage_prims, UsdShade.Tokens.allPurpose)
-        for stage_prim, material, relationship in zip(stage_prims, bounds[0], bounds[1]):
-            material_prim = material.GetPrim()
-            if not material_prim.IsValid():
-                continue
-            
-            if material_prim.GetPrimPath() != material_path:
-                continue
-                
-            prim_names.append(stage_prim.GetName())
+        if bound_index is None:
+            prim_names = [prim_path.name for prim_path in get_binding_index().get_bound_prim_paths(material_path)]
+        else:
+            prim_names = bound_index.get(Sdf.Path(str(material_path)), [])
 
         material_name = material_prim_obj.GetName()
 
         return material_name, prim_names
-    
\ No newline at end of file
@@ -0,0 +1,88 @@
+import omni.kit.commands
+import omni.usd
+import numpy as np
+from pxr import Usd, Sdf, UsdGeom, Vt
+
+from ..sdf_utils import (unique_name, create_prim_spec, author_attribute, author_binding, deactivate_prim_spec,
+                         restore_active_spec, remove_specs)
+
+
+class MergeMeshesCommand(omni.kit.commands.Command):
+    """
+    Author merged meshes and deactivate the meshes they replace.
+
+    Every merged mesh is defined under <root>/Merged with faceVarying normals and uvs and
+    bound to its material, the source meshes are deactivated rather than deleted so undoing,
+    or activating them again, brings them back. Everything is authored on the edit target
+    layer inside one Sdf.ChangeBlock.
+
+    Args:
+        merged: MergedMesh list, see merge.engine.iter_merge_meshes.
+        root_path: the space the merged points are in.
+    """
+
+    def __init__(self, merged, root_path, stage: Usd.Stage = None):
+        self._merged = merged
+        self._root_path = Sdf.Path(str(root_path))
+        self._stage = stage or omni.usd.get_context().get_stage()
+        self._layer = None
+        self._created = []
+        self._deactivated = []
+
+    def do(self):
+        edit_target = self._stage.GetEditTarget()
+        self._layer = edit_target.GetLayer()
+        self._created = []
+        self._deactivated = []
+
+        root = self._stage.GetPrimAtPath(self._root_path)
+        if not root or not self._merged:
+            return
+
+        scope_name = unique_name("Merged", set(root.GetAllChildrenNames()))
+        scope_path = edit_target.MapToSpecPath(self._root_path.AppendChild(scope_name))
+        names = set()
+
+        with Sdf.ChangeBlock():
+            create_prim_spec(self._layer, scope_path, "Xform")
+            self._created.append(scope_path)
+
+            for merged in self._merged:
+                name = unique_name(merged.name if Sdf.Path.IsValidIdentifier(merged.name) else "mesh", names)
+                prim_spec = create_prim_spec(self._layer, scope_path.AppendChild(name), "Mesh")
+                author_attribute(prim_spec, UsdGeom.Tokens.points, Sdf.ValueTypeNames.Point3fArray,
+                                  Vt.Vec3fArray.FromNumpy(merged.points))
+                author_attribute(prim_spec, UsdGeom.Tokens.faceVertexCounts, Sdf.ValueTypeNames.IntArray,
+                                  Vt.IntArray.FromNumpy(merged.counts))
+                author_attribute(prim_spec, UsdGeom.Tokens.faceVertexIndices, Sdf.ValueTypeNames.IntArray,
+                                  Vt.IntArray.FromNumpy(merged.indices))
+                extent = np.stack([merged.points.min(axis=0), merged.points.max(axis=0)])
+                author_attribute(prim_spec, UsdGeom.Tokens.extent, Sdf.ValueTypeNames.Float3Array,
+                                  Vt.Vec3fArray.FromNumpy(extent))
+                author_attribute(prim_spec, UsdGeom.Tokens.subdivisionScheme, Sdf.ValueTypeNames.Token,
+                                  UsdGeom.Tokens.none, Sdf.VariabilityUniform)
+                author_attribute(prim_spec, UsdGeom.Tokens.doubleSided, Sdf.ValueTypeNames.Bool,
+                                  merged.double_sided, Sdf.VariabilityUniform)
+                if merged.normals is not None:
+                    author_attribute(prim_spec, UsdGeom.Tokens.normals, Sdf.ValueTypeNames.Normal3fArray,
+                                      Vt.Vec3fArray.FromNumpy(merged.normals),
+                                      metadata={"interpolation": UsdGeom.Tokens.faceVarying})
+                if merged.uvs is not None:
+                    author_attribute(prim_spec, "primvars:st", Sdf.ValueTypeNames.TexCoord2fArray,
+                                      Vt.Vec2fArray.FromNumpy(merged.uvs),
+                                      metadata={"interpolation": UsdGeom.Tokens.faceVarying})
+                author_binding(prim_spec, merged.material_path)
+
+                for prim_path in merged.prim_paths:
+                    self._deactivated.append(deactivate_prim_spec(self._layer, edit_target.MapToSpecPath(prim_path)))
+
+    def undo(self):
+        if not self._layer:
+            return
+
+        with Sdf.ChangeBlock():
+            for previous in reversed(self._deactivated):
+                restore_active_spec(self._layer, previous)
+            remove_specs(self._layer, self._created)
+        self._created = []
+        self._deactivated = []
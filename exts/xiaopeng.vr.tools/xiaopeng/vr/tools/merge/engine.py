@@ -0,0 +1,173 @@
+from typing import Dict, List
+import numpy as np
+from pxr import Usd, Sdf, UsdGeom
+
+from ..binding_index import get_binding_index
+from ..mesh_utils import reverse_faces, to_face_varying
+
+# a merged mesh is split past this many points, so culling still has something to work with
+DEFAULT_MAX_POINTS = 1000000
+
+
+class MergedMesh:
+    """the arrays of the meshes of one material, concatenated in the space of the merge root"""
+
+    def __init__(self, name: str, material_path: Sdf.Path):
+        self.name = name
+        self.material_path = material_path
+        self.prim_paths: List[Sdf.Path] = []
+        self.points = []
+        self.counts = []
+        self.indices = []
+        # faceVarying, None as soon as one of the meshes has none
+        self.normals = []
+        # faceVarying, zeros for the meshes without uvs
+        self.uvs = []
+        self.has_uvs = False
+        self.double_sided = False
+        self.point_count = 0
+
+    def add(self, prim_path, points, counts, indices, normals, uvs, double_sided):
+        self.prim_paths.append(prim_path)
+        self.indices.append(indices + self.point_count)
+        self.points.append(points)
+        self.counts.append(counts)
+        if self.normals is not None:
+            self.normals = self.normals + [normals] if normals is not None else None
+        self.uvs.append(uvs if uvs is not None else np.zeros((len(indices), 2)))
+        self.has_uvs = self.has_uvs or uvs is not None
+        self.double_sided = self.double_sided or double_sided
+        self.point_count += len(points)
+
+    def finish(self):
+        """concatenate the arrays of all the meshes"""
+        self.points = np.concatenate(self.points).astype(np.float32)
+        self.counts = np.concatenate(self.counts).astype(np.int32)
+        self.indices = np.concatenate(self.indices).astype(np.int32)
+        if self.normals is not None:
+            self.normals = np.concatenate(self.normals).astype(np.float32)
+        self.uvs = np.concatenate(self.uvs).astype(np.float32) if self.has_uvs else None
+        return self
+
+
+def _is_static(prim: Usd.Prim, root: Usd.Prim, cache: Dict[Sdf.Path, bool]) -> bool:
+    """neither the points nor the transform of the prim or of its ancestors up to root are animated"""
+    path = prim.GetPath()
+    if path in cache:
+        return cache[path]
+    static = not UsdGeom.Xformable(prim).TransformMightBeTimeVarying()
+    if static and prim != root:
+        static = _is_static(prim.GetParent(), root, cache)
+    cache[path] = static
+    return static
+
+
+def _read_mesh(mesh: UsdGeom.Mesh, matrix: np.ndarray):
+    points = mesh.GetPointsAttr().Get()
+    counts = mesh.GetFaceVertexCountsAttr().Get()
+    indices = mesh.GetFaceVertexIndicesAttr().Get()
+    if not points or not counts or indices is None:
+        return None
+
+    points = np.asarray(points, dtype=np.float64)
+    counts = np.asarray(counts, dtype=np.int64)
+    indices = np.asarray(indices, dtype=np.int64)
+    if counts.sum() != len(indices) or indices.max() >= len(points):
+        return None
+
+    rotation = matrix[:3, :3]
+    points = points @ rotation + matrix[3, :3]
+
+    primvars = UsdGeom.PrimvarsAPI(mesh)
+    normals = None
+    normals_primvar = primvars.GetPrimvar("normals")
+    if normals_primvar and normals_primvar.HasValue():
+        normals = to_face_varying(normals_primvar.ComputeFlattened(), normals_primvar.GetInterpolation(),
+                                  counts, indices)
+    elif mesh.GetNormalsAttr().HasValue():
+        normals = to_face_varying(mesh.GetNormalsAttr().Get(), mesh.GetNormalsInterpolation(), counts, indices)
+    if normals is not None:
+        # normals go through the inverse transpose
+        normals = np.asarray(normals, dtype=np.float64) @ np.linalg.inv(rotation).T
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        normals = normals / np.where(lengths > 0, lengths, 1)
+
+    uvs = None
+    st = primvars.GetPrimvar("st")
+    if st and st.HasValue():
+        uvs = to_face_varying(st.ComputeFlattened(), st.GetInterpolation(), counts, indices)
+
+    # the merged mesh is right handed
+    flip = (np.linalg.det(rotation) < 0) != (mesh.GetOrientationAttr().Get() == UsdGeom.Tokens.leftHanded)
+    if flip:
+        order = reverse_faces(counts)
+        indices = indices[order]
+        normals = normals[order] if normals is not None else None
+        uvs = uvs[order] if uvs is not None else None
+
+    return points, counts, indices, normals, uvs, bool(mesh.GetDoubleSidedAttr().Get())
+
+
+def iter_merge_meshes(stage: Usd.Stage, root_path, max_points: int = DEFAULT_MAX_POINTS):
+    """
+    Generator for the task runner, groups the static meshes under root_path by their resolved
+    material and concatenates each group. Returns the MergedMesh of the groups of at least two meshes.
+    """
+    root = stage.GetPrimAtPath(str(root_path))
+    if not root:
+        return []
+
+    index = get_binding_index(stage)
+    yield from index.iter_flush()
+
+    xform_cache = UsdGeom.XformCache()
+    root_inverse = np.array(xform_cache.GetLocalToWorldTransform(root).GetInverse())
+    static_cache = {}
+
+    # material path -> meshes being filled, the last one is open
+    groups: Dict[Sdf.Path, List[MergedMesh]] = {}
+    prim_range = iter(Usd.PrimRange(root))
+    for i, prim in enumerate(prim_range):
+        if prim.IsInstance() or prim.IsA(UsdGeom.PointInstancer):
+            prim_range.PruneChildren()
+            continue
+        if not prim.IsA(UsdGeom.Mesh):
+            continue
+        prim_range.PruneChildren()
+
+        mesh = UsdGeom.Mesh(prim)
+        if prim.GetAllChildren() or prim.HasRelationship("skel:skeleton"):
+            continue
+        # hidden or proxy/guide meshes, directly or through an ancestor, would start rendering
+        if mesh.ComputeVisibility() == UsdGeom.Tokens.invisible:
+            continue
+        if mesh.ComputePurpose() not in (UsdGeom.Tokens.default_, UsdGeom.Tokens.render):
+            continue
+        if mesh.GetPointsAttr().GetNumTimeSamples() > 0 or not _is_static(prim, root, static_cache):
+            continue
+
+        material_path = index.get_material_path(prim.GetPath())
+        if material_path is None:
+            continue
+
+        matrix = np.array(xform_cache.GetLocalToWorldTransform(prim)) @ root_inverse
+        arrays = _read_mesh(mesh, matrix)
+        if arrays is None:
+            continue
+
+        meshes = groups.setdefault(material_path, [])
+        if not meshes or meshes[-1].point_count + len(arrays[0]) > max_points:
+            name = material_path.name if not meshes else f"{material_path.name}_{len(meshes)}"
+            meshes.append(MergedMesh(name, material_path))
+        meshes[-1].add(prim.GetPath(), *arrays)
+
+        if i % 100 == 0:
+            yield None
+
+    merged = []
+    for meshes in groups.values():
+        for mesh in meshes:
+            if len(mesh.prim_paths) > 1:
+                merged.append(mesh.finish())
+                yield None
+    return merged
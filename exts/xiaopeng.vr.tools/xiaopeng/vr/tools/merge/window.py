@@ -0,0 +1,76 @@
+import omni.ext
+import omni.ui as ui
+import omni.usd
+import omni.kit.commands
+
+from ..task_runner import TaskRunner
+from .engine import DEFAULT_MAX_POINTS, iter_merge_meshes
+
+
+class MergeWindow(ui.Window):
+    def __init__(self, title: str, delegate=None, **kwargs):
+        super().__init__(title, **kwargs)
+
+        self._task_runner = TaskRunner()
+
+        self.frame.set_build_fn(self._build_fn)
+
+    def destroy(self):
+        self._task_runner.cancel()
+        # It will destroy all the children
+        super().destroy()
+
+    def on_shutdown(self):
+        self._win = None
+
+    def show(self):
+        self.visible = True
+        self.focus()
+
+    def hide(self):
+        self.visible = False
+
+    def _build_fn(self):
+
+        with self.frame:
+            with ui.VStack(spacing=5):
+                with ui.HStack(spacing=5, height=0):
+                    ui.Label('Root', width=80)
+                    self.root_path_field = ui.StringField(height=22)
+                    ui.Button('Set', width=50, height=22, clicked_fn=self.set_root_path)
+                with ui.HStack(spacing=5, height=0):
+                    # a merged mesh is split past this many points
+                    ui.Label('Max Points', width=80)
+                    self.max_points_field = ui.IntField(height=22)
+                    self.max_points_field.model.set_value(DEFAULT_MAX_POINTS)
+                ui.Button("Merge by Material", height=40, clicked_fn=self.merge)
+                self.report_label = ui.Label("", height=20)
+                with ui.HStack(spacing=5, height=0):
+                    self.progressbar = ui.ProgressBar(height=20)
+                    ui.Button("Cancel", width=60, height=20, clicked_fn=self._task_runner.cancel)
+                self._task_runner.progressbar = self.progressbar
+
+    def set_root_path(self):
+        paths = omni.usd.get_context().get_selection().get_selected_prim_paths()
+        if paths:
+            self.root_path_field.model.set_value(paths[0])
+
+    def merge(self):
+        stage = omni.usd.get_context().get_stage()
+        root_path = self.root_path_field.model.get_value_as_string()
+        if not root_path and stage.GetDefaultPrim():
+            root_path = str(stage.GetDefaultPrim().GetPath())
+        if not root_path:
+            return
+
+        def on_done(merged):
+            if not merged:
+                self.report_label.text = "Nothing to merge"
+                return
+            omni.kit.commands.execute('MergeMeshesCommand', merged=merged, root_path=root_path)
+            meshes = sum(len(mesh.prim_paths) for mesh in merged)
+            self.report_label.text = f"{meshes} meshes merged into {len(merged)}, {meshes - len(merged)} draw calls less"
+            print(f"[xiaopeng.vr.tools] {self.report_label.text}")
+
+        self._task_runner.run(
+            iter_merge_meshes(stage, root_path, max(1, self.max_points_field.model.get_value_as_int())), on_done)
@@ -0,0 +1,82 @@
+import numpy as np
+
+
+def triangulate(counts, indices):
+    """
+    Fan triangulation of polygon faces, vectorized.
+
+    Args:
+        counts: faceVertexCounts
+        indices: faceVertexIndices
+
+    Returns:
+        (triangles, corners, faces): the vertex indices of every triangle (T, 3), the
+        positions of its corners in faceVertexIndices (T, 3), to look up faceVarying
+        values, and the face it comes from (T,), to look up uniform values.
+        Faces with less than 3 vertices are dropped.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    indices = np.asarray(indices, dtype=np.int64)
+
+    starts = np.zeros(len(counts), dtype=np.int64)
+    np.cumsum(counts[:-1], out=starts[1:])
+
+    tri_counts = np.maximum(counts - 2, 0)
+    faces = np.repeat(np.arange(len(counts)), tri_counts)
+    # k in 1..count-2 inside every face
+    offsets = np.zeros(len(counts), dtype=np.int64)
+    np.cumsum(tri_counts[:-1], out=offsets[1:])
+    k = np.arange(len(faces)) - offsets[faces] + 1
+
+    first = starts[faces]
+    corners = np.stack([first, first + k, first + k + 1], axis=1)
+    return indices[corners], corners, faces
+
+
+def triangle_areas(points, triangles):
+    e1 = points[triangles[:, 1]] - points[triangles[:, 0]]
+    e2 = points[triangles[:, 2]] - points[triangles[:, 0]]
+    return 0.5 * np.linalg.norm(np.cross(e1, e2), axis=1)
+
+
+def array_nbytes(value) -> int:
+    """size in memory of an attribute value, 0 when it has none"""
+    if value is None:
+        return 0
+    try:
+        return np.asarray(value).nbytes
+    except (TypeError, ValueError):
+        return 0
+
+
+def reverse_faces(counts):
+    """
+    permutation of the face corners reversing the winding of every face, for faceVertexIndices
+    and the faceVarying arrays
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    starts = np.zeros(len(counts), dtype=np.int64)
+    np.cumsum(counts[:-1], out=starts[1:])
+    faces = np.repeat(np.arange(len(counts)), counts)
+    k = np.arange(len(faces)) - starts[faces]
+    return starts[faces] + counts[faces] - 1 - k
+
+
+def to_face_varying(values, interpolation: str, counts, indices):
+    """
+    expand primvar values of any interpolation to one value per face corner, None when they do not fit
+    """
+    values = np.asarray(values)
+    counts = np.asarray(counts, dtype=np.int64)
+    indices = np.asarray(indices, dtype=np.int64)
+    if interpolation in ("vertex", "varying"):
+        if len(indices) and indices.max() >= len(values):
+            return None
+        return values[indices]
+    if interpolation == "faceVarying":
+        return values if len(values) == len(indices) else None
+    if interpolation == "uniform":
+        return np.repeat(values, counts, axis=0) if len(values) == len(counts) else None
+    if interpolation == "constant" and len(values):
+        return np.repeat(values[:1], len(indices), axis=0)
+    return None
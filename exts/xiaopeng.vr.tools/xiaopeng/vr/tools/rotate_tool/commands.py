@@ -0,0 +1,121 @@
+import omni.kit.commands
+import omni.usd
+from pxr import Usd, Sdf, UsdGeom
+
+from ..sdf_utils import remove_specs, get_or_create_prim_spec
+
+
+class BakeRotationsCommand(omni.kit.commands.Command):
+    """
+    Write baked rotation keyframes as one change.
+
+    The keyframes replace the time samples of the rotate ops on the edit target layer, the
+    xformOpOrder of the prims whose rotate op only exists in the session layer is written
+    next to them, and the live values of the session layer are removed so they do not hide
+    the samples. All of it is authored inside one Sdf.ChangeBlock, every spec is copied to
+    an anonymous layer before it is touched and the end time code is recorded, undo
+    restores both.
+
+    Args:
+        samples: [(attribute path, [(time code, value)])], see rotate_tool.turntable.TurntableDriver.get_bake_samples.
+        end_time_code: end of the stage time range to set, None to keep it
+    """
+
+    def __init__(self, samples, end_time_code: float = None, stage: Usd.Stage = None):
+        self._samples = [(Sdf.Path(str(path)), keyframes) for path, keyframes in samples]
+        self._end_time_code = end_time_code
+        self._stage = stage or omni.usd.get_context().get_stage()
+        self._old_end_time_code = None
+        self._backups = {}
+        self._touched = []
+        self._created = []
+        self._layer = None
+
+    def do(self):
+        edit_target = self._stage.GetEditTarget()
+        self._layer = edit_target.GetLayer()
+        session_layer = self._stage.GetSessionLayer()
+        self._backups = {}
+        self._touched = []
+        self._created = []
+
+        # read everything from the composed stage before authoring
+        edits = []
+        for attr_path, keyframes in self._samples:
+            attr = self._stage.GetAttributeAtPath(attr_path)
+            if not attr:
+                continue
+            order_path = attr_path.GetPrimPath().AppendProperty(UsdGeom.Tokens.xformOpOrder)
+            order = None
+            if session_layer.GetAttributeAtPath(order_path):
+                order = self._stage.GetAttributeAtPath(order_path).Get()
+            edits.append((attr_path, attr.GetTypeName(), keyframes, order))
+
+        with Sdf.ChangeBlock():
+            for attr_path, type_name, keyframes, order in edits:
+                spec_path = edit_target.MapToSpecPath(attr_path)
+                prim_spec, created_path = get_or_create_prim_spec(self._layer, spec_path.GetPrimPath())
+                if created_path:
+                    self._created.append(created_path)
+
+                attr_spec = self._backup(self._layer, spec_path)
+                if attr_spec:
+                    attr_spec.ClearInfo("timeSamples")
+                else:
+                    attr_spec = Sdf.AttributeSpec(prim_spec, spec_path.name, type_name)
+                for time, value in keyframes:
+                    self._layer.SetTimeSample(spec_path, time, value)
+
+                if order is not None:
+                    order_spec_path = spec_path.GetPrimPath().AppendProperty(UsdGeom.Tokens.xformOpOrder)
+                    order_spec = self._backup(self._layer, order_spec_path)
+                    if not order_spec:
+                        order_spec = Sdf.AttributeSpec(prim_spec, UsdGeom.Tokens.xformOpOrder,
+                                                       Sdf.ValueTypeNames.TokenArray, Sdf.VariabilityUniform)
+                    order_spec.default = order
+
+                if session_layer == self._layer:
+                    continue
+                # the live values would hide the baked samples
+                for name in (attr_path.name, UsdGeom.Tokens.xformOpOrder):
+                    path = attr_path.GetPrimPath().AppendProperty(name)
+                    spec = self._backup(session_layer, path)
+                    if spec:
+                        session_layer.GetPrimAtPath(path.GetPrimPath()).RemoveProperty(spec)
+
+        if self._end_time_code is not None:
+            self._old_end_time_code = self._stage.GetEndTimeCode()
+            self._stage.SetEndTimeCode(self._end_time_code)
+
+    def _backup(self, layer: Sdf.Layer, path: Sdf.Path):
+        spec = layer.GetAttributeAtPath(path)
+        if spec:
+            backup = self._backups.get(layer)
+            if backup is None:
+                backup = self._backups[layer] = Sdf.Layer.CreateAnonymous()
+            Sdf.CreatePrimInLayer(backup, path.GetPrimPath())
+            Sdf.CopySpec(layer, path, backup, path)
+        self._touched.append((layer, path, bool(spec)))
+        return spec
+
+    def undo(self):
+        if not self._layer:
+            return
+
+        with Sdf.ChangeBlock():
+            for layer, path, existed in reversed(self._touched):
+                prim_spec = layer.GetPrimAtPath(path.GetPrimPath())
+                if not prim_spec:
+                    continue
+                spec = layer.GetAttributeAtPath(path)
+                if spec:
+                    prim_spec.RemoveProperty(spec)
+                if existed:
+                    Sdf.CopySpec(self._backups[layer], path, layer, path)
+            remove_specs(self._layer, self._created)
+
+        if self._old_end_time_code is not None:
+            self._stage.SetEndTimeCode(self._old_end_time_code)
+        self._touched = []
+        self._created = []
+        self._old_end_time_code = None
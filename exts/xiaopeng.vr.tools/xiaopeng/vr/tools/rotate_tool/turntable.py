@@ -0,0 +1,149 @@
+import numpy as np
+from pxr import Usd, Sdf, UsdGeom, Gf
+
+
+class TurntableDriver:
+    """
+    Spin any number of prims, each around one of its local axes at its own speed.
+
+    The rotateXYZ op of every prim is resolved once, and added in the session layer when
+    the prim does not have one. Axes, speeds and angles live in NumPy arrays that advance
+    with the elapsed time in one vectorized step, so the speed does not depend on the frame
+    rate. Each frame only sets the default values of attribute specs cached in the session
+    layer, all inside one Sdf.ChangeBlock, so the root layer is never dirtied.
+    """
+
+    def __init__(self, stage: Usd.Stage):
+        self.stage = stage
+        # 1 or -1, applied to every speed
+        self.direction = 1
+
+        self.prim_paths = []
+        self.axes = np.zeros(0, dtype=np.int64)
+        # degrees per second
+        self.speeds = np.zeros(0, dtype=np.float64)
+        self.angles = np.zeros(0, dtype=np.float64)
+        self._rotations = np.zeros((0, 3), dtype=np.float64)
+        self._value_types = []
+        self._attr_specs = []
+
+    def __len__(self):
+        return len(self.prim_paths)
+
+    def add(self, prim_path, axis: int = 1, speed: float = 30.0):
+        """add a prim to spin, returns False if it can not be spun"""
+        prim_path = Sdf.Path(str(prim_path))
+        index = self.index(prim_path)
+        if index >= 0:
+            self.set_axis(index, axis)
+            self.set_speed(index, speed)
+            return True
+
+        resolved = self._resolve(prim_path)
+        if resolved is None:
+            return False
+        attr_spec, value_type, rotation = resolved
+
+        self.prim_paths.append(prim_path)
+        self._attr_specs.append(attr_spec)
+        self._value_types.append(value_type)
+        self._rotations = np.vstack([self._rotations, [rotation]])
+        self.axes = np.append(self.axes, axis)
+        self.speeds = np.append(self.speeds, speed)
+        self.angles = np.append(self.angles, rotation[axis])
+        return True
+
+    def remove(self, index: int):
+        del self.prim_paths[index]
+        del self._attr_specs[index]
+        del self._value_types[index]
+        self._rotations = np.delete(self._rotations, index, axis=0)
+        self.axes = np.delete(self.axes, index)
+        self.speeds = np.delete(self.speeds, index)
+        self.angles = np.delete(self.angles, index)
+
+    def clear(self):
+        for index in reversed(range(len(self))):
+            self.remove(index)
+
+    def index(self, prim_path) -> int:
+        """index of the prim, -1 when it is not spun"""
+        prim_path = Sdf.Path(str(prim_path))
+        return self.prim_paths.index(prim_path) if prim_path in self.prim_paths else -1
+
+    def set_speed(self, index: int, speed: float):
+        self.speeds[index] = speed
+
+    def set_axis(self, index: int, axis: int):
+        # the current angle goes back to the rotation of the new axis
+        self._rotations[index, self.axes[index]] = self.angles[index]
+        self.axes[index] = axis
+        self.angles[index] = self._rotations[index, axis]
+
+    def update(self, dt: float):
+        if not self.prim_paths:
+            return
+
+        self.angles = (self.angles + self.direction * self.speeds * dt) % 360.0
+        rotations = self._rotations.copy()
+        rotations[np.arange(len(self.angles)), self.axes] = self.angles
+
+        with Sdf.ChangeBlock():
+            for attr_spec, value_type, rotation in zip(self._attr_specs, self._value_types, rotations.tolist()):
+                attr_spec.default = value_type(*rotation)
+
+    def get_bake_samples(self, start: float, end: float, time_codes_per_second: float):
+        """
+        Keyframes of a looping bake of every prim over [start, end] time codes.
+
+        The speed of every prim is rounded to a whole number of revolutions over the range
+        so the loop is seamless, a prim with no speed keeps its angle. Two keyframes are
+        enough since rotateXYZ values are interpolated linearly.
+
+        Returns:
+            [(attribute path, [(time code, value)])]
+        """
+        duration = (end - start) / time_codes_per_second
+        # at least one revolution for the prims that spin at all
+        revolutions = np.where(self.speeds == 0, 0, np.maximum(1, np.round(duration * np.abs(self.speeds) / 360.0)))
+        signs = np.where(self.direction * self.speeds < 0, -1.0, 1.0)
+
+        start_rotations = self._rotations.copy()
+        start_rotations[np.arange(len(self.angles)), self.axes] = self.angles
+        end_rotations = start_rotations.copy()
+        end_rotations[np.arange(len(self.angles)), self.axes] += signs * revolutions * 360.0
+
+        samples = []
+        for attr_spec, value_type, start_rotation, end_rotation in zip(
+                self._attr_specs, self._value_types, start_rotations.tolist(), end_rotations.tolist()):
+            samples.append((attr_spec.path, [(start, value_type(*start_rotation)), (end, value_type(*end_rotation))]))
+        return samples
+
+    def _resolve(self, prim_path: Sdf.Path):
+        prim = self.stage.GetPrimAtPath(prim_path)
+        if not prim or not prim.IsA(UsdGeom.Xformable):
+            print(f"{prim_path} is not a transformable prim")
+            return None
+
+        session_layer = self.stage.GetSessionLayer()
+        op = self._find_rotate_op(prim)
+        if op is None:
+            with Usd.EditContext(self.stage, session_layer):
+                op = UsdGeom.Xformable(prim).AddRotateXYZOp()
+
+        rotation = op.Get()
+        rotation = list(rotation) if rotation is not None else [0.0, 0.0, 0.0]
+        value_type = Gf.Vec3d if op.GetPrecision() == UsdGeom.XformOp.PrecisionDouble else Gf.Vec3f
+
+        attr_path = op.GetAttr().GetPath()
+        prim_spec = Sdf.CreatePrimInLayer(session_layer, prim_path)
+        attr_spec = session_layer.GetAttributeAtPath(attr_path)
+        if not attr_spec:
+            attr_spec = Sdf.AttributeSpec(prim_spec, attr_path.name, op.GetTypeName())
+        return attr_spec, value_type, rotation
+
+    def _find_rotate_op(self, prim):
+        for op in UsdGeom.Xformable(prim).GetOrderedXformOps():
+            if op.GetOpType() == UsdGeom.XformOp.TypeRotateXYZ and not op.IsInverseOp():
+                return op
+        return None
@@ -6,6 +6,9 @@ from pxr import Usd, Sdf, UsdGeom, UsdShade, Gf
 import os
 from omni.kit.widget.stage import StageIcons
 import omni.kit.commands as cmd
+import numpy as np
+
+from .turntable import TurntableDriver
 
 class RotateToolWindow(ui.Window):
     def __init__(self, title: str, delegate=None, **kwargs):
@@ -13,11 +16,13 @@ class RotateToolWindow(ui.Window):
 
         self.prim_path = ""
         self.current_selection = 1
-        self.current_speed = 0.5
+        # degrees per second
+        self.current_speed = 30.0
         self._start = False
-        self.count = 0
-        self.rotation = None
         self.direction = 0
+        self._driver = None
+        # the driver entry of the prim path field
+        self._field_prim_path = None
 
         self.subscription_handle = None
 
@@ -54,24 +59,80 @@ class RotateToolWindow(ui.Window):
                     ui.Label('Axis', width=50)
                     type_option = ui.ComboBox(self.current_selection, "X", "Y", "Z", width=100)
                     type_option.model.add_item_changed_fn(self.option_changed)
-                    ui.Label('Speed', width=50)
-                    slider = ui.FloatSlider(min=0.1, max=1)
+                    ui.Label('Speed (°/s)', width=70)
+                    slider = ui.FloatSlider(min=5, max=120)
                     slider.model.set_value(self.current_speed)
                     slider.model.add_value_changed_fn(self.speed_changed)
 
-                with ui.HStack():
+                with ui.HStack(spacing=5, height=0):
+                    ui.Button("Add", height=22, clicked_fn=self.add_prim_path)
+                    ui.Button("Add Selected", height=22, clicked_fn=self.add_selected)
+                    ui.Button("Clear", height=22, clicked_fn=self.clear_prims)
+
+                with ui.ScrollingFrame(height=120):
+                    self.prims_frame = ui.Frame(build_fn=self._build_prims)
+
+                with ui.HStack(height=40):
                     ui.Button("<<", height=40, clicked_fn=self.left_rotate)
                     ui.Button("Stop", height=40, clicked_fn=self.stop_rotate)
                     ui.Button(">>", height=40, clicked_fn=self.right_rotate)
-    
+                    ui.Button("Bake", height=40, clicked_fn=self.bake)
+
+    def _build_prims(self):
+        """one row per spinning prim, with its own axis and speed"""
+        driver = self.get_driver()
+        with ui.VStack(height=0, spacing=2):
+            for index, prim_path in enumerate(driver.prim_paths):
+                with ui.HStack(spacing=5, height=22):
+                    ui.Label(str(prim_path))
+                    axis_option = ui.ComboBox(int(driver.axes[index]), "X", "Y", "Z", width=50)
+                    axis_option.model.add_item_changed_fn(
+                        lambda model, item, index=index: driver.set_axis(index, model.get_item_value_model().as_int))
+                    speed_field = ui.FloatField(width=60)
+                    speed_field.model.set_value(float(driver.speeds[index]))
+                    speed_field.model.add_value_changed_fn(
+                        lambda model, index=index: driver.set_speed(index, model.as_float))
+                    ui.Button("X", width=22, clicked_fn=lambda index=index: self.remove_prim(index))
+
     def option_changed(self, model, item):
         self.current_selection = model.get_item_value_model().as_int
+        index = self._get_field_prim_index()
+        if index >= 0:
+            self._driver.set_axis(index, self.current_selection)
+            self.prims_frame.rebuild()
 
     def speed_changed(self, model: ui.SimpleFloatModel):
         self.current_speed = model.as_float
+        # the prim of the path field follows the slider live
+        index = self._get_field_prim_index()
+        if index >= 0:
+            self._driver.set_speed(index, self.current_speed)
+            self.prims_frame.rebuild()
 
     def prim_path_changed(self, model):
         self.prim_path = model.as_string
+        if self._start:
+            self.sync_field_prim()
+
+    def _get_field_prim_index(self):
+        if self._driver is None or self._field_prim_path is None:
+            return -1
+        return self._driver.index(self._field_prim_path)
+
+    def sync_field_prim(self):
+        """
+        the prim of the path field spins with the axis and speed of the fields, the previous one stops
+        """
+        driver = self.get_driver()
+        path = Sdf.Path(self.prim_path) if Sdf.Path.IsValidPathString(self.prim_path) else None
+        if self._field_prim_path is not None and self._field_prim_path != path:
+            index = driver.index(self._field_prim_path)
+            if index >= 0:
+                driver.remove(index)
+            self._field_prim_path = None
+        if path is not None and driver.add(path, self.current_selection, self.current_speed):
+            self._field_prim_path = path
+        self.prims_frame.rebuild()
     
     def set_prim_path(self):
         path = self.get_select_prim_path()
@@ -85,29 +146,36 @@ class RotateToolWindow(ui.Window):
         if paths:
             return str(paths[0])
         return None
+
+    def get_driver(self):
+        stage: Usd.Stage = omni.usd.get_context().get_stage()
+        if self._driver is None or self._driver.stage != stage:
+            self._driver = TurntableDriver(stage)
+        return self._driver
+
+    def add_prim_path(self):
+        if self.prim_path:
+            self.get_driver().add(self.prim_path, self.current_selection, self.current_speed)
+            self.prims_frame.rebuild()
+
+    def add_selected(self):
+        driver = self.get_driver()
+        for path in omni.usd.get_context().get_selection().get_selected_prim_paths():
+            driver.add(path, self.current_selection, self.current_speed)
+        self.prims_frame.rebuild()
+
+    def remove_prim(self, index):
+        self.get_driver().remove(index)
+        self.prims_frame.rebuild()
+
+    def clear_prims(self):
+        self.get_driver().clear()
+        self.prims_frame.rebuild()
     
-    
-    def on_update(self, p):
-        if self._start and self.prim_path != "":
-            stage: Usd.Stage = omni.usd.get_context().get_stage() 
-            prim = stage.GetPrimAtPath(self.prim_path)
-            if prim.IsValid():
-                if self.direction == 0:
-                    self.count += self.current_speed
-                else:
-                    self.count -= self.current_speed
-                # translation, rotation, scale = self.get_world_transform_xform(prim)
-                # rotation = prim.GetAttribute('xformOp:rotateXYZ').Get()
-                # print(rotation)
-                if self.current_selection == 0:
-                    new_rotation = Gf.Vec3d(self.count, self.rotation[1], self.rotation[2])
-                elif self.current_selection == 1:
-                    new_rotation = Gf.Vec3d(self.rotation[0], self.count, self.rotation[2])
-                else:
-                    new_rotation = Gf.Vec3d(self.rotation[0], self.rotation[1], self.count)
-
-                prim.GetAttribute("xformOp:rotateXYZ").Set(new_rotation, 0)
-                # # self.count = 0
+    def on_update(self, e):
+        if self._start and self._driver:
+            # advance by the elapsed time, not by frame
+            self._driver.update(e.payload["dt"])
 
     def left_rotate(self):
         self.direction = 0
@@ -119,21 +187,50 @@ class RotateToolWindow(ui.Window):
 
 
     def start_rotate(self):
-        stage: Usd.Stage = omni.usd.get_context().get_stage() 
-        prim = stage.GetPrimAtPath(self.prim_path)
-        if prim.IsValid(): 
-            self.rotation = prim.GetAttribute('xformOp:rotateXYZ').Get()
-            if self.count == 0:
-                self.count = self.rotation[self.current_selection]
-            if self.subscription_handle is None:
-                self.subscription_handle = omni.kit.app.get_app().get_update_event_stream().create_subscription_to_pop(self.on_update, name="UPDATE_SUB")
-            self._start = True
+        driver = self.get_driver()
+        # the prim of the path field spins too, like before
+        self.sync_field_prim()
+        if not len(driver):
+            return
+        driver.direction = 1 if self.direction == 0 else -1
+
+        if self.subscription_handle is None:
+            self.subscription_handle = omni.kit.app.get_app().get_update_event_stream().create_subscription_to_pop(self.on_update, name="UPDATE_SUB")
+        self._start = True
 
     def stop_rotate(self):
         self._start = False
         if self.subscription_handle is not None:
             self.subscription_handle = None
 
+    def bake(self):
+        """
+        Bake a looping revolution of every prim over the timeline into time samples of the edit target,
+        so playback needs no Python and the motion is saved with the USD.
+        """
+        driver = self.get_driver()
+        self.sync_field_prim()
+        if not len(driver):
+            return
+        self.stop_rotate()
+
+        stage: Usd.Stage = omni.usd.get_context().get_stage()
+        time_codes_per_second = stage.GetTimeCodesPerSecond()
+        start = stage.GetStartTimeCode()
+        end = stage.GetEndTimeCode()
+        end_time_code = None
+        if end <= start:
+            # no timeline yet, make it one revolution of the slowest prim long
+            slowest = max(1.0, float(np.min(np.abs(driver.speeds))))
+            end = end_time_code = start + 360.0 / slowest * time_codes_per_second
+
+        # one undoable write, the live session values included
+        cmd.execute('BakeRotationsCommand', samples=driver.get_bake_samples(start, end, time_codes_per_second),
+                    end_time_code=end_time_code)
+        driver.clear()
+        self._field_prim_path = None
+        self.prims_frame.rebuild()
+
     def get_world_transform_xform(self, prim: Usd.Prim):
         """
         Get the local transformation of a prim using Xformable.
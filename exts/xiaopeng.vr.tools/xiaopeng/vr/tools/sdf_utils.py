@@ -0,0 +1,220 @@
+from pxr import Sdf, UsdGeom, UsdShade, Gf, Vt
+
+
+def bind_material_spec(layer: Sdf.Layer, prim_path: Sdf.Path, material_path: Sdf.Path, has_api: bool):
+    """
+    author the material:binding relationship of the prim spec, returns what is needed to restore it
+    """
+    created_path = None
+    prim_spec = layer.GetPrimAtPath(prim_path)
+    if not prim_spec:
+        # remember the top-most spec created along with the prim for undo
+        created_path = prim_path
+        while not layer.GetPrimAtPath(created_path.GetParentPath()) and \
+                created_path.GetParentPath() != Sdf.Path.absoluteRootPath:
+            created_path = created_path.GetParentPath()
+        prim_spec = Sdf.CreatePrimInLayer(layer, prim_path)
+
+    old_api_schemas = prim_spec.GetInfo("apiSchemas") if prim_spec.HasInfo("apiSchemas") else None
+    if not has_api:
+        # a new list op, the old one is kept untouched for undo
+        api_schemas = Sdf.TokenListOp()
+        if old_api_schemas is not None and old_api_schemas.isExplicit:
+            api_schemas.explicitItems = list(old_api_schemas.explicitItems) + ["MaterialBindingAPI"]
+        else:
+            if old_api_schemas is not None:
+                api_schemas.appendedItems = list(old_api_schemas.appendedItems)
+                api_schemas.deletedItems = list(old_api_schemas.deletedItems)
+                api_schemas.orderedItems = list(old_api_schemas.orderedItems)
+                prepended = list(old_api_schemas.prependedItems)
+            else:
+                prepended = []
+            api_schemas.prependedItems = prepended + ["MaterialBindingAPI"]
+        prim_spec.SetInfo("apiSchemas", api_schemas)
+
+    rel_path = prim_path.AppendProperty(UsdShade.Tokens.materialBinding)
+    rel_spec = layer.GetRelationshipAtPath(rel_path)
+    old_targets = rel_spec.GetInfo("targetPaths") if rel_spec else None
+    if not rel_spec:
+        rel_spec = Sdf.RelationshipSpec(prim_spec, UsdShade.Tokens.materialBinding, False)
+    rel_spec.targetPathList.explicitItems = [material_path]
+
+    return prim_path, created_path, old_api_schemas, old_targets
+
+
+def restore_material_spec(layer: Sdf.Layer, previous):
+    prim_path, created_path, old_api_schemas, old_targets = previous
+
+    if created_path:
+        edit = Sdf.BatchNamespaceEdit()
+        edit.Add(created_path, Sdf.Path.emptyPath)
+        layer.Apply(edit)
+        return
+
+    prim_spec = layer.GetPrimAtPath(prim_path)
+    if not prim_spec:
+        return
+
+    if old_api_schemas is None:
+        prim_spec.ClearInfo("apiSchemas")
+    else:
+        prim_spec.SetInfo("apiSchemas", old_api_schemas)
+
+    rel_path = prim_path.AppendProperty(UsdShade.Tokens.materialBinding)
+    rel_spec = layer.GetRelationshipAtPath(rel_path)
+    if old_targets is None:
+        if rel_spec:
+            prim_spec.RemoveProperty(rel_spec)
+    elif rel_spec:
+        rel_spec.SetInfo("targetPaths", old_targets)
+
+
+def unique_name(name: str, taken: set) -> str:
+    candidate = name
+    index = 1
+    while candidate in taken:
+        candidate = f"{name}_{index}"
+        index += 1
+    taken.add(candidate)
+    return candidate
+
+
+def create_prim_spec(layer: Sdf.Layer, path: Sdf.Path, type_name: str, specifier=Sdf.SpecifierDef):
+    prim_spec = Sdf.CreatePrimInLayer(layer, path)
+    prim_spec.specifier = specifier
+    prim_spec.typeName = type_name
+    return prim_spec
+
+
+def author_attribute(prim_spec: Sdf.PrimSpec, name: str, type_name, value, variability=Sdf.VariabilityVarying,
+                      metadata=None):
+    attr_spec = Sdf.AttributeSpec(prim_spec, name, type_name, variability)
+    for key, meta_value in (metadata or {}).items():
+        attr_spec.SetInfo(key, meta_value)
+    attr_spec.default = value
+    return attr_spec
+
+
+def author_binding(prim_spec: Sdf.PrimSpec, material_path: Sdf.Path):
+    api_schemas = Sdf.TokenListOp()
+    api_schemas.prependedItems = ["MaterialBindingAPI"]
+    prim_spec.SetInfo("apiSchemas", api_schemas)
+    rel_spec = Sdf.RelationshipSpec(prim_spec, UsdShade.Tokens.materialBinding, False)
+    rel_spec.targetPathList.explicitItems = [material_path]
+
+
+def author_transform(prim_spec: Sdf.PrimSpec, matrix: Gf.Matrix4d):
+    author_attribute(prim_spec, "xformOp:transform", Sdf.ValueTypeNames.Matrix4d, matrix)
+    author_attribute(prim_spec, UsdGeom.Tokens.xformOpOrder, Sdf.ValueTypeNames.TokenArray,
+                      Vt.TokenArray(["xformOp:transform"]), Sdf.VariabilityUniform)
+
+
+def deactivate_prim_spec(layer: Sdf.Layer, path: Sdf.Path):
+    """deactivate the prim in the layer, returns what is needed to restore it"""
+    created_path = None
+    prim_spec = layer.GetPrimAtPath(path)
+    if not prim_spec:
+        created_path = path
+        while not layer.GetPrimAtPath(created_path.GetParentPath()) and \
+                created_path.GetParentPath() != Sdf.Path.absoluteRootPath:
+            created_path = created_path.GetParentPath()
+        prim_spec = Sdf.CreatePrimInLayer(layer, path)
+
+    old_active = prim_spec.GetInfo("active") if prim_spec.HasInfo("active") else None
+    prim_spec.active = False
+    return path, created_path, old_active
+
+
+def restore_active_spec(layer: Sdf.Layer, previous):
+    path, created_path, old_active = previous
+    if created_path:
+        if layer.GetPrimAtPath(created_path):
+            edit = Sdf.BatchNamespaceEdit()
+            edit.Add(created_path, Sdf.Path.emptyPath)
+            layer.Apply(edit)
+        return
+
+    prim_spec = layer.GetPrimAtPath(path)
+    if not prim_spec:
+        return
+    if old_active is None:
+        prim_spec.ClearInfo("active")
+    else:
+        prim_spec.active = old_active
+
+
+def remove_specs(layer: Sdf.Layer, paths):
+    edit = Sdf.BatchNamespaceEdit()
+    for path in paths:
+        if layer.GetPrimAtPath(path):
+            edit.Add(path, Sdf.Path.emptyPath)
+    layer.Apply(edit)
+
+
+def get_or_create_prim_spec(layer: Sdf.Layer, path: Sdf.Path):
+    """returns the prim spec and the top-most spec created along with it, None when it existed"""
+    prim_spec = layer.GetPrimAtPath(path)
+    if prim_spec:
+        return prim_spec, None
+
+    created_path = path
+    while not layer.GetPrimAtPath(created_path.GetParentPath()) and \
+            created_path.GetParentPath() != Sdf.Path.absoluteRootPath:
+        created_path = created_path.GetParentPath()
+    return Sdf.CreatePrimInLayer(layer, path), created_path
+
+
+def retarget_specs(layer: Sdf.Layer, move):
+    """
+    Point the relationship targets and attribute connections of the layer at the new paths
+    of the prims they point into.
+
+    Args:
+        move: returns the new path of a target path, the path itself when it did not move
+
+    Returns:
+        [(property path, info key, old value)], see restore_retargeted_specs
+    """
+    property_paths = []
+
+    def visit(path):
+        if path.IsPrimPropertyPath():
+            property_paths.append(path)
+
+    layer.Traverse(Sdf.Path.absoluteRootPath, visit)
+
+    retargeted = []
+    for path in property_paths:
+        spec = layer.GetPropertyAtPath(path)
+        if isinstance(spec, Sdf.RelationshipSpec):
+            key, list_op = "targetPaths", spec.targetPathList
+        else:
+            key, list_op = "connectionPaths", spec.connectionPathList
+
+        targets = list_op.GetAddedOrExplicitItems()
+        moved = [(target, move(target)) for target in targets]
+        moved = [(target, new_target) for target, new_target in moved if new_target != target]
+        if not moved:
+            continue
+        retargeted.append((path, key, spec.GetInfo(key)))
+        for target, new_target in moved:
+            list_op.ReplaceItemEdits(target, new_target)
+    return retargeted
+
+
+def restore_retargeted_specs(layer: Sdf.Layer, retargeted):
+    for path, key, old_value in reversed(retargeted):
+        spec = layer.GetPropertyAtPath(path)
+        if not spec:
+            continue
+        # the path list fields are read-only for SetInfo, they are written through their list editor
+        list_op = spec.targetPathList if key == "targetPaths" else spec.connectionPathList
+        if old_value.isExplicit:
+            list_op.ClearEditsAndMakeExplicit()
+            list_op.explicitItems = list(old_value.explicitItems)
+        else:
+            list_op.ClearEdits()
+            list_op.prependedItems = list(old_value.prependedItems)
+            list_op.appendedItems = list(old_value.appendedItems)
+            list_op.deletedItems = list(old_value.deletedItems)
+            list_op.orderedItems = list(old_value.orderedItems)
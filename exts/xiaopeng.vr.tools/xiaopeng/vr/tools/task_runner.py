@@ -0,0 +1,79 @@
+import asyncio
+import time
+import omni.kit.app
+import omni.ui as ui
+
+
+class TaskRunner:
+    """
+    Run a long operation in time-sliced chunks on the Kit update loop.
+
+    The operation is a generator doing a small unit of work between two yields, it yields
+    its progress as a float between 0 and 1 and may return a result. The runner advances it
+    until the per-frame budget is spent, then waits for the next update, so the viewport
+    keeps drawing while the operation runs.
+    """
+
+    def __init__(self, progressbar: ui.ProgressBar = None, frame_budget_ms: float = 8.0):
+        self.progressbar = progressbar
+        self.frame_budget_ms = frame_budget_ms
+        self._task = None
+        self._cancelled = False
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def run(self, work, on_done=None):
+        """
+        start the generator, on_done(result) is called when it finished without being cancelled
+        """
+        if self.running:
+            print("Another operation is still running")
+            return None
+
+        self._cancelled = False
+        self._task = asyncio.ensure_future(self._run(work, on_done))
+        return self._task
+
+    def cancel(self):
+        self._cancelled = True
+        if self.running:
+            self._task.cancel()
+
+    def _set_progress(self, progress):
+        if self.progressbar and progress is not None:
+            self.progressbar.model.set_value(progress)
+
+    async def _run(self, work, on_done):
+        app = omni.kit.app.get_app()
+        budget = self.frame_budget_ms / 1000.0
+        result = None
+        self._set_progress(0)
+        try:
+            frame_start = time.perf_counter()
+            while True:
+                if self._cancelled:
+                    return
+                try:
+                    progress = next(work)
+                except StopIteration as e:
+                    result = e.value
+                    break
+
+                if time.perf_counter() - frame_start >= budget:
+                    self._set_progress(progress)
+                    await app.next_update_async()
+                    frame_start = time.perf_counter()
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            print(e)
+            return
+        finally:
+            # runs the finally blocks of the generator when it did not finish
+            work.close()
+            self._set_progress(0)
+
+        if on_done:
+            on_done(result)
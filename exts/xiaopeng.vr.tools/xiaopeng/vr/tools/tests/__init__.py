@@ -1 +1,11 @@
-from .test_hello_world import *
\ No newline at end of file
+from .test_hello_world import *
+from .test_matcher import *
+from .test_match_cache import *
+from .test_batch_rename import *
+from .test_conversion_cache import *
+from .test_mesh_utils import *
+from .test_lod import *
+from .test_cleanup import *
+from .test_textures import *
+from .test_binding_index import *
+from .test_hierarchy import *
@@ -0,0 +1,143 @@
+import re
+import omni.kit.test
+from pxr import Usd, Sdf, UsdShade
+
+from xiaopeng.vr.tools.batch_rename.engine import plan_renames, get_renamed_path, iter_pattern_renames
+from xiaopeng.vr.tools.batch_rename.commands import BatchRenamePrimsCommand
+
+
+class TestBatchRename(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self.stage = Usd.Stage.CreateInMemory()
+        for path in ("/World/Car/Body", "/World/Car/Wheel", "/World/Car/Wheel/Rim", "/World/Lamp"):
+            self.stage.DefinePrim(path, "Xform")
+
+    async def test_deepest_renames_first(self):
+        ordered, errors = plan_renames(self.stage, {
+            "/World": "Root",
+            "/World/Car/Wheel/Rim": "Rim_01",
+            "/World/Car": "Vehicle",
+        })
+        self.assertEqual(errors, [])
+        self.assertEqual(ordered, [
+            (Sdf.Path("/World/Car/Wheel/Rim"), "Rim_01"),
+            (Sdf.Path("/World/Car"), "Vehicle"),
+            (Sdf.Path("/World"), "Root"),
+        ])
+
+    async def test_unchanged_name_is_skipped(self):
+        ordered, errors = plan_renames(self.stage, {"/World/Lamp": "Lamp"})
+        self.assertEqual(ordered, [])
+        self.assertEqual(errors, [])
+
+    async def test_invalid_and_missing(self):
+        ordered, errors = plan_renames(self.stage, {
+            "/World/Lamp": "1Lamp",
+            "/World/Car/Body": "Body Panel",
+            "/World/Missing": "Found",
+            "/World/Car/Wheel": "Wheel_FL",
+        })
+        self.assertEqual(ordered, [(Sdf.Path("/World/Car/Wheel"), "Wheel_FL")])
+        self.assertEqual(len(errors), 3)
+        self.assertTrue(any(error.startswith("/World/Lamp:") for error in errors))
+        self.assertTrue(any(error.startswith("/World/Car/Body:") for error in errors))
+        self.assertTrue(any(error.startswith("/World/Missing:") for error in errors))
+
+    async def test_sibling_collisions(self):
+        # collides with an existing sibling that is not renamed
+        ordered, errors = plan_renames(self.stage, {"/World/Car/Body": "Wheel"})
+        self.assertEqual(ordered, [])
+        self.assertEqual(len(errors), 1)
+
+        # two renames to the same name, only the first one is kept
+        ordered, errors = plan_renames(self.stage, {"/World/Car/Body": "Part", "/World/Car/Wheel": "Part"})
+        self.assertEqual(len(ordered), 1)
+        self.assertEqual(len(errors), 1)
+
+        # same name under different parents is fine
+        ordered, errors = plan_renames(self.stage, {"/World/Car/Body": "Part", "/World/Lamp": "Part"})
+        self.assertEqual(len(ordered), 2)
+        self.assertEqual(errors, [])
+
+    def _rename(self, renames):
+        ordered, errors = plan_renames(self.stage, renames)
+        self.assertEqual(errors, [])
+        command = BatchRenamePrimsCommand(ordered, stage=self.stage)
+        command.do()
+        return command
+
+    def _children(self, path):
+        return self.stage.GetPrimAtPath(path).GetAllChildrenNames()
+
+    async def test_sibling_swap(self):
+        command = self._rename({"/World/Car/Body": "Wheel", "/World/Car/Wheel": "Body"})
+        self.assertEqual(self._children("/World/Car"), ["Wheel", "Body"])
+        # the children follow their parent
+        self.assertTrue(self.stage.GetPrimAtPath("/World/Car/Body/Rim"))
+
+        command.undo()
+        self.assertEqual(self._children("/World/Car"), ["Body", "Wheel"])
+        self.assertTrue(self.stage.GetPrimAtPath("/World/Car/Wheel/Rim"))
+
+    async def test_rename_chain(self):
+        command = self._rename({"/World/Car/Body": "Wheel", "/World/Car/Wheel": "Tire", "/World/Car": "Vehicle"})
+        self.assertEqual(self._children("/World/Vehicle"), ["Wheel", "Tire"])
+        self.assertTrue(self.stage.GetPrimAtPath("/World/Vehicle/Tire/Rim"))
+
+        command.undo()
+        self.assertEqual(self._children("/World"), ["Car", "Lamp"])
+        self.assertEqual(self._children("/World/Car"), ["Body", "Wheel"])
+
+    async def test_nested_renames(self):
+        command = self._rename({"/World": "Root", "/World/Car/Wheel/Rim": "Rim_01", "/World/Car": "Vehicle"})
+        self.assertTrue(self.stage.GetPrimAtPath("/Root/Vehicle/Wheel/Rim_01"))
+        command.undo()
+        self.assertTrue(self.stage.GetPrimAtPath("/World/Car/Wheel/Rim"))
+
+    async def test_bindings_follow_the_material(self):
+        material = UsdShade.Material.Define(self.stage, "/World/Looks/Red")
+        shader = UsdShade.Shader.Define(self.stage, "/World/Looks/Red/Shader")
+        material.CreateSurfaceOutput().ConnectToSource(shader.ConnectableAPI(), "surface")
+        body = self.stage.GetPrimAtPath("/World/Car/Body")
+        UsdShade.MaterialBindingAPI.Apply(body).Bind(material)
+
+        command = self._rename({"/World/Looks/Red": "Paint"})
+        bound = UsdShade.MaterialBindingAPI(body).ComputeBoundMaterial()[0]
+        self.assertEqual(bound.GetPath(), Sdf.Path("/World/Looks/Paint"))
+        paint = UsdShade.Material(self.stage.GetPrimAtPath("/World/Looks/Paint"))
+        source = paint.GetSurfaceOutput().GetConnectedSource()
+        self.assertEqual(source[0].GetPath(), Sdf.Path("/World/Looks/Paint/Shader"))
+
+        command.undo()
+        bound = UsdShade.MaterialBindingAPI(body).ComputeBoundMaterial()[0]
+        self.assertEqual(bound.GetPath(), Sdf.Path("/World/Looks/Red"))
+        rel = body.GetRelationship(UsdShade.Tokens.materialBinding)
+        self.assertEqual(rel.GetTargets(), [Sdf.Path("/World/Looks/Red")])
+
+    async def test_failed_layer_renames_nothing(self):
+        sublayer = Sdf.Layer.CreateAnonymous()
+        Sdf.CreatePrimInLayer(sublayer, "/World/Lamp").specifier = Sdf.SpecifierOver
+        self.stage.GetRootLayer().subLayerPaths.append(sublayer.identifier)
+        sublayer.SetPermissionToEdit(False)
+
+        self._rename({"/World/Lamp": "Light"})
+        self.assertEqual(sorted(self._children("/World")), ["Car", "Lamp"])
+        self.assertTrue(self.stage.GetRootLayer().GetPrimAtPath("/World/Lamp"))
+
+    async def test_renamed_path(self):
+        renames = {Sdf.Path("/World/Car"): "Vehicle", Sdf.Path("/World/Car/Wheel/Rim"): "Rim_01"}
+        self.assertEqual(get_renamed_path("/World/Car/Wheel/Rim", renames), Sdf.Path("/World/Vehicle/Wheel/Rim_01"))
+        self.assertEqual(get_renamed_path("/World/Lamp", renames), Sdf.Path("/World/Lamp"))
+
+    async def test_pattern_renames(self):
+        renames = list(iter_pattern_renames(self.stage, "/World/Car", "W*", "{name}_{index}"))
+        self.assertEqual(renames, [(Sdf.Path("/World/Car/Wheel"), "Wheel_0")])
+
+        renames = list(iter_pattern_renames(self.stage, "/World", r"^(B)ody$", r"\1ox", use_regex=True))
+        self.assertEqual(renames, [(Sdf.Path("/World/Car/Body"), "Box")])
+
+    async def test_bad_regex_raises_on_call(self):
+        with self.assertRaises(re.error):
+            iter_pattern_renames(self.stage, "/World", "(", "x", use_regex=True)
+        with self.assertRaises(re.error):
+            iter_pattern_renames(self.stage, "/World", "a", r"\2", use_regex=True)
@@ -0,0 +1,52 @@
+import omni.kit.test
+from pxr import Usd, Sdf, UsdGeom, UsdShade
+
+from xiaopeng.vr.tools.binding_index import BindingIndex
+
+
+class TestBindingIndex(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self.stage = Usd.Stage.CreateInMemory()
+        self.red = UsdShade.Material.Define(self.stage, "/World/Looks/Red")
+        self.blue = UsdShade.Material.Define(self.stage, "/World/Looks/Blue")
+        self.body = UsdGeom.Mesh.Define(self.stage, "/World/Car/Body").GetPrim()
+        self.wheel = UsdGeom.Mesh.Define(self.stage, "/World/Car/Wheel").GetPrim()
+        self.index = BindingIndex(self.stage)
+
+    async def tearDown(self):
+        self.index.destroy()
+
+    async def test_direct_bindings(self):
+        UsdShade.MaterialBindingAPI.Apply(self.body).Bind(self.red)
+        self.assertEqual(self.index.get_material_path("/World/Car/Body"), Sdf.Path("/World/Looks/Red"))
+        self.assertIsNone(self.index.get_material_path("/World/Car/Wheel"))
+
+        # inherited by the children once the parent is bound
+        UsdShade.MaterialBindingAPI.Apply(self.stage.GetPrimAtPath("/World/Car")).Bind(self.blue)
+        self.assertEqual(self.index.get_material_path("/World/Car/Wheel"), Sdf.Path("/World/Looks/Blue"))
+        self.assertEqual(self.index.get_bound_prim_paths("/World/Looks/Red"), [Sdf.Path("/World/Car/Body")])
+
+        self.stage.RemovePrim("/World/Car/Body")
+        self.assertEqual(self.index.get_bound_prim_paths("/World/Looks/Red"), [])
+
+    async def test_collection_bindings(self):
+        # the collection lives on another branch than the prims it binds
+        world = self.stage.GetPrimAtPath("/World")
+        collection = Usd.CollectionAPI.Apply(world, "red")
+        collection.CreateIncludesRel().AddTarget("/World/Car/Body")
+        UsdShade.MaterialBindingAPI.Apply(world).Bind(collection, self.red)
+        self.assertEqual(self.index.get_material_path("/World/Car/Body"), Sdf.Path("/World/Looks/Red"))
+        self.assertIsNone(self.index.get_material_path("/World/Car/Wheel"))
+
+        collection.GetIncludesRel().AddTarget("/World/Car/Wheel")
+        self.assertEqual(self.index.get_material_path("/World/Car/Wheel"), Sdf.Path("/World/Looks/Red"))
+
+        collection.GetIncludesRel().RemoveTarget("/World/Car/Body")
+        self.assertIsNone(self.index.get_material_path("/World/Car/Body"))
+
+    async def test_iter_flush(self):
+        UsdShade.MaterialBindingAPI.Apply(self.wheel).Bind(self.blue)
+        for _ in self.index.iter_flush():
+            pass
+        self.assertEqual(self.index.get_bound_prims_index(),
+                         {Sdf.Path("/World/Looks/Blue"): [Sdf.Path("/World/Car/Wheel")]})
@@ -0,0 +1,106 @@
+import numpy as np
+import omni.kit.test
+from pxr import Usd, Sdf, UsdGeom, Vt
+
+from xiaopeng.vr.tools.cleanup.engine import clean_mesh, DEFAULT_TOLERANCE
+
+
+class TestCleanup(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self.stage = Usd.Stage.CreateInMemory()
+
+    def _make_mesh(self, points, counts, indices, path="/Mesh"):
+        mesh = UsdGeom.Mesh.Define(self.stage, path)
+        mesh.CreatePointsAttr(Vt.Vec3fArray([tuple(point) for point in points]))
+        mesh.CreateFaceVertexCountsAttr(counts)
+        mesh.CreateFaceVertexIndicesAttr(indices)
+        return mesh
+
+    def _make_split_quads(self, offset=0.0):
+        # two quads sharing an edge, the shared vertices are duplicated (and moved by offset)
+        points = [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0),
+                  (1 + offset, 0, 0), (2, 0, 0), (2, 1, 0), (1 + offset, 1, 0)]
+        return self._make_mesh(points, [4, 4], [0, 1, 2, 3, 4, 5, 6, 7])
+
+    def _values(self, cleanup, name):
+        return cleanup.values[name][1]
+
+    async def test_weld(self):
+        cleanup = clean_mesh(self._make_split_quads(), DEFAULT_TOLERANCE, None)
+        points = self._values(cleanup, "points")
+        indices = self._values(cleanup, "faceVertexIndices")
+        self.assertEqual(len(points), 6)
+        self.assertEqual(self._values(cleanup, "faceVertexCounts").tolist(), [4, 4])
+        # the second quad uses the corners of the first one
+        self.assertEqual(points[indices[4]].tolist(), points[indices[1]].tolist())
+        self.assertEqual(points[indices[7]].tolist(), points[indices[2]].tolist())
+        self.assertGreater(cleanup.bytes_saved, 0)
+
+    async def test_points_outside_the_tolerance_are_kept(self):
+        self.assertIsNone(clean_mesh(self._make_split_quads(offset=1e-3), DEFAULT_TOLERANCE, None))
+        cleanup = clean_mesh(self._make_split_quads(offset=1e-3), 1e-2, None)
+        self.assertEqual(len(self._values(cleanup, "points")), 6)
+
+    async def test_zero_and_negative_tolerance(self):
+        # clamped to the minimum tolerance: exact duplicates are welded, nothing else is touched
+        for tolerance in (0, -1):
+            cleanup = clean_mesh(self._make_split_quads(), tolerance, None)
+            self.assertEqual(len(self._values(cleanup, "points")), 6)
+            self.assertEqual(self._values(cleanup, "faceVertexCounts").tolist(), [4, 4])
+
+            self.assertIsNone(clean_mesh(self._make_split_quads(offset=1e-6), tolerance, None))
+
+    async def test_degenerate_faces_are_dropped(self):
+        points = [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0), (0, 0, 0), (2, 0, 0)]
+        # a quad, a triangle with two welded corners, a zero area triangle and a 2 vertex face
+        mesh = self._make_mesh(points, [4, 3, 3, 2], [0, 1, 2, 3, 0, 4, 1, 0, 1, 5, 2, 3])
+        cleanup = clean_mesh(mesh, DEFAULT_TOLERANCE, None)
+        self.assertEqual(self._values(cleanup, "faceVertexCounts").tolist(), [4])
+        self.assertEqual(len(self._values(cleanup, "points")), 4)
+
+    async def test_repeated_corner_is_removed(self):
+        points = [(0, 0, 0), (1, 0, 0), (1, 1, 0), (1, 1, 0), (0, 1, 0)]
+        cleanup = clean_mesh(self._make_mesh(points, [5], [0, 1, 2, 3, 4]), DEFAULT_TOLERANCE, None)
+        self.assertEqual(self._values(cleanup, "faceVertexCounts").tolist(), [4])
+        self.assertEqual(len(self._values(cleanup, "faceVertexIndices")), 4)
+
+    async def test_subsets_follow_the_faces(self):
+        points = [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0), (2, 0, 0)]
+        mesh = self._make_mesh(points, [3, 4, 3], [0, 1, 1, 0, 1, 2, 3, 1, 4, 2])
+        UsdGeom.Subset.CreateGeomSubset(mesh, "front", UsdGeom.Tokens.face, [1])
+        UsdGeom.Subset.CreateGeomSubset(mesh, "back", UsdGeom.Tokens.face, [0, 2])
+        cleanup = clean_mesh(mesh, DEFAULT_TOLERANCE, None)
+        self.assertEqual(self._values(cleanup, "faceVertexCounts").tolist(), [4, 3])
+        self.assertEqual(cleanup.subset_indices[Sdf.Path("/Mesh/front")][1].tolist(), [0])
+        self.assertEqual(cleanup.subset_indices[Sdf.Path("/Mesh/back")][1].tolist(), [1])
+
+    async def test_point_subsets_are_not_supported(self):
+        mesh = self._make_split_quads()
+        UsdGeom.Subset.CreateGeomSubset(mesh, "pins", UsdGeom.Tokens.point, [0, 1])
+        self.assertIsNone(clean_mesh(mesh, DEFAULT_TOLERANCE, None))
+
+    async def test_vertex_primvars_block_the_weld(self):
+        mesh = self._make_split_quads()
+        primvar = UsdGeom.PrimvarsAPI(mesh).CreatePrimvar("st", Sdf.ValueTypeNames.TexCoord2fArray,
+                                                          UsdGeom.Tokens.vertex)
+        # the second quad has its own texture space
+        primvar.Set([(0, 0), (1, 0), (1, 1), (0, 1), (0, 0), (1, 0), (1, 1), (0, 1)])
+        self.assertIsNone(clean_mesh(mesh, DEFAULT_TOLERANCE, None))
+
+    async def test_unused_primvars(self):
+        mesh = self._make_split_quads(offset=0.5)
+        primvars = UsdGeom.PrimvarsAPI(mesh)
+        primvars.CreatePrimvar("st", Sdf.ValueTypeNames.Float2Array, UsdGeom.Tokens.faceVarying).Set(
+            np.zeros((8, 2), dtype=np.float32))
+        primvars.CreatePrimvar("extra", Sdf.ValueTypeNames.FloatArray, UsdGeom.Tokens.uniform).Set([1, 2])
+
+        cleanup = clean_mesh(mesh, DEFAULT_TOLERANCE, {"st"})
+        self.assertEqual(cleanup.removed, ["primvars:extra"])
+
+        # an opaque shader keeps the 2d primvars, with or without the texCoord role
+        cleanup = clean_mesh(mesh, DEFAULT_TOLERANCE, {None})
+        self.assertEqual(cleanup.removed, ["primvars:extra"])
+
+        # all read
+        self.assertIsNone(clean_mesh(mesh, DEFAULT_TOLERANCE, {"st", "extra"}))
+        self.assertIsNone(clean_mesh(mesh, DEFAULT_TOLERANCE, None))
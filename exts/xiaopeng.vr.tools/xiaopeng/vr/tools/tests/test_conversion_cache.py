@@ -0,0 +1,85 @@
+import os
+import tempfile
+import omni.kit.test
+
+from xiaopeng.vr.tools.usd_converter.conversion_cache import ConversionCache, hash_file, hash_settings
+
+
+class TestConversionCache(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.source_path = self._write("car.fbx", b"source")
+        self.output_path = self._write("car.usd", b"output")
+        self.settings_hash = hash_settings({"merge_all_meshes": True})
+        self.cache = ConversionCache(os.path.join(self._tmp_dir.name, "manifest.json"))
+
+    async def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _write(self, name, content):
+        path = os.path.join(self._tmp_dir.name, name)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def _touch(self, path):
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+    def _record(self, extra_paths=()):
+        source_hash = self.cache.get_source_hash(self.source_path, self.output_path)
+        self.cache.record(self.source_path, self.output_path, source_hash, self.settings_hash, extra_paths)
+        return source_hash
+
+    async def test_unknown_output_is_not_fresh(self):
+        self.assertFalse(self.cache.is_fresh(self.output_path, hash_file(self.source_path), self.settings_hash))
+
+    async def test_fresh_after_record(self):
+        source_hash = self._record()
+        self.assertEqual(source_hash, hash_file(self.source_path))
+        self.assertTrue(self.cache.is_fresh(self.output_path, source_hash, self.settings_hash))
+
+    async def test_changed_source_or_settings(self):
+        source_hash = self._record()
+        self.assertFalse(self.cache.is_fresh(self.output_path, hash_file(self.output_path), self.settings_hash))
+        self.assertFalse(self.cache.is_fresh(self.output_path, source_hash, hash_settings({"merge_all_meshes": False})))
+
+    async def test_source_hash_is_reused_until_the_source_changes(self):
+        self._record()
+        self._write("car.fbx", b"source v2")
+        self.assertEqual(self.cache.get_source_hash(self.source_path, self.output_path), hash_file(self.source_path))
+
+    async def test_output_modified_or_deleted(self):
+        source_hash = self._record()
+        self._touch(self.output_path)
+        self.assertFalse(self.cache.is_fresh(self.output_path, source_hash, self.settings_hash))
+
+        source_hash = self._record()
+        os.remove(self.output_path)
+        self.assertFalse(self.cache.is_fresh(self.output_path, source_hash, self.settings_hash))
+
+    async def test_save_and_load(self):
+        source_hash = self._record()
+        self.cache.save()
+
+        loaded = ConversionCache(self.cache.path)
+        self.assertTrue(loaded.is_fresh(self.output_path, source_hash, self.settings_hash))
+
+    async def test_payload_modified_or_deleted(self):
+        payload_path = self._write("car_payload.usdc", b"payload")
+        source_hash = self._record([payload_path])
+        self.assertTrue(self.cache.is_fresh(self.output_path, source_hash, self.settings_hash))
+
+        self._touch(payload_path)
+        self.assertFalse(self.cache.is_fresh(self.output_path, source_hash, self.settings_hash))
+
+        source_hash = self._record([payload_path])
+        os.remove(payload_path)
+        self.assertFalse(self.cache.is_fresh(self.output_path, source_hash, self.settings_hash))
+
+    async def test_entry_without_payloads_is_not_fresh(self):
+        source_hash = self._record()
+        # manifest written before the payload files were recorded
+        for entry in self.cache._entries.values():
+            del entry["extra_stats"]
+        self.assertFalse(self.cache.is_fresh(self.output_path, source_hash, self.settings_hash))
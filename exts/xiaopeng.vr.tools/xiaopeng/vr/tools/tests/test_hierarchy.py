@@ -0,0 +1,77 @@
+import omni.kit.test
+from pxr import Usd, Sdf, Gf, UsdGeom, UsdShade
+
+from xiaopeng.vr.tools.hierarchy.engine import iter_find_chains
+from xiaopeng.vr.tools.hierarchy.commands import CollapseXformsCommand
+
+
+def _run(generator):
+    try:
+        while True:
+            next(generator)
+    except StopIteration as stop:
+        return stop.value
+
+
+class TestCollapseHierarchy(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self.stage = Usd.Stage.CreateInMemory()
+        self.stage.DefinePrim("/World", "Xform")
+        self.stage.DefinePrim("/World/First", "Xform")
+        UsdGeom.Xform.Define(self.stage, "/World/A").AddTranslateOp().Set(Gf.Vec3d(1, 0, 0))
+        UsdGeom.Xform.Define(self.stage, "/World/A/B").AddTranslateOp().Set(Gf.Vec3d(0, 2, 0))
+        UsdGeom.Mesh.Define(self.stage, "/World/A/B/Bolt")
+        self.stage.DefinePrim("/World/Last", "Xform")
+        material = UsdShade.Material.Define(self.stage, "/World/Looks/Steel")
+        UsdShade.MaterialBindingAPI.Apply(self.stage.GetPrimAtPath("/World/A/B/Bolt")).Bind(material)
+
+    def _collapse(self):
+        chains = _run(iter_find_chains(self.stage, "/World"))
+        command = CollapseXformsCommand(chains, stage=self.stage)
+        command.do()
+        return chains, command
+
+    async def test_survivor_keeps_its_name(self):
+        chains, command = self._collapse()
+        self.assertEqual([chain.path for chain in chains], [Sdf.Path("/World/Bolt")])
+
+        self.assertFalse(self.stage.GetPrimAtPath("/World/A"))
+        bolt = self.stage.GetPrimAtPath("/World/Bolt")
+        self.assertEqual(bolt.GetTypeName(), "Mesh")
+        self.assertEqual(self.stage.GetPrimAtPath("/World").GetAllChildrenNames(),
+                         ["First", "Bolt", "Last", "Looks"])
+        matrix = UsdGeom.Xformable(bolt).GetLocalTransformation()
+        self.assertEqual(matrix.ExtractTranslation(), Gf.Vec3d(1, 2, 0))
+        binding = UsdShade.MaterialBindingAPI(bolt).GetDirectBinding()
+        self.assertEqual(binding.GetMaterialPath(), Sdf.Path("/World/Looks/Steel"))
+
+        command.undo()
+        self.assertEqual(self.stage.GetPrimAtPath("/World").GetAllChildrenNames(),
+                         ["First", "A", "Last", "Looks"])
+        self.assertTrue(self.stage.GetPrimAtPath("/World/A/B/Bolt"))
+        self.assertFalse(self.stage.GetPrimAtPath("/World/Bolt"))
+
+    async def test_name_collision(self):
+        self.stage.DefinePrim("/World/Bolt", "Mesh")
+        chains, command = self._collapse()
+        self.assertEqual([chain.path for chain in chains], [Sdf.Path("/World/Bolt_1")])
+        self.assertEqual(self.stage.GetPrimAtPath("/World/Bolt_1").GetTypeName(), "Mesh")
+
+        command.undo()
+        self.assertEqual(self.stage.GetPrimAtPath("/World").GetAllChildrenNames(),
+                         ["First", "A", "Last", "Looks", "Bolt"])
+
+    async def test_sibling_takes_the_name_of_a_top(self):
+        # the second chain ends in a prim named after the top of the first one
+        UsdGeom.Xform.Define(self.stage, "/World/C")
+        UsdGeom.Mesh.Define(self.stage, "/World/C/A")
+        chains, command = self._collapse()
+        self.assertEqual(sorted(chain.path for chain in chains), [Sdf.Path("/World/A"), Sdf.Path("/World/Bolt")])
+        self.assertEqual(self.stage.GetPrimAtPath("/World").GetAllChildrenNames(),
+                         ["First", "Bolt", "Last", "Looks", "A"])
+
+        command.undo()
+        self.assertEqual(self.stage.GetPrimAtPath("/World").GetAllChildrenNames(),
+                         ["First", "A", "Last", "Looks", "C"])
+        self.assertTrue(self.stage.GetPrimAtPath("/World/A/B/Bolt"))
+        self.assertTrue(self.stage.GetPrimAtPath("/World/C/A"))
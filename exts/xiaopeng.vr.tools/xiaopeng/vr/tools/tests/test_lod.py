@@ -0,0 +1,112 @@
+import os
+import tempfile
+import numpy as np
+import omni.kit.test
+from pxr import Usd, UsdGeom, Vt
+
+from xiaopeng.vr.tools.mesh_utils import triangulate
+from xiaopeng.vr.tools.usd_converter.lod import LOD_VARIANT_SET, generate_lods, simplify
+
+
+def make_sphere_quads(rings=32, segments=64):
+    """uv sphere of radius 1, (points, faceVertexCounts, faceVertexIndices)"""
+    theta = np.linspace(0, np.pi, rings + 1)
+    phi = np.linspace(0, 2 * np.pi, segments, endpoint=False)
+    theta, phi = np.meshgrid(theta, phi, indexing="ij")
+    points = np.stack([np.sin(theta) * np.cos(phi), np.sin(theta) * np.sin(phi), np.cos(theta)], axis=-1)
+    points = points.reshape(-1, 3)
+
+    ring, segment = np.meshgrid(np.arange(rings), np.arange(segments), indexing="ij")
+    a = ring * segments + segment
+    b = ring * segments + (segment + 1) % segments
+    quads = np.stack([a, a + segments, b + segments, b], axis=-1).reshape(-1)
+    return points, np.full(rings * segments, 4), quads
+
+
+def make_sphere():
+    """uv sphere of radius 1, quads triangulated"""
+    points, counts, quads = make_sphere_quads()
+    triangles, _, _ = triangulate(counts, quads)
+    # the pole quads collapse into slivers, they are still valid input
+    return points, triangles
+
+
+class TestLod(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self.points, self.triangles = make_sphere()
+
+    async def test_simplify_respects_target(self):
+        for target in (2000, 500, 100):
+            mesh = simplify(self.points, self.triangles, target)
+            self.assertIsNotNone(mesh)
+            self.assertGreater(len(mesh.triangles), 0)
+            self.assertLessEqual(len(mesh.triangles), target)
+            self.assertEqual(len(mesh.kept), len(mesh.triangles))
+            self.assertEqual(len(mesh.vertices), len(mesh.points))
+            self.assertLess(mesh.triangles.max(), len(mesh.points))
+
+    async def test_simplified_vertices_stay_on_the_surface(self):
+        mesh = simplify(self.points, self.triangles, 500)
+        radii = np.linalg.norm(mesh.points, axis=1)
+        self.assertTrue(np.all(np.abs(radii - 1) < 0.1))
+        # every simplified vertex comes from a nearby source vertex
+        distances = np.linalg.norm(mesh.points - self.points[mesh.vertices], axis=1)
+        self.assertTrue(np.all(distances < 0.5))
+
+    async def test_kept_triangles_are_unique(self):
+        mesh = simplify(self.points, self.triangles, 500)
+        self.assertEqual(len(np.unique(mesh.kept)), len(mesh.kept))
+        self.assertEqual(len(np.unique(np.sort(mesh.triangles, axis=1), axis=0)), len(mesh.triangles))
+
+    async def test_impossible_target(self):
+        self.assertIsNone(simplify(self.points, self.triangles, 0))
+
+    def _write_sphere(self, path, subsets):
+        """sphere mesh layer with the GeomSubsets {name: (element type, indices)}"""
+        stage = Usd.Stage.CreateNew(path)
+        points, counts, quads = make_sphere_quads()
+        mesh = UsdGeom.Mesh.Define(stage, "/Sphere")
+        mesh.CreatePointsAttr(Vt.Vec3fArray.FromNumpy(points.astype(np.float32)))
+        mesh.CreateFaceVertexCountsAttr(Vt.IntArray.FromNumpy(counts.astype(np.int32)))
+        mesh.CreateFaceVertexIndicesAttr(Vt.IntArray.FromNumpy(quads.astype(np.int32)))
+        for name, (element_type, indices) in subsets.items():
+            UsdGeom.Subset.CreateGeomSubset(mesh, name, element_type, Vt.IntArray.FromNumpy(indices.astype(np.int32)),
+                                            "materialBind", UsdGeom.Tokens.partition)
+        stage.Save()
+
+    async def test_subsets_follow_the_lods(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "sphere.usda")
+            # the upper and the lower half of the quads
+            half = len(make_sphere_quads()[1]) // 2
+            upper, lower = np.arange(half), np.arange(half, 2 * half)
+            self._write_sphere(path, {"upper": (UsdGeom.Tokens.face, upper), "lower": (UsdGeom.Tokens.face, lower)})
+
+            report = generate_lods(path, ratios=(0.25,))
+            self.assertIn("lod1", report["meshes"]["/Sphere"])
+
+            stage = Usd.Stage.Open(path)
+            mesh = UsdGeom.Mesh(stage.GetPrimAtPath("/Sphere"))
+            variant_set = mesh.GetPrim().GetVariantSets().GetVariantSet(LOD_VARIANT_SET)
+            self.assertEqual(variant_set.GetVariantSelection(), "lod0")
+            upper_subset = UsdGeom.Subset(stage.GetPrimAtPath("/Sphere/upper"))
+            self.assertEqual(list(upper_subset.GetIndicesAttr().Get()), upper.tolist())
+
+            variant_set.SetVariantSelection("lod1")
+            face_count = len(mesh.GetFaceVertexCountsAttr().Get())
+            self.assertEqual(face_count, report["meshes"]["/Sphere"]["lod1"])
+            subsets = UsdGeom.Subset.GetGeomSubsets(mesh, UsdGeom.Tokens.face, "materialBind")
+            self.assertTrue(UsdGeom.Subset.ValidateSubsets(subsets, face_count, UsdGeom.Tokens.partition)[0])
+
+            # the triangles of the upper subset are in the upper half of the sphere
+            lod_points = np.asarray(mesh.GetPointsAttr().Get())
+            lod_triangles = np.asarray(mesh.GetFaceVertexIndicesAttr().Get()).reshape(-1, 3)
+            centers = lod_points[lod_triangles[np.asarray(upper_subset.GetIndicesAttr().Get())]].mean(axis=1)
+            self.assertGreater(len(centers), 0)
+            self.assertTrue(np.all(centers[:, 2] > -0.1))
+
+    async def test_point_subsets_get_no_lods(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "sphere.usda")
+            self._write_sphere(path, {"pins": (UsdGeom.Tokens.point, np.arange(3))})
+            self.assertEqual(generate_lods(path, ratios=(0.25,))["meshes"], {})
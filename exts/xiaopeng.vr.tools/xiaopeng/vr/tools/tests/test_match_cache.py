@@ -0,0 +1,73 @@
+import os
+import tempfile
+import omni.kit.test
+
+from xiaopeng.vr.tools.material_match.match_cache import MatchCache
+
+
+class TestMatchCache(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp_dir.name, "match_cache.json")
+
+    async def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    async def test_fingerprint(self):
+        fingerprint = MatchCache.fingerprint(["Chrome", "Glass", "Rubber"])
+        # order and duplicates do not matter
+        self.assertEqual(fingerprint, MatchCache.fingerprint(["Rubber", "Glass", "Chrome", "Glass"]))
+        self.assertNotEqual(fingerprint, MatchCache.fingerprint(["Chrome", "Glass"]))
+        self.assertNotEqual(fingerprint, MatchCache.fingerprint(["Chrome", "Glass", "Rubber2"]))
+        # the separator keeps the names apart
+        self.assertNotEqual(MatchCache.fingerprint(["ab", "c"]), MatchCache.fingerprint(["a", "bc"]))
+
+    async def test_entries_are_keyed_by_fingerprint(self):
+        cache = MatchCache(self.path)
+        cache.put("lib1", "Material_01", "Chrome")
+        self.assertEqual(cache.get("lib1", "Material_01"), ("Chrome", False))
+        self.assertIsNone(cache.get("lib2", "Material_01"))
+        self.assertIsNone(cache.get("lib1", "Material_02"))
+
+    async def test_least_recently_used_is_evicted(self):
+        cache = MatchCache(self.path, max_entries=2)
+        cache.put("lib", "a", "A")
+        cache.put("lib", "b", "B")
+        # reading a makes b the least recently used
+        cache.get("lib", "a")
+        cache.put("lib", "c", "C")
+        self.assertIsNone(cache.get("lib", "b"))
+        self.assertEqual(cache.get("lib", "a"), ("A", False))
+        self.assertEqual(cache.get("lib", "c"), ("C", False))
+
+    async def test_manual_match_is_kept(self):
+        cache = MatchCache(self.path)
+        cache.put("lib", "a", "Chrome", user=True)
+        cache.put("lib", "a", "Glass")
+        self.assertEqual(cache.get("lib", "a"), ("Chrome", True))
+        cache.put("lib", "a", "Rubber", user=True)
+        self.assertEqual(cache.get("lib", "a"), ("Rubber", True))
+
+    async def test_save_and_load(self):
+        cache = MatchCache(self.path, max_entries=3)
+        for name in ("a", "b", "c"):
+            cache.put("lib", name, name.upper())
+        cache.get("lib", "a")
+        cache.save()
+
+        loaded = MatchCache(self.path, max_entries=3)
+        self.assertEqual(loaded.get("lib", "b"), ("B", False))
+        # the recency order survives the round trip, c is now the least recently used
+        loaded.put("lib", "d", "D")
+        self.assertIsNone(loaded.get("lib", "c"))
+        self.assertEqual(loaded.get("lib", "a"), ("A", False))
+
+    async def test_loading_keeps_the_most_recent_entries(self):
+        cache = MatchCache(self.path, max_entries=3)
+        for name in ("a", "b", "c"):
+            cache.put("lib", name, name.upper())
+        cache.save()
+
+        loaded = MatchCache(self.path, max_entries=2)
+        self.assertIsNone(loaded.get("lib", "a"))
+        self.assertEqual(loaded.get("lib", "c"), ("C", False))
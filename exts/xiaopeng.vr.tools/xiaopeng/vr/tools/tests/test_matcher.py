@@ -0,0 +1,54 @@
+import omni.kit.test
+
+# the matcher needs fuzzywuzzy, like Material Match does
+import omni.kit.pipapi
+omni.kit.pipapi.install("fuzzywuzzy", module="fuzzywuzzy")
+
+from fuzzywuzzy import fuzz
+from xiaopeng.vr.tools.material_match.matcher import FuzzyMatcher
+
+
+LABELS = ["Car_Paint_Red", "Car Paint Blue", "Car_Paint_Red_Metallic", "Chrome", "Chrome_Dark", "Rubber_Tire",
+          "Glass_Clear", "Glass Tinted", "Leather Seat Black", "Plastic_Matte", "Alu brushed", "123", "", "Paint"]
+NAMES = ["car_paint_red_01", "CarPaintRed", "CHROME_trim", "chrome", "tire rubber", "glass", "Glass_Tinted_02",
+         "seat_leather_blk", "matte plastic", "brushed aluminium", "", "xyz", "123", "Paint", "paint red",
+         "Material__25", "red", "Ümlaut_Glass", "Car_Paint_Blue"]
+
+
+def plain_match(texts, labels, threshold):
+    """the nested fuzz.token_set_ratio loop the matcher replaces"""
+    categorized_dict = {}
+    for item in texts:
+        max_ratio = 0
+        matched_label = "None"
+        for label in labels:
+            ratio = fuzz.token_set_ratio(item, label)
+            if ratio > max_ratio:
+                max_ratio = ratio
+                matched_label = label if max_ratio >= threshold else "None"
+        categorized_dict[item] = matched_label
+    return categorized_dict
+
+
+class TestFuzzyMatcher(omni.kit.test.AsyncTestCase):
+    async def test_same_matches_as_token_set_ratio(self):
+        for threshold in (0, 40, 60, 90, 100):
+            matcher = FuzzyMatcher(LABELS, threshold)
+            self.assertEqual(matcher.match(NAMES), plain_match(NAMES, LABELS, threshold), f"threshold {threshold}")
+
+    async def test_ties_keep_the_first_label(self):
+        labels = ["Chrome", "chrome", "CHROME"]
+        self.assertEqual(FuzzyMatcher(labels).match(["Chrome_01"]), plain_match(["Chrome_01"], labels, 60))
+        self.assertEqual(FuzzyMatcher(labels).match(["Chrome_01"])["Chrome_01"], "Chrome")
+
+    async def test_iter_match_reports_progress(self):
+        matcher = FuzzyMatcher(LABELS)
+        categorized_dict = {}
+        progress = list(matcher.iter_match(NAMES, categorized_dict))
+        self.assertEqual(len(progress), len(NAMES))
+        self.assertEqual(progress[-1], 1.0)
+        self.assertEqual(categorized_dict, plain_match(NAMES, LABELS, 60))
+
+    async def test_no_labels(self):
+        self.assertEqual(FuzzyMatcher([]).match(["Chrome"]), {"Chrome": "None"})
+        self.assertEqual(FuzzyMatcher(LABELS).match([]), {})
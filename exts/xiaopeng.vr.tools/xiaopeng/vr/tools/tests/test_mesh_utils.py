@@ -0,0 +1,71 @@
+import numpy as np
+import omni.kit.test
+
+from xiaopeng.vr.tools.mesh_utils import triangulate, triangle_areas, reverse_faces, to_face_varying
+
+
+class TestMeshUtils(omni.kit.test.AsyncTestCase):
+    async def test_triangulate(self):
+        # a triangle, a quad and a pentagon
+        counts = [3, 4, 5]
+        indices = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11]
+        triangles, corners, faces = triangulate(counts, indices)
+        self.assertEqual(triangles.tolist(), [
+            [0, 1, 2],
+            [3, 4, 5], [3, 5, 6],
+            [7, 8, 9], [7, 9, 10], [7, 10, 11],
+        ])
+        self.assertEqual(faces.tolist(), [0, 1, 1, 2, 2, 2])
+        self.assertEqual(corners.tolist(), triangles.tolist())
+
+    async def test_triangulate_corners(self):
+        # corners index faceVertexIndices, not the vertices
+        triangles, corners, faces = triangulate([4], [7, 5, 3, 1])
+        self.assertEqual(triangles.tolist(), [[7, 5, 3], [7, 3, 1]])
+        self.assertEqual(corners.tolist(), [[0, 1, 2], [0, 2, 3]])
+
+    async def test_triangulate_degenerate_faces(self):
+        triangles, corners, faces = triangulate([2, 3, 0, 1, 4], [0, 1, 2, 3, 4, 5, 6, 7, 8, 9])
+        self.assertEqual(triangles.tolist(), [[2, 3, 4], [6, 7, 8], [6, 8, 9]])
+        self.assertEqual(corners.tolist(), [[2, 3, 4], [6, 7, 8], [6, 8, 9]])
+        self.assertEqual(faces.tolist(), [1, 4, 4])
+
+    async def test_triangulate_empty(self):
+        triangles, corners, faces = triangulate([], [])
+        self.assertEqual(triangles.shape, (0, 3))
+        self.assertEqual(len(faces), 0)
+
+    async def test_triangle_areas(self):
+        points = np.array([[0, 0, 0], [2, 0, 0], [0, 2, 0], [2, 2, 0]], dtype=np.float64)
+        areas = triangle_areas(points, np.array([[0, 1, 2], [1, 3, 2], [0, 0, 1]]))
+        self.assertTrue(np.allclose(areas, [2, 2, 0]))
+
+    async def test_reverse_faces(self):
+        counts = [3, 4]
+        indices = np.array([0, 1, 2, 3, 4, 5, 6])
+        order = reverse_faces(counts)
+        self.assertEqual(indices[order].tolist(), [2, 1, 0, 6, 5, 4, 3])
+        # reversing twice gives the original winding
+        self.assertEqual(indices[order][order].tolist(), indices.tolist())
+        self.assertEqual(len(reverse_faces([])), 0)
+
+    async def test_to_face_varying(self):
+        counts = [3, 4]
+        indices = [0, 1, 2, 2, 1, 3, 4]
+        vertex = np.array([[0.0, 0.0], [1.0, 0.0], [0.0, 1.0], [1.0, 1.0], [2.0, 2.0]])
+        self.assertEqual(to_face_varying(vertex, "vertex", counts, indices).tolist(), vertex[indices].tolist())
+        self.assertEqual(to_face_varying(vertex, "varying", counts, indices).tolist(), vertex[indices].tolist())
+
+        face_varying = np.arange(7)
+        self.assertIs(to_face_varying(face_varying, "faceVarying", counts, indices), face_varying)
+        self.assertEqual(to_face_varying([5, 6], "uniform", counts, indices).tolist(), [5, 5, 5, 6, 6, 6, 6])
+        self.assertEqual(to_face_varying([[1, 2]], "constant", counts, indices).tolist(), [[1, 2]] * 7)
+
+    async def test_to_face_varying_mismatch(self):
+        counts = [3, 4]
+        indices = [0, 1, 2, 2, 1, 3, 4]
+        self.assertIsNone(to_face_varying(np.zeros(4), "vertex", counts, indices))
+        self.assertIsNone(to_face_varying(np.zeros(6), "faceVarying", counts, indices))
+        self.assertIsNone(to_face_varying(np.zeros(3), "uniform", counts, indices))
+        self.assertIsNone(to_face_varying(np.zeros(0), "constant", counts, indices))
+        self.assertIsNone(to_face_varying(np.zeros(7), "unknown", counts, indices))
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import tempfile
+import omni.kit.test
+
+import omni.kit.pipapi
+omni.kit.pipapi.install("Pillow", module="PIL")
+
+from PIL import Image
+
+from xiaopeng.vr.tools.textures.engine import Texture, TextureOptimizer, plan_budget, MIN_SIZE, OPTIMIZED_DIR
+from xiaopeng.vr.tools.usd_converter.conversion_cache import ConversionCache
+
+
+def make_texture(path, width, height=None):
+    texture = Texture(path)
+    texture.width = width
+    texture.height = height or width
+    return texture
+
+
+class TestTextures(omni.kit.test.AsyncTestCase):
+    async def test_max_size_clamp(self):
+        textures = [make_texture("a.png", 4096), make_texture("b.png", 1024, 512)]
+        total = plan_budget(textures, 2048, 1 << 40)
+        self.assertEqual([texture.target_size for texture in textures], [2048, 1024])
+        self.assertEqual(total, textures[0].get_memory(2048) + textures[1].get_memory())
+        self.assertTrue(textures[0].needs_resize)
+        self.assertFalse(textures[1].needs_resize)
+
+    async def test_fits_the_budget(self):
+        textures = [make_texture("a.png", 4096), make_texture("b.png", 2048), make_texture("c.png", 512)]
+        budget = 50 << 20
+        total = plan_budget(textures, 4096, budget)
+        self.assertLessEqual(total, budget)
+        self.assertEqual(total, sum(texture.get_memory(texture.target_size) for texture in textures))
+        # only the largest texture is halved
+        self.assertEqual([texture.target_size for texture in textures], [2048, 2048, 512])
+
+    async def test_min_size_floor(self):
+        textures = [make_texture("a.png", 1024), make_texture("b.png", 200)]
+        total = plan_budget(textures, 4096, 0)
+        self.assertEqual([texture.target_size for texture in textures], [MIN_SIZE, 200])
+        self.assertGreater(total, 0)
+
+    async def test_output_path(self):
+        texture = make_texture(os.path.join("textures", "wheel.png"), 2048)
+        texture.target_size = 1024
+        self.assertEqual(texture.get_output_path(), os.path.join("textures", OPTIMIZED_DIR, "wheel_png_1024.png"))
+
+    async def test_output_paths_are_unique(self):
+        paths = set()
+        for name in ("wheel.png", "wheel.tga", "wheel.bmp", "wheel.jpg", "wheel.jpeg"):
+            texture = make_texture(os.path.join("textures", name), 1024)
+            texture.target_size = 512
+            paths.add(texture.get_output_path())
+        self.assertEqual(len(paths), 5)
+
+    async def test_recompress(self):
+        texture = make_texture("wheel.TGA", 512)
+        texture.target_size = 512
+        self.assertTrue(texture.needs_recompress)
+        self.assertTrue(texture.needs_optimize)
+        self.assertTrue(texture.get_output_path().endswith("wheel_tga_512.png"))
+
+        texture = make_texture("wheel.jpg", 512)
+        texture.target_size = 512
+        self.assertFalse(texture.needs_optimize)
+
+
+class TestTextureOptimizer(omni.kit.test.AsyncTestCase):
+    async def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.paths = []
+        for i in range(8):
+            path = os.path.join(self._tmp_dir.name, f"texture_{i}.png")
+            Image.new("RGB", (512, 512), (i * 30, 0, 0)).save(path)
+            self.paths.append(path)
+        cache = ConversionCache(os.path.join(self._tmp_dir.name, "manifest.json"))
+        self.optimizer = TextureOptimizer(workers=2, cache=cache)
+
+    async def tearDown(self):
+        self.optimizer.destroy()
+        self._tmp_dir.cleanup()
+
+    async def test_pool_is_kept_between_runs(self):
+        textures = await self.optimizer.measure([Texture(path) for path in self.paths])
+        self.assertEqual([texture.width for texture in textures], [512] * len(self.paths))
+        executor = self.optimizer._executor
+        self.assertIsNotNone(executor)
+
+        plan_budget(textures, MIN_SIZE, 1 << 40)
+        results = await self.optimizer.optimize(textures)
+        self.assertTrue(all(result.success for result in results))
+        self.assertIs(self.optimizer._executor, executor)
+
+    async def test_cancel_shuts_the_pool_down(self):
+        textures = await self.optimizer.measure([Texture(path) for path in self.paths])
+        plan_budget(textures, MIN_SIZE, 1 << 40)
+
+        task = asyncio.ensure_future(self.optimizer.optimize(textures))
+        await asyncio.sleep(0)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertIsNone(self.optimizer._executor)
+
+        # the next run gets a new pool
+        results = await self.optimizer.optimize(textures)
+        self.assertEqual(len(results), len(textures))
+        self.assertTrue(all(result.success for result in results))
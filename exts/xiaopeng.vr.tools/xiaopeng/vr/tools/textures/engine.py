@@ -0,0 +1,296 @@
+import asyncio
+import heapq
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+import carb.tokens
+from PIL import Image
+from pxr import Usd, Sdf, UsdShade
+
+from ..usd_converter.conversion_cache import ConversionCache, hash_settings
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tga", ".bmp", ".tif", ".tiff")
+# formats without compression are written as png
+RECOMPRESSED_EXTENSIONS = {".tga": ".png", ".bmp": ".png"}
+OPTIMIZED_DIR = "_optimized"
+MIN_SIZE = 256
+DEFAULT_MAX_SIZE = 2048
+DEFAULT_BUDGET_MB = 1024
+DEFAULT_QUALITY = 90
+
+
+class Texture:
+    def __init__(self, path: str):
+        # resolved file path
+        self.path = path
+        # shader inputs using it
+        self.input_paths: List[Sdf.Path] = []
+        self.file_size = 0
+        self.width = 0
+        self.height = 0
+        # longest side once optimized
+        self.target_size = 0
+
+    @property
+    def size(self) -> int:
+        return max(self.width, self.height)
+
+    @property
+    def needs_resize(self) -> bool:
+        return 0 < self.target_size < self.size
+
+    @property
+    def needs_recompress(self) -> bool:
+        return os.path.splitext(self.path)[1].lower() in RECOMPRESSED_EXTENSIONS
+
+    @property
+    def needs_optimize(self) -> bool:
+        """resized to fit the budget or rewritten in a compressed format"""
+        return self.target_size > 0 and (self.needs_resize or self.needs_recompress)
+
+    def get_memory(self, size: int = None) -> int:
+        """estimated GPU memory as uncompressed RGBA8 with mipmaps, at `size` pixels along the longest side"""
+        if not self.size:
+            return 0
+        scale = min(1.0, (size or self.size) / self.size)
+        return int(self.width * scale * self.height * scale * 4 * 4 / 3)
+
+    def get_output_path(self) -> str:
+        folder, file_name = os.path.split(self.path)
+        stem, ext = os.path.splitext(file_name)
+        # the source extension stays in the name, wheel.tga and wheel.png both become png files
+        output_ext = RECOMPRESSED_EXTENSIONS.get(ext.lower(), ext)
+        return os.path.join(folder, OPTIMIZED_DIR, f"{stem}_{ext[1:].lower()}_{self.target_size}{output_ext}")
+
+
+class TextureResult:
+    def __init__(self, texture: Texture, success: bool, error: str = "", skipped: bool = False):
+        self.texture = texture
+        self.output_path = texture.get_output_path()
+        self.success = success
+        self.error = error
+        # the output was already up to date
+        self.skipped = skipped
+
+    def __repr__(self):
+        if self.skipped:
+            return f"{self.texture.path}: up to date"
+        if self.success:
+            return f"{self.texture.path} -> {self.output_path}"
+        return f"{self.texture.path}: {self.error}"
+
+
+def iter_collect_textures(stage: Usd.Stage, looks_path):
+    """
+    generator for the task runner, returns the image files used by the asset inputs of the
+    shaders under looks_path, the textures already optimized left out
+    """
+    looks = stage.GetPrimAtPath(str(looks_path))
+    if not looks:
+        return []
+
+    textures = {}
+    for i, prim in enumerate(Usd.PrimRange(looks)):
+        if i % 200 == 0:
+            yield None
+        if not prim.IsA(UsdShade.Shader):
+            continue
+        for shader_input in UsdShade.Shader(prim).GetInputs():
+            if shader_input.GetTypeName() != Sdf.ValueTypeNames.Asset or shader_input.HasConnectedSource():
+                continue
+            value = shader_input.Get()
+            path = value.resolvedPath if value else ""
+            if not path or os.path.splitext(path)[1].lower() not in IMAGE_EXTENSIONS:
+                continue
+            if os.path.basename(os.path.dirname(path)) == OPTIMIZED_DIR:
+                continue
+            path = os.path.normpath(path)
+            texture = textures.get(path)
+            if texture is None:
+                texture = textures[path] = Texture(path)
+            texture.input_paths.append(shader_input.GetAttr().GetPath())
+    return list(textures.values())
+
+
+def measure_texture(texture: Texture):
+    """file size and resolution, only the image header is read"""
+    texture.file_size = os.path.getsize(texture.path)
+    with Image.open(texture.path) as image:
+        texture.width, texture.height = image.size
+
+
+def plan_budget(textures: List[Texture], max_size: int, budget: int) -> int:
+    """
+    Set the target size of every texture.
+
+    The textures are first clamped to max_size, then the one using the most memory is
+    halved until the total fits the budget in bytes or nothing can go under MIN_SIZE.
+
+    Returns:
+        the estimated memory of the textures once optimized
+    """
+    heap = []
+    total = 0
+    for i, texture in enumerate(textures):
+        texture.target_size = min(texture.size, max_size)
+        memory = texture.get_memory(texture.target_size)
+        total += memory
+        heap.append((-memory, i))
+    heapq.heapify(heap)
+
+    while total > budget and heap:
+        memory, i = heapq.heappop(heap)
+        texture = textures[i]
+        size = texture.target_size // 2
+        if size < MIN_SIZE:
+            continue
+        new_memory = texture.get_memory(size)
+        total -= -memory - new_memory
+        texture.target_size = size
+        heapq.heappush(heap, (-new_memory, i))
+    return total
+
+
+def resize_texture(source_path: str, output_path: str, size: int, quality: int = DEFAULT_QUALITY):
+    """write the image with `size` pixels along its longest side, through a temporary file"""
+    with Image.open(source_path) as image:
+        width, height = image.size
+        scale = size / max(width, height)
+        if scale < 1:
+            image = image.resize((max(1, round(width * scale)), max(1, round(height * scale))), Image.LANCZOS)
+        else:
+            image.load()
+
+    stem, ext = os.path.splitext(output_path)
+    if ext.lower() in (".jpg", ".jpeg"):
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        options = {"quality": quality, "optimize": True}
+    elif ext.lower() == ".png":
+        options = {"optimize": True}
+    else:
+        options = {}
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    tmp_path = stem + ".writing" + ext
+    image.save(tmp_path, **options)
+    os.replace(tmp_path, output_path)
+
+
+def get_asset_path(file_path: str, layer: Sdf.Layer) -> str:
+    """asset path of the file as authored in the layer, relative to it when possible"""
+    file_path = os.path.abspath(file_path)
+    if not layer.anonymous and layer.realPath:
+        try:
+            relative = os.path.relpath(file_path, os.path.dirname(layer.realPath))
+            return "./" + relative.replace(os.sep, "/")
+        except ValueError:
+            # on another drive
+            pass
+    return file_path.replace(os.sep, "/")
+
+
+class TextureOptimizer:
+    """
+    Measure and downscale textures in a thread pool.
+
+    The pool lives as long as the optimizer, the coroutines only await its futures so the
+    main thread never waits for a thread. A cancelled run shuts the pool down without
+    waiting and drops the textures not started yet, the next run gets a new pool.
+
+    A texture to resize or recompress is written to the _optimized folder next to it, named
+    after its target size.
+    The manifest of the previous runs keeps the content hash of every source and the
+    settings it was written with, an output whose source and settings did not change is
+    not written again.
+
+    Args:
+        workers: threads of the pool
+        quality: JPEG quality of the written textures
+        cache: manifest of the previous runs, the texture one in the Kit data folder when None
+        on_progress: called with (progress, finished count, failed count)
+    """
+
+    MANIFEST_PATH = "${data}/xiaopeng.vr.tools/texture_manifest.json"
+
+    def __init__(self, workers: int = None, quality: int = DEFAULT_QUALITY, cache: ConversionCache = None,
+                 on_progress: Callable[[float, int, int], None] = None):
+        self.workers = workers or os.cpu_count() or 4
+        self.quality = quality
+        self.cache = cache or ConversionCache(carb.tokens.get_tokens_interface().resolve(self.MANIFEST_PATH))
+        self.on_progress = on_progress
+        # kept between the runs, shut down without waiting when a run is cancelled
+        self._executor = None
+
+    def destroy(self):
+        self._shutdown()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers)
+        return self._executor
+
+    def _shutdown(self):
+        # the textures already being written are finished by their threads, the queued ones are dropped
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def measure(self, textures: List[Texture]) -> List[Texture]:
+        """the textures that could be read"""
+        loop = asyncio.get_event_loop()
+        executor = self._get_executor()
+        futures = [loop.run_in_executor(executor, measure_texture, texture) for texture in textures]
+        try:
+            results = await asyncio.gather(*futures, return_exceptions=True)
+        except asyncio.CancelledError:
+            self._shutdown()
+            raise
+
+        measured = []
+        for texture, result in zip(textures, results):
+            if isinstance(result, Exception):
+                print(f"{texture.path}: {result}")
+            else:
+                measured.append(texture)
+        return measured
+
+    async def optimize(self, textures: List[Texture]) -> List[TextureResult]:
+        textures = [texture for texture in textures if texture.needs_optimize]
+        results = []
+
+        loop = asyncio.get_event_loop()
+        executor = self._get_executor()
+
+        async def optimize_texture(texture: Texture):
+            try:
+                result = await self._optimize(loop, executor, texture)
+            except Exception as e:
+                result = TextureResult(texture, False, str(e))
+                print(result)
+            results.append(result)
+            if self.on_progress:
+                failed = sum(1 for result in results if not result.success)
+                self.on_progress(len(results) / len(textures), len(results), failed)
+
+        try:
+            await asyncio.gather(*[optimize_texture(texture) for texture in textures])
+        except asyncio.CancelledError:
+            self._shutdown()
+            raise
+        finally:
+            self.cache.save()
+        return results
+
+    async def _optimize(self, loop, executor, texture: Texture) -> TextureResult:
+        output_path = texture.get_output_path()
+        settings_hash = hash_settings({"size": texture.target_size, "quality": self.quality})
+        source_hash = await loop.run_in_executor(executor, self.cache.get_source_hash, texture.path, output_path)
+        if self.cache.is_fresh(output_path, source_hash, settings_hash):
+            return TextureResult(texture, True, skipped=True)
+
+        await loop.run_in_executor(executor, resize_texture, texture.path, output_path, texture.target_size,
+                                   self.quality)
+        self.cache.record(texture.path, output_path, source_hash, settings_hash)
+        return TextureResult(texture, True)
@@ -0,0 +1,187 @@
+import omni.ext
+import omni.ui as ui
+import omni.usd
+import omni.kit.commands
+import omni.kit.undo
+from pxr import Sdf
+import os
+import asyncio
+
+# this module is only imported when Texture Budget is first opened, skip pip when it is importable
+import omni.kit.pipapi
+omni.kit.pipapi.install("Pillow", module="PIL")
+
+from ..task_runner import TaskRunner
+from .engine import (DEFAULT_BUDGET_MB, DEFAULT_MAX_SIZE, DEFAULT_QUALITY, TextureOptimizer, get_asset_path,
+                     iter_collect_textures, plan_budget)
+
+
+class TextureBudgetWindow(ui.Window):
+    def __init__(self, title: str, delegate=None, **kwargs):
+        super().__init__(title, **kwargs)
+
+        self._textures = []
+        self._planned_memory = 0
+        self._optimizer = None
+        self._task = None
+        self._task_runner = TaskRunner()
+
+        self.frame.set_build_fn(self._build_fn)
+
+    def destroy(self):
+        self.cancel()
+        if self._optimizer is not None:
+            self._optimizer.destroy()
+            self._optimizer = None
+        # It will destroy all the children
+        super().destroy()
+
+    def on_shutdown(self):
+        self._win = None
+
+    def show(self):
+        self.visible = True
+        self.focus()
+
+    def hide(self):
+        self.visible = False
+
+    def _build_fn(self):
+
+        with self.frame:
+            with ui.VStack(spacing=5):
+                with ui.HStack(spacing=5, height=0):
+                    # <default prim>/Looks when empty
+                    ui.Label('Looks', width=70)
+                    self.looks_path_field = ui.StringField(height=22)
+                    ui.Button('Set', width=50, height=22, clicked_fn=self.set_looks_path)
+                with ui.HStack(spacing=5, height=0):
+                    ui.Label('Max Size', width=70)
+                    self.max_size_field = ui.IntField(width=60, height=22)
+                    self.max_size_field.model.set_value(DEFAULT_MAX_SIZE)
+                    # estimated GPU memory of all the textures
+                    ui.Label('Budget MB', width=70)
+                    self.budget_field = ui.IntField(width=60, height=22)
+                    self.budget_field.model.set_value(DEFAULT_BUDGET_MB)
+                    ui.Label('Quality', width=50)
+                    self.quality_field = ui.IntField(width=40, height=22)
+                    self.quality_field.model.set_value(DEFAULT_QUALITY)
+
+                ui.Button("Scan", height=30, clicked_fn=self.scan)
+
+                with ui.ScrollingFrame():
+                    self.textures_frame = ui.Frame(build_fn=self._build_textures)
+
+                self.status_label = ui.Label("", height=20)
+                self.optimize_btn = ui.Button("Optimize", height=40, clicked_fn=self.optimize)
+
+                with ui.HStack(spacing=5, height=0):
+                    self.progressbar = ui.ProgressBar(height=20)
+                    ui.Button("Cancel", width=60, height=20, clicked_fn=self.cancel)
+                self._task_runner.progressbar = self.progressbar
+
+    def _build_textures(self):
+        with ui.VStack(height=0, spacing=2):
+            for texture in sorted(self._textures, key=lambda texture: texture.get_memory(), reverse=True):
+                with ui.HStack(spacing=5, height=20):
+                    ui.Label(os.path.basename(texture.path), tooltip=texture.path)
+                    ui.Label(f"{texture.file_size / 2 ** 20:.1f} MB", width=70)
+                    ui.Label(f"{texture.width}x{texture.height}", width=90)
+                    if texture.needs_resize:
+                        ui.Label(f"-> {texture.target_size}", width=60)
+                    else:
+                        ui.Label("-> png" if texture.needs_recompress else "", width=60)
+
+    def _show_plan(self):
+        memory = sum(texture.get_memory() for texture in self._textures)
+        resized = sum(1 for texture in self._textures if texture.needs_resize)
+        recompressed = sum(1 for texture in self._textures if texture.needs_optimize and not texture.needs_resize)
+        self.status_label.text = (f"{len(self._textures)} textures, {resized} to resize, "
+                                  f"{recompressed} to recompress, "
+                                  f"{memory / 2 ** 20:.0f} MB -> {self._planned_memory / 2 ** 20:.0f} MB")
+        self.textures_frame.rebuild()
+
+    def set_looks_path(self):
+        paths = omni.usd.get_context().get_selection().get_selected_prim_paths()
+        if paths:
+            self.looks_path_field.model.set_value(paths[0])
+
+    def get_looks_path(self, stage):
+        looks_path = self.looks_path_field.model.get_value_as_string()
+        if looks_path:
+            return looks_path
+        default_prim = stage.GetDefaultPrim()
+        return str(default_prim.GetPath().AppendChild("Looks")) if default_prim else None
+
+    def cancel(self):
+        self._task_runner.cancel()
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+    def _run(self, coroutine):
+        if self._task and not self._task.done():
+            print("Another operation is still running")
+            return
+        self._task = asyncio.ensure_future(coroutine)
+
+    def _get_optimizer(self):
+        quality = min(max(self.quality_field.model.get_value_as_int(), 1), 100)
+        if self._optimizer is None:
+            self._optimizer = TextureOptimizer(quality=quality, on_progress=self.progress_callback)
+        self._optimizer.quality = quality
+        return self._optimizer
+
+    def progress_callback(self, progress: float, finished: int, failed: int):
+        self.progressbar.model.set_value(progress)
+        self.status_label.text = f"{finished} done, {failed} failed"
+
+    def scan(self):
+        stage = omni.usd.get_context().get_stage()
+        looks_path = self.get_looks_path(stage)
+        if not looks_path:
+            return
+
+        def on_done(textures):
+            self._run(self.measure(textures or []))
+
+        self._task_runner.run(iter_collect_textures(stage, looks_path), on_done)
+
+    async def measure(self, textures):
+        self._textures = await self._get_optimizer().measure(textures)
+        self._planned_memory = plan_budget(self._textures, max(self.max_size_field.model.get_value_as_int(), 1),
+                                           self.budget_field.model.get_value_as_int() * 2 ** 20)
+        self._show_plan()
+
+    def optimize(self):
+        if any(texture.needs_optimize for texture in self._textures):
+            self._run(self.optimize_textures())
+
+    async def optimize_textures(self):
+        self.optimize_btn.enabled = False
+        try:
+            results = await self._get_optimizer().optimize(self._textures)
+        finally:
+            self.optimize_btn.enabled = True
+            self.progressbar.model.set_value(0)
+
+        stage = omni.usd.get_context().get_stage()
+        layer = stage.GetEditTarget().GetLayer()
+        with omni.kit.undo.group():
+            for result in results:
+                if not result.success:
+                    continue
+                asset_path = Sdf.AssetPath(get_asset_path(result.output_path, layer))
+                for input_path in result.texture.input_paths:
+                    attr = stage.GetAttributeAtPath(input_path)
+                    if attr:
+                        omni.kit.commands.execute('ChangePropertyCommand', prop_path=str(input_path),
+                                                  value=asset_path, prev=attr.Get())
+
+        failed = [result for result in results if not result.success]
+        skipped = sum(1 for result in results if result.skipped)
+        self.status_label.text = (f"{len(results) - len(failed)} textures replaced, {skipped} up to date, "
+                                  f"{len(failed)} failed")
+        # the inputs point to the optimized files now, they are not listed again
+        replaced = {id(result.texture) for result in results if result.success}
+        self._textures = [texture for texture in self._textures if id(texture) not in replaced]
+        self.textures_frame.rebuild()
@@ -0,0 +1,212 @@
+import asyncio
+import glob
+import os
+from typing import Callable, List, Sequence, Tuple
+
+import omni.kit.asset_converter as converter
+
+from .conversion_cache import ConversionCache, hash_settings
+from .payload_split import split_payloads
+from .lod import generate_lods, write_report
+
+
+SOURCE_EXTENSIONS = (".fbx",)
+
+
+def collect_sources(value: str) -> List[str]:
+    """
+    the source files of a file path, a folder (searched recursively) or a glob pattern
+    """
+    value = value.strip().strip('"')
+    if not value:
+        return []
+
+    if os.path.isdir(value):
+        paths = glob.glob(os.path.join(value, "**", "*"), recursive=True)
+    elif glob.has_magic(value):
+        paths = glob.glob(value, recursive=True)
+    else:
+        paths = [value]
+
+    return sorted(os.path.normpath(path) for path in paths
+                  if os.path.isfile(path) and os.path.splitext(path)[1].lower() in SOURCE_EXTENSIONS)
+
+
+class ConversionResult:
+    def __init__(self, source_path: str, output_path: str, success: bool, status=None, error: str = "",
+                 skipped: bool = False):
+        self.source_path = source_path
+        self.output_path = output_path
+        self.success = success
+        self.status = status
+        self.error = error
+        # the output was already up to date
+        self.skipped = skipped
+        # payload files written along with the output
+        self.payload_files: List[str] = []
+
+    def __repr__(self):
+        if self.skipped:
+            return f"{self.source_path}: up to date"
+        if self.success:
+            return f"{self.source_path} -> {self.output_path}"
+        return f"{self.source_path}: {self.status} {self.error}"
+
+
+class ConversionQueue:
+    """
+    Convert a batch of files with at most `concurrency` converter tasks running at once.
+
+    The jobs go through an asyncio.Queue consumed by the workers, a failed conversion is
+    recorded with the status and error message of its task and the batch goes on. A file
+    whose content and converter settings did not change since its output was written is
+    skipped, and the converter writes to a temporary file renamed over the output once
+    it succeeded, so an interrupted conversion never leaves a broken output behind.
+
+    Args:
+        settings: AssetConverterContext attributes, they are part of the cache key
+        cache: manifest of the previous conversions, the default one is used when None
+        force: convert even the files that are up to date
+        split_payloads: write a binary root layer with one .usdc payload per top-level part
+        lod_ratios: triangle ratios of the simplified lods authored on every mesh, none when empty
+        on_file_progress: called with (source path, progress of the file)
+        on_progress: called with (overall progress, finished count, failed count)
+    """
+
+    def __init__(self, concurrency: int = 2, settings: dict = None, cache: ConversionCache = None,
+                 force: bool = False, split_payloads: bool = False, lod_ratios: Sequence[float] = (),
+                 on_file_progress: Callable[[str, float], None] = None,
+                 on_progress: Callable[[float, int, int], None] = None):
+        self.concurrency = max(1, concurrency)
+        self.settings = dict(settings or {})
+        self.cache = cache or ConversionCache()
+        self.force = force
+        self.split_payloads = split_payloads
+        self.lod_ratios = list(lod_ratios)
+        self.on_file_progress = on_file_progress
+        self.on_progress = on_progress
+
+        self.results: List[ConversionResult] = []
+        self._file_progress = {}
+        self._total = 0
+        self._cancelled = False
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    @property
+    def failures(self) -> List[ConversionResult]:
+        return [result for result in self.results if not result.success]
+
+    @property
+    def skipped(self) -> List[ConversionResult]:
+        return [result for result in self.results if result.skipped]
+
+    def cancel(self):
+        """the running conversions finish, nothing new is started"""
+        self._cancelled = True
+
+    async def run(self, jobs: List[Tuple[str, str]]) -> List[ConversionResult]:
+        """
+        Args:
+            jobs: [(source path, output path)]
+        """
+        self.results = []
+        self._file_progress = {}
+        self._total = len(jobs)
+        self._cancelled = False
+
+        queue = asyncio.Queue()
+        for job in jobs:
+            queue.put_nowait(job)
+
+        workers = [asyncio.ensure_future(self._worker(queue)) for _ in range(min(self.concurrency, len(jobs)))]
+        try:
+            await asyncio.gather(*workers)
+        except asyncio.CancelledError:
+            for worker in workers:
+                worker.cancel()
+            raise
+        finally:
+            self.cache.save()
+        return self.results
+
+    async def _worker(self, queue: asyncio.Queue):
+        while not self._cancelled:
+            try:
+                source_path, output_path = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            try:
+                result = await self.convert_if_needed(source_path, output_path)
+            except Exception as e:
+                result = ConversionResult(source_path, output_path, False, error=str(e))
+            if not result.success:
+                print(result)
+
+            self.results.append(result)
+            self._file_progress.pop(source_path, None)
+            self._report()
+
+    async def convert_if_needed(self, source_path: str, output_path: str) -> ConversionResult:
+        settings_hash = hash_settings(dict(self.settings, split_payloads=self.split_payloads,
+                                           lod_ratios=self.lod_ratios))
+        # hashing reads the whole file, keep it off the main thread
+        source_hash = await asyncio.get_event_loop().run_in_executor(
+            None, self.cache.get_source_hash, source_path, output_path)
+        if not self.force and self.cache.is_fresh(output_path, source_hash, settings_hash):
+            return ConversionResult(source_path, output_path, True, skipped=True)
+
+        result = await self.convert(source_path, output_path)
+        if result.success:
+            self.cache.record(source_path, output_path, source_hash, settings_hash, result.payload_files)
+        return result
+
+    async def convert(self, source_path: str, output_path: str) -> ConversionResult:
+        def progress_callback(current_step: int, total: int):
+            progress = current_step / total if total else 0
+            self._file_progress[source_path] = progress
+            if self.on_file_progress:
+                self.on_file_progress(source_path, progress)
+            self._report()
+
+        # same folder and extension as the output, so the relative asset paths and the format stay right
+        stem, ext = os.path.splitext(output_path)
+        tmp_path = stem + ".converting" + ext
+
+        context = converter.AssetConverterContext()
+        for name, value in self.settings.items():
+            setattr(context, name, value)
+
+        task_manager = converter.get_instance()
+        task = task_manager.create_converter_task(source_path, tmp_path, progress_callback, context)
+        payload_files = []
+        try:
+            success = await task.wait_until_finished()
+            if not success:
+                return ConversionResult(source_path, output_path, False, task.get_status(), task.get_error_message())
+            loop = asyncio.get_event_loop()
+            if self.lod_ratios:
+                report = await loop.run_in_executor(None, generate_lods, tmp_path, self.lod_ratios)
+                report["asset"] = output_path
+                write_report(report, stem + "_lod_report.json")
+            if self.split_payloads:
+                # the split only touches layers of its own, keep it off the main thread
+                payload_files = await loop.run_in_executor(None, split_payloads, tmp_path, output_path)
+            else:
+                os.replace(tmp_path, output_path)
+        finally:
+            if os.path.isfile(tmp_path):
+                os.remove(tmp_path)
+        result = ConversionResult(source_path, output_path, True)
+        result.payload_files = payload_files
+        return result
+
+    def _report(self):
+        if not self.on_progress or not self._total:
+            return
+        # the files being converted count for their own progress
+        done = len(self.results) + sum(self._file_progress.values())
+        self.on_progress(done / self._total, len(self.results), len(self.failures))
@@ -0,0 +1,108 @@
+import carb.tokens
+import hashlib
+import json
+import os
+
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """sha256 of the content of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_settings(settings: dict) -> str:
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf8")).hexdigest()
+
+
+class ConversionCache:
+    """
+    Manifest of the conversions already done.
+
+    Every output path keeps the content hash of its source and the hash of the converter
+    settings it was converted with, a conversion is only needed when one of them changed
+    or the output is gone. The files written along with the output (payloads) are checked
+    as well. The size and mtime of the source are kept, so the hash of an untouched file
+    is not computed again.
+    """
+
+    DEFAULT_PATH = "${data}/xiaopeng.vr.tools/conversion_manifest.json"
+
+    def __init__(self, path: str = None):
+        self.path = path or carb.tokens.get_tokens_interface().resolve(self.DEFAULT_PATH)
+
+        # output path -> {"source_hash", "settings_hash", "source_stat", "output_stat", "extra_stats"}
+        self._entries = {}
+        self._dirty = False
+        self._load()
+
+    def get_source_hash(self, source_path: str, output_path: str) -> str:
+        """
+        content hash of the source, reused from the manifest when the file was not touched
+        """
+        entry = self._entries.get(self._key(output_path))
+        if entry is not None and entry["source_stat"] == self._stat(source_path):
+            return entry["source_hash"]
+        return hash_file(source_path)
+
+    def is_fresh(self, output_path: str, source_hash: str, settings_hash: str) -> bool:
+        entry = self._entries.get(self._key(output_path))
+        if entry is None:
+            return False
+        if entry["source_hash"] != source_hash or entry["settings_hash"] != settings_hash:
+            return False
+        if entry["output_stat"] != self._stat(output_path):
+            return False
+        # a deleted or rewritten payload breaks the output as well, entries from before they were
+        # recorded are converted again
+        if "extra_stats" not in entry:
+            return False
+        return all(self._stat(path) == stat for path, stat in entry["extra_stats"].items())
+
+    def record(self, source_path: str, output_path: str, source_hash: str, settings_hash: str,
+               extra_paths=()):
+        """
+        Args:
+            extra_paths: the other files written by the conversion
+        """
+        self._entries[self._key(output_path)] = {
+            "source_hash": source_hash,
+            "settings_hash": settings_hash,
+            "source_stat": self._stat(source_path),
+            "output_stat": self._stat(output_path),
+            "extra_stats": {self._key(path): self._stat(path) for path in extra_paths},
+        }
+        self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf8") as f:
+            f.write(json.dumps(self._entries))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def _key(self, path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def _stat(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _load(self):
+        if not os.path.isfile(self.path):
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf8") as f:
+                self._entries = json.loads(f.read())
+        except (OSError, ValueError) as e:
+            print(e)
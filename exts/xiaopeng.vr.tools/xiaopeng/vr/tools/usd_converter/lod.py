@@ -0,0 +1,329 @@
+import json
+import os
+from typing import Dict, List, Sequence
+import numpy as np
+from pxr import Sdf
+
+from ..mesh_utils import triangulate
+
+
+LOD_VARIANT_SET = "lod"
+# meshes lighter than this are not worth LODs
+MIN_TRIANGLES = 256
+
+# attributes that describe the surface, they move into the lod variants
+GEOMETRY_ATTRIBUTES = {"points", "faceVertexCounts", "faceVertexIndices", "normals", "extent",
+                       "holeIndices", "cornerIndices", "cornerSharpnesses",
+                       "creaseIndices", "creaseLengths", "creaseSharpnesses",
+                       "velocities", "accelerations"}
+
+_SYMMETRIC_PAIRS = [(a, b) for a in range(4) for b in range(a, 4)]
+
+
+class SimplifiedMesh:
+    def __init__(self, points, triangles, kept, vertices):
+        # (V, 3) positions and (T, 3) vertex indices of the simplified mesh
+        self.points = points
+        self.triangles = triangles
+        # indices of the source triangles that survived
+        self.kept = kept
+        # one source vertex per simplified vertex, to carry vertex interpolated values
+        self.vertices = vertices
+
+
+def cluster_vertices(points, cells: int):
+    """cluster id of every point in a grid of `cells` cubic cells along the largest side"""
+    low = points.min(axis=0)
+    size = max(float((points.max(axis=0) - low).max()) / cells, 1e-12)
+    cells_xyz = np.minimum(np.floor((points - low) / size).astype(np.int64), cells)
+    # one integer key per cell, 1-d unique is much faster than unique rows
+    keys = (cells_xyz[:, 0] * (cells + 1) + cells_xyz[:, 1]) * (cells + 1) + cells_xyz[:, 2]
+    _, cluster = np.unique(keys, return_inverse=True)
+    return cluster.reshape(-1), size
+
+
+def collapse_triangles(triangles, cluster):
+    """indices of the triangles that stay triangles once their vertices are clustered, duplicates removed"""
+    collapsed = cluster[triangles]
+    keep = ((collapsed[:, 0] != collapsed[:, 1]) & (collapsed[:, 1] != collapsed[:, 2])
+            & (collapsed[:, 0] != collapsed[:, 2]))
+    kept = np.flatnonzero(keep)
+    if not len(kept):
+        return kept
+    _, first = np.unique(np.sort(collapsed[kept], axis=1), axis=0, return_index=True)
+    return kept[np.sort(first)]
+
+
+def cluster_positions(points, triangles, cluster, cluster_count, cell_size):
+    """
+    Position of every cluster minimizing the squared distances to the planes of the triangles
+    around it, the quadric error metric of Lindstrom's out-of-core simplification.
+    """
+    v0, v1, v2 = points[triangles[:, 0]], points[triangles[:, 1]], points[triangles[:, 2]]
+    normals = np.cross(v1 - v0, v2 - v0)
+    lengths = np.linalg.norm(normals, axis=1)
+    valid = lengths > 0
+    planes = np.zeros((len(triangles), 4))
+    planes[valid, :3] = normals[valid] / lengths[valid, None]
+    planes[:, 3] = -(planes[:, :3] * v0).sum(axis=1)
+    # area weighted
+    weights = 0.5 * lengths
+
+    # sum of the quadrics of the triangles around every cluster, one symmetric component at a time
+    quadrics = np.zeros((cluster_count, 4, 4))
+    corner_clusters = cluster[triangles]
+    for a, b in _SYMMETRIC_PAIRS:
+        component = weights * planes[:, a] * planes[:, b]
+        total = sum(np.bincount(corner_clusters[:, j], component, minlength=cluster_count) for j in range(3))
+        quadrics[:, a, b] = total
+        quadrics[:, b, a] = total
+
+    counts = np.bincount(cluster, minlength=cluster_count)[:, None]
+    means = np.stack([np.bincount(cluster, points[:, axis], minlength=cluster_count) for axis in range(3)],
+                     axis=1) / np.maximum(counts, 1)
+
+    # pulled towards the mean, so flat and degenerate clusters stay solvable
+    a = quadrics[:, :3, :3]
+    regularization = 1e-3 * (np.trace(a, axis1=1, axis2=2) / 3.0 + 1e-12)
+    a = a + regularization[:, None, None] * np.eye(3)
+    b = -quadrics[:, :3, 3] + regularization[:, None] * means
+    positions = np.linalg.solve(a, b[:, :, None])[:, :, 0]
+
+    # a solution far from its cell is an ill conditioned one
+    far = np.abs(positions - means).max(axis=1) > cell_size
+    positions[far] = means[far]
+    return positions
+
+
+def simplify(points, triangles, target: int):
+    """
+    Vertex clustering simplification down to at most `target` triangles.
+
+    The grid resolution is found by bisection, every step is a few vectorized passes over
+    the vertices. Returns None when the mesh can not get under the target with at least
+    one triangle left.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    low, high = 1, 2048
+    best = None
+    while low <= high:
+        cells = (low + high) // 2
+        cluster, cell_size = cluster_vertices(points, cells)
+        kept = collapse_triangles(triangles, cluster)
+        if len(kept) <= target:
+            best = (cluster, cell_size, kept)
+            low = cells + 1
+        else:
+            high = cells - 1
+
+    if best is None or not len(best[2]):
+        return None
+
+    cluster, cell_size, kept = best
+    cluster_count = int(cluster.max()) + 1
+    positions = cluster_positions(points, triangles, cluster, cluster_count, cell_size)
+
+    # only the clusters used by the remaining triangles become vertices
+    used, new_triangles = np.unique(cluster[triangles[kept]], return_inverse=True)
+    _, first_vertex = np.unique(cluster, return_index=True)
+    return SimplifiedMesh(positions[used], new_triangles.reshape(-1, 3), kept, first_vertex[used])
+
+
+def generate_lods(layer_path: str, ratios: Sequence[float] = (0.5, 0.25),
+                  min_triangles: int = MIN_TRIANGLES) -> Dict:
+    """
+    Author a "lod" variant set on every mesh of the layer and save it.
+
+    lod0 holds the original geometry, it has to move from the prim into the variant since
+    the local opinions would win over every variant. lodN is simplified to about
+    ratios[N-1] of the triangles, faceVarying and uniform primvars follow the triangles
+    they come from and vertex primvars the vertex kept for every cluster. The face subsets
+    keep the triangles of their faces, meshes with point or edge subsets get no lods.
+
+    Returns:
+        the report {"asset", "meshes": {path: {"lod0": triangles, ...}}, "triangles": totals}
+    """
+    layer = Sdf.Layer.FindOrOpen(layer_path)
+    mesh_paths = []
+
+    def visit(path):
+        if path.IsPrimPath() and not path.ContainsPrimVariantSelection():
+            if layer.GetPrimAtPath(path).typeName == "Mesh":
+                mesh_paths.append(path)
+
+    layer.Traverse(Sdf.Path.absoluteRootPath, visit)
+
+    meshes = {}
+    for path in mesh_paths:
+        with Sdf.ChangeBlock():
+            entry = _generate_mesh_lods(layer, path, ratios, min_triangles)
+        if entry:
+            meshes[str(path)] = entry
+
+    if meshes:
+        layer.Save()
+
+    totals = {}
+    for entry in meshes.values():
+        for lod, triangles in entry.items():
+            totals[lod] = totals.get(lod, 0) + triangles
+    return {"asset": layer_path, "meshes": meshes, "triangles": totals}
+
+
+def write_report(report: Dict, path: str):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf8") as f:
+        f.write(json.dumps(report, indent=2))
+    os.replace(tmp_path, path)
+
+
+def _get_interpolation(spec: Sdf.AttributeSpec, default: str = "constant"):
+    if spec.HasInfo("interpolation"):
+        return spec.GetInfo("interpolation")
+    return default
+
+
+def _is_geometry(prim_spec: Sdf.PrimSpec, spec: Sdf.AttributeSpec) -> bool:
+    if spec.name in GEOMETRY_ATTRIBUTES:
+        return True
+    if spec.name.startswith("primvars:"):
+        base = prim_spec.attributes.get(spec.name[:-len(":indices")]) if spec.name.endswith(":indices") else spec
+        return base is not None and _get_interpolation(base) != "constant"
+    return False
+
+
+def _generate_mesh_lods(layer: Sdf.Layer, path: Sdf.Path, ratios, min_triangles):
+    prim_spec = layer.GetPrimAtPath(path)
+    if LOD_VARIANT_SET in prim_spec.variantSets:
+        return None
+
+    specs = {}
+    for name in ("points", "faceVertexCounts", "faceVertexIndices"):
+        spec = prim_spec.attributes.get(name)
+        # animated or inherited geometry is left alone
+        if spec is None or spec.default is None or layer.GetNumTimeSamplesForPath(spec.path):
+            return None
+        specs[name] = spec
+
+    points = np.asarray(specs["points"].default, dtype=np.float64)
+    triangles, corners, faces = triangulate(specs["faceVertexCounts"].default, specs["faceVertexIndices"].default)
+    if len(triangles) < min_triangles or not len(points):
+        return None
+
+    subsets = _get_subset_indices(layer, prim_spec)
+    if subsets is None:
+        return None
+
+    moved = [spec for spec in prim_spec.attributes if _is_geometry(prim_spec, spec)]
+    variant_set = Sdf.VariantSetSpec(prim_spec, LOD_VARIANT_SET)
+    lod0 = Sdf.VariantSpec(variant_set, "lod0")
+    for spec in moved:
+        Sdf.CopySpec(layer, spec.path, layer, lod0.primSpec.path.AppendProperty(spec.name))
+    # the subset indices refer to the faces of a lod, they move into the variants as well
+    for name, spec in subsets.items():
+        subset_spec = Sdf.PrimSpec(lod0.primSpec, name, Sdf.SpecifierOver)
+        Sdf.CopySpec(layer, spec.path, layer, subset_spec.path.AppendProperty(spec.name))
+
+    entry = {"lod0": int(len(triangles))}
+    for level, ratio in enumerate(ratios, 1):
+        simplified = simplify(points, triangles, int(len(triangles) * ratio))
+        if simplified is None:
+            break
+        variant = Sdf.VariantSpec(variant_set, f"lod{level}")
+        _author_lod(layer, variant.primSpec, moved, simplified, corners, faces)
+        _author_lod_subsets(layer, variant.primSpec, subsets, faces[simplified.kept])
+        entry[f"lod{level}"] = int(len(simplified.triangles))
+
+    for spec in moved:
+        prim_spec.RemoveProperty(spec)
+    for name, spec in subsets.items():
+        prim_spec.nameChildren[name].RemoveProperty(spec)
+    prim_spec.variantSetNameList.prependedItems.append(LOD_VARIANT_SET)
+    prim_spec.variantSelections[LOD_VARIANT_SET] = "lod0"
+    return entry
+
+
+def _get_subset_indices(layer: Sdf.Layer, prim_spec: Sdf.PrimSpec):
+    """
+    {name: indices spec} of the GeomSubset children of the mesh, None when one of them can
+    not follow the simplified faces (point or edge subsets, animated indices)
+    """
+    subsets = {}
+    for child in prim_spec.nameChildren:
+        if child.typeName != "GeomSubset":
+            continue
+        element_type = child.attributes.get("elementType")
+        if element_type is not None and element_type.default not in (None, "face"):
+            return None
+        spec = child.attributes.get("indices")
+        if spec is None:
+            continue
+        if layer.GetNumTimeSamplesForPath(spec.path):
+            return None
+        if spec.default is not None:
+            subsets[child.name] = spec
+    return subsets
+
+
+def _author_lod_subsets(layer: Sdf.Layer, lod_spec: Sdf.PrimSpec, subsets: Dict[str, Sdf.AttributeSpec],
+                        source_faces):
+    """every subset gets the simplified triangles coming from its faces"""
+    for name, spec in subsets.items():
+        triangles = np.flatnonzero(np.isin(source_faces, np.asarray(spec.default)))
+        path = Sdf.PrimSpec(lod_spec, name, Sdf.SpecifierOver).path.AppendProperty(spec.name)
+        Sdf.CopySpec(layer, spec.path, layer, path)
+        layer.GetAttributeAtPath(path).default = _to_vt(spec, triangles)
+
+
+def _author_lod(layer: Sdf.Layer, lod_spec: Sdf.PrimSpec, moved: List[Sdf.AttributeSpec],
+                simplified: SimplifiedMesh, corners, faces):
+    attributes = {spec.name: spec for spec in moved}
+    values = {
+        "points": simplified.points,
+        "faceVertexCounts": np.full(len(simplified.triangles), 3),
+        "faceVertexIndices": simplified.triangles.reshape(-1),
+    }
+    if "extent" in attributes:
+        values["extent"] = np.stack([simplified.points.min(axis=0), simplified.points.max(axis=0)])
+
+    # per element lookups into the source arrays
+    lookups = {
+        "faceVarying": corners[simplified.kept].reshape(-1),
+        "uniform": faces[simplified.kept],
+        "vertex": simplified.vertices,
+        "varying": simplified.vertices,
+    }
+    for name, spec in attributes.items():
+        if name != "normals" and not name.startswith("primvars:"):
+            continue
+        if name.endswith(":indices"):
+            continue
+        interpolation = _get_interpolation(spec, "vertex" if name == "normals" else "constant")
+        if interpolation not in lookups or spec.default is None:
+            continue
+        if spec.HasInfo("elementSize") and spec.GetInfo("elementSize") != 1:
+            continue
+
+        # indexed primvars keep their values, only the indices follow the elements
+        indices_spec = attributes.get(name + ":indices")
+        if indices_spec is not None and indices_spec.default is not None:
+            values[name] = np.asarray(spec.default)
+            values[name + ":indices"] = np.asarray(indices_spec.default)[lookups[interpolation]]
+        else:
+            values[name] = np.asarray(spec.default)[lookups[interpolation]]
+
+    # the other attributes (creases, holes, velocities) do not survive the simplification
+    for name, value in values.items():
+        spec = attributes.get(name)
+        if spec is None:
+            continue
+        path = lod_spec.path.AppendProperty(name)
+        Sdf.CopySpec(layer, spec.path, layer, path)
+        layer.GetAttributeAtPath(path).default = _to_vt(spec, value)
+
+
+def _to_vt(spec: Sdf.AttributeSpec, value):
+    """array of the attribute type, keeping the precision of the source array"""
+    array_type = spec.typeName.type.pythonClass
+    source = np.asarray(spec.default)
+    return array_type.FromNumpy(np.ascontiguousarray(value, dtype=source.dtype))
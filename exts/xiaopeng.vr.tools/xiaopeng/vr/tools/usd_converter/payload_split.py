@@ -0,0 +1,153 @@
+import os
+from typing import List
+from pxr import Sdf, UsdUtils
+
+
+# prim types whose subtree is worth its own payload
+GEOMETRY_TYPES = {"Mesh", "Points", "BasisCurves", "NurbsCurves", "NurbsPatch", "PointInstancer",
+                  "Capsule", "Cone", "Cube", "Cylinder", "Sphere"}
+
+
+def get_payload_dir(output_path: str) -> str:
+    stem = os.path.splitext(output_path)[0]
+    return stem + "_payloads"
+
+
+def split_payloads(layer_path: str, output_path: str) -> List[str]:
+    """
+    Write the converted layer as a binary root layer plus one .usdc payload per top-level part.
+
+    Every child of the default prim holding geometry is copied into
+    <output name>_payloads/<child>.usdc and left in the root layer as a prim with a payload
+    to it, so the stage can be opened with the parts unloaded. The relationships and
+    connections of a part pointing outside of it (material bindings to the Looks scope)
+    can not be resolved from a payload, they stay in the root layer as overs. Everything
+    else, materials included, stays in the root layer.
+
+    Returns:
+        the payload files written
+    """
+    source = Sdf.Layer.FindOrOpen(layer_path)
+    root = Sdf.Layer.CreateAnonymous()
+    root.TransferContent(source)
+
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    payload_dir = get_payload_dir(output_path)
+
+    payload_files = []
+    default_prim = _get_default_prim(root)
+    if default_prim:
+        for child in list(default_prim.nameChildren):
+            if not _has_geometry(root, child.path):
+                continue
+            payload_file = os.path.join(payload_dir, child.name + ".usdc")
+            _split_part(root, child.path, payload_file, output_dir)
+            payload_files.append(payload_file)
+
+    # parts of a previous run that are gone
+    if os.path.isdir(payload_dir):
+        for file_name in os.listdir(payload_dir):
+            path = os.path.join(payload_dir, file_name)
+            if file_name.endswith(".usdc") and path not in payload_files:
+                os.remove(path)
+
+    _export(root, output_path)
+    return payload_files
+
+
+def _split_part(root: Sdf.Layer, part_path: Sdf.Path, payload_file: str, output_dir: str):
+    part = Sdf.Layer.CreateAnonymous()
+    part_root = Sdf.Path.absoluteRootPath.AppendChild(part_path.name)
+    Sdf.CopySpec(root, part_path, part, part_root)
+    part.defaultPrim = part_path.name
+
+    # targets inside the part follow it, the properties pointing outside go back to the root layer
+    outside = []
+
+    def visit(path):
+        if not path.IsPrimPropertyPath():
+            return
+        spec = part.GetPropertyAtPath(path)
+        if isinstance(spec, Sdf.RelationshipSpec):
+            list_op = spec.targetPathList
+        else:
+            list_op = spec.connectionPathList
+
+        targets = list_op.GetAddedOrExplicitItems()
+        for target in targets:
+            if target.HasPrefix(part_path):
+                list_op.ReplaceItemEdits(target, target.ReplacePrefix(part_path, part_root))
+        if any(not target.HasPrefix(part_path) and not target.HasPrefix(part_root) for target in targets):
+            outside.append(path)
+
+    part.Traverse(part_root, visit)
+
+    kept = Sdf.Layer.CreateAnonymous()
+    for path in outside:
+        original_path = path.ReplacePrefix(part_root, part_path)
+        Sdf.CreatePrimInLayer(kept, original_path.GetPrimPath())
+        Sdf.CopySpec(root, original_path, kept, original_path)
+        part.GetPrimAtPath(path.GetPrimPath()).RemoveProperty(part.GetPropertyAtPath(path))
+
+    # the asset paths of the part are relative to the payload folder now
+    payload_dir = os.path.dirname(payload_file)
+
+    def anchor(asset_path):
+        if asset_path.startswith("./") or asset_path.startswith("../"):
+            relative = os.path.relpath(os.path.join(output_dir, asset_path), payload_dir)
+            return "./" + relative.replace(os.sep, "/")
+        return asset_path
+
+    UsdUtils.ModifyAssetPaths(part, anchor)
+
+    os.makedirs(payload_dir, exist_ok=True)
+    _export(part, payload_file)
+
+    # the prim stays in the root layer with its metadata, its content comes from the payload
+    stub = root.GetPrimAtPath(part_path)
+    edit = Sdf.BatchNamespaceEdit()
+    for child in stub.nameChildren:
+        edit.Add(Sdf.NamespaceEdit.Remove(child.path))
+    for prop in stub.properties:
+        edit.Add(Sdf.NamespaceEdit.Remove(prop.path))
+    if not root.Apply(edit):
+        print(f"{part_path}: can not be moved to a payload")
+        return
+
+    relative_file = os.path.relpath(payload_file, output_dir).replace(os.sep, "/")
+    stub.payloadList.prependedItems.append(Sdf.Payload("./" + relative_file, part_root))
+
+    for path in outside:
+        original_path = path.ReplacePrefix(part_root, part_path)
+        Sdf.CreatePrimInLayer(root, original_path.GetPrimPath())
+        Sdf.CopySpec(kept, original_path, root, original_path)
+
+
+def _get_default_prim(layer: Sdf.Layer):
+    if layer.defaultPrim:
+        return layer.GetPrimAtPath(Sdf.Path.absoluteRootPath.AppendChild(layer.defaultPrim))
+    if layer.rootPrims:
+        return layer.rootPrims[0]
+    return None
+
+
+def _has_geometry(layer: Sdf.Layer, path: Sdf.Path) -> bool:
+    found = []
+
+    def visit(spec_path):
+        if not found and spec_path.IsPrimPath() and layer.GetPrimAtPath(spec_path).typeName in GEOMETRY_TYPES:
+            found.append(spec_path)
+
+    layer.Traverse(path, visit)
+    return bool(found)
+
+
+def _export(layer: Sdf.Layer, path: str):
+    # binary crate, written next to the target and renamed over it
+    stem, ext = os.path.splitext(path)
+    tmp_path = stem + ".writing" + ext
+    if ext.lower() == ".usd":
+        layer.Export(tmp_path, args={"format": "usdc"})
+    else:
+        layer.Export(tmp_path)
+    os.replace(tmp_path, path)
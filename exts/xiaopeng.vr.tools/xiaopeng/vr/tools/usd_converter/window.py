@@ -6,16 +6,23 @@ from typing import Union
 from pxr import Usd, Sdf, UsdGeom, UsdShade
 import os
 import asyncio
-import omni.kit.asset_converter as converter
+
+from .batch import ConversionQueue, collect_sources
+from .conversion_cache import ConversionCache
 
 
 class USDConverterWindow(ui.Window):
     def __init__(self, title: str, delegate=None, **kwargs):
         super().__init__(title, **kwargs)
 
+        self._queue = None
+        self._batch_task = None
+        self._cache = None
+
         self.frame.set_build_fn(self._build_fn)
 
     def destroy(self):
+        self.cancel()
         # It will destroy all the children
         super().destroy()
 
@@ -30,21 +37,12 @@ class USDConverterWindow(ui.Window):
         self.visible = False
 
     def _build_fn(self):
-        def valid_path(path):
-            clean_path = path.strip('"')
-            if os.path.exists(clean_path):
-                ext = os.path.splitext(clean_path)[1].lower()
-                if ext == ".fbx":
-                    return clean_path
-            else:
-                return None
-
         def on_convert():
             value = self.path_input.model.get_value_as_string()
-            path = valid_path(value)
-            if path:
-                self.path_input.model.set_value(path)
-                self.convert_usd(path)
+            sources = collect_sources(value)
+            if sources:
+                self.path_input.model.set_value(value.strip().strip('"'))
+                self.convert_usd(sources)
             else:
                 self.path_input.model.set_value('')
 
@@ -53,45 +51,113 @@ class USDConverterWindow(ui.Window):
                 ui.Spacer(height=5)
                 with ui.HStack(height=20):
                     ui.Spacer(width=3)
+                    # a .fbx file, a folder or a glob pattern
                     ui.Label("File Path", name="header_attribute_name", width=70)
                     self.path_input = ui.StringField(name='path')
-                    
+
+                ui.Spacer(height=5)
+                with ui.HStack(height=20):
+                    ui.Spacer(width=3)
+                    ui.Label("Concurrency", name="header_attribute_name", width=70)
+                    self.concurrency_field = ui.IntField(width=50)
+                    self.concurrency_field.model.set_value(2)
+                    ui.Spacer(width=10)
+                    # reconvert the files that did not change as well
+                    ui.Label("Force", name="header_attribute_name", width=40)
+                    self.force_checkbox = ui.CheckBox(width=20)
+                    ui.Spacer(width=10)
+                    # binary root layer with one payload per top-level part
+                    ui.Label("Payloads", name="header_attribute_name", width=60)
+                    self.payloads_checkbox = ui.CheckBox(width=20)
+
+                ui.Spacer(height=5)
+                with ui.HStack(height=20):
+                    ui.Spacer(width=3)
+                    # triangle ratios of the lods, "0.5, 0.25" authors lod1 and lod2, empty for none
+                    ui.Label("LODs", name="header_attribute_name", width=70)
+                    self.lods_field = ui.StringField()
+
                 ui.Spacer(height=10)
 
-                self.convert_btn = ui.Button("Convert to USD", clicked_fn=on_convert)
-                
+                with ui.HStack(height=40, spacing=5):
+                    self.convert_btn = ui.Button("Convert to USD", clicked_fn=on_convert)
+                    ui.Button("Cancel", width=60, clicked_fn=self.cancel)
+
                 ui.Spacer(height=10)
 
+                self.file_label = ui.Label("", height=20)
+                self.file_progressbar = ui.ProgressBar(height=20)
+                ui.Spacer(height=5)
+                self.status_label = ui.Label("", height=20)
                 self.progressbar = ui.ProgressBar(height=20)
 
-    def progress_callback(self, current_step: int, total: int):
+                ui.Spacer(height=5)
+                ui.Label("Failures", height=20)
+                with ui.ScrollingFrame():
+                    self.failures_stack = ui.VStack(height=0)
+
+    def file_progress_callback(self, source_path: str, progress: float):
+        self.file_label.text = os.path.basename(source_path)
+        self.file_progressbar.model.set_value(progress)
+
+    def progress_callback(self, progress: float, finished: int, failed: int):
         # Show progress
-        progress = current_step / total
         self.progressbar.model.set_value(progress)
+        skipped = len(self._queue.skipped)
+        self.status_label.text = f"{finished}/{self._queue.total} done, {skipped} up to date, {failed} failed"
 
-        if progress == 1:
+    async def convert(self, jobs):
+        try:
+            results = await self._queue.run(jobs)
+        finally:
             self.convert_btn.enabled = True
+            self.file_label.text = ""
+            self.file_progressbar.model.set_value(0)
             self.progressbar.model.set_value(0)
 
-    async def convert(self, input_asset_path, output_asset_path):
-        task_manager = converter.get_instance()
-        task = task_manager.create_converter_task(input_asset_path, output_asset_path, self.progress_callback)
-        success = await task.wait_until_finished()
-        if not success:
-            detailed_status_code = task.get_status()
-            detailed_status_error_string = task.get_error_message()
+        with self.failures_stack:
+            for result in self._queue.failures:
+                ui.Label(f"{os.path.basename(result.source_path)}: {result.status} {result.error}",
+                         height=20, tooltip=result.source_path)
+        return results
 
-    def convert_usd(self, source_path):
-        file_name = os.path.splitext(source_path)[0]
-        output_path = file_name + ".usd"
+    def convert_usd(self, source_paths):
+        if self._batch_task and not self._batch_task.done():
+            print("Another conversion is still running")
+            return
 
-        # clean the old file
-        if os.path.isfile(output_path):
-            os.remove(output_path)
+        jobs = [(source_path, os.path.splitext(source_path)[0] + ".usd") for source_path in source_paths]
 
         # reset
         self.progressbar.model.set_value(0)
+        self.failures_stack.clear()
         self.convert_btn.enabled = False
 
+        if self._cache is None:
+            self._cache = ConversionCache()
+
         # async convert
-        asyncio.ensure_future(self.convert(source_path, output_path))
+        self._queue = ConversionQueue(self.concurrency_field.model.get_value_as_int(),
+                                      cache=self._cache,
+                                      force=self.force_checkbox.model.get_value_as_bool(),
+                                      split_payloads=self.payloads_checkbox.model.get_value_as_bool(),
+                                      lod_ratios=self.get_lod_ratios(),
+                                      on_file_progress=self.file_progress_callback,
+                                      on_progress=self.progress_callback)
+        self._batch_task = asyncio.ensure_future(self.convert(jobs))
+
+    def get_lod_ratios(self):
+        ratios = []
+        for value in self.lods_field.model.get_value_as_string().replace(";", ",").split(","):
+            try:
+                ratio = float(value)
+            except ValueError:
+                continue
+            if 0 < ratio < 1:
+                ratios.append(ratio)
+        return sorted(ratios, reverse=True)
+
+    def cancel(self):
+        # the files already converting finish, the rest of the batch is dropped
+        if self._queue:
+            self._queue.cancel()
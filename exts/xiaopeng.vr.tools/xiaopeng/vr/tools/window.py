@@ -1,23 +1,35 @@
-import omni.ext
 import omni.ui as ui
 import omni.kit.commands
-import omni.usd
-from typing import Union, List
-from pxr import Usd, Sdf, UsdGeom, UsdShade
-import os
-from omni.kit.widget.stage import StageIcons
-from omni.kit.window.file_exporter import get_file_exporter
-import json
-
-from .material_output.window import MaterialOutputWindow
-from .material_assign.window import MaterialAssignWindow
-from .material_match.window import MaterialMatchWindow
-from .usd_converter.window import USDConverterWindow
-from .batch_rename.window import BatchRenameWindow
-from .rotate_tool.window import RotateToolWindow
-
-import omni.kit.pipapi
-omni.kit.pipapi.install("fuzzywuzzy")
+import importlib
+import importlib.util
+import time
+import carb
+
+
+# commands.py modules of the tools loaded so far, registered until the extension shuts down
+_command_modules = {}
+
+
+def register_tool_commands(module_name):
+    """
+    Register the commands of a tool the first time it is loaded, they stay registered
+    when its window is closed so the undo stack can still replay them.
+    """
+    if module_name in _command_modules:
+        return
+    module = None
+    if importlib.util.find_spec(f".{module_name}.commands", __package__) is not None:
+        module = importlib.import_module(f".{module_name}.commands", __package__)
+        omni.kit.commands.register_all_commands_in_module(module)
+    _command_modules[module_name] = module
+
+
+def unregister_tool_commands():
+    for module in _command_modules.values():
+        if module is not None:
+            omni.kit.commands.unregister_module_commands(module)
+    _command_modules.clear()
+
 
 class VRToolsWindow(ui.Window):
     def __init__(self, title: str, delegate=None, **kwargs):
@@ -29,6 +41,12 @@ class VRToolsWindow(ui.Window):
         self.usd_converter_window = None
         self.batch_rename_window = None
         self.rotate_tool_window = None
+        self.load_set_window = None
+        self.instancing_window = None
+        self.merge_window = None
+        self.mesh_cleanup_window = None
+        self.collapse_hierarchy_window = None
+        self.texture_budget_window = None
 
         self.frame.set_build_fn(self._build_fn)
 
@@ -56,39 +74,104 @@ class VRToolsWindow(ui.Window):
                 ui.Button("USD Converter", height=40, clicked_fn=self.open_usd_converter)
                 ui.Button("Batch Rename", height=40, clicked_fn=self.open_batch_rename)
                 ui.Button("Rotate Tool", height=40, clicked_fn=self.open_rotate_tool)
+                ui.Button("Load Sets", height=40, clicked_fn=self.open_load_sets)
+                ui.Button("Instancing", height=40, clicked_fn=self.open_instancing)
+                ui.Button("Merge by Material", height=40, clicked_fn=self.open_merge)
+                ui.Button("Mesh Cleanup", height=40, clicked_fn=self.open_mesh_cleanup)
+                ui.Button("Collapse Hierarchy", height=40, clicked_fn=self.open_collapse_hierarchy)
+                ui.Button("Texture Budget", height=40, clicked_fn=self.open_texture_budget)
+
+    def _load_tool(self, module_name, class_name):
+        """
+        Import the tool module the first time its window is opened, so the tools and their
+        optional dependencies do not slow down the extension startup.
+        """
+        start = time.perf_counter()
+        module = importlib.import_module(f".{module_name}.window", __package__)
+        register_tool_commands(module_name)
+        carb.log_info(f"[xiaopeng.vr.tools] {module_name} loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return getattr(module, class_name)
 
     def open_material_output(self):
         if not self.material_output_window:
-            self.material_output_window = MaterialOutputWindow("Material Output", width=400, height=110)
+            window_class = self._load_tool("material_output", "MaterialOutputWindow")
+            self.material_output_window = window_class("Material Output", width=400, height=140)
         else:
             self.material_output_window.visible = True
     
     def open_material_assign(self):
         if not self.material_assign_window:
-            self.material_assign_window = MaterialAssignWindow("Material Assign", width=300, height=300)
+            window_class = self._load_tool("material_assign", "MaterialAssignWindow")
+            self.material_assign_window = window_class("Material Assign", width=300, height=300)
         else:
             self.material_assign_window.visible = True
     
     def open_material_match(self):
         if not self.material_match_window:
-            self.material_match_window = MaterialMatchWindow("Material Match", width=615, height=600)
+            window_class = self._load_tool("material_match", "MaterialMatchWindow")
+            self.material_match_window = window_class("Material Match", width=615, height=600)
         else:
             self.material_match_window.visible = True
 
     def open_usd_converter(self):
         if not self.usd_converter_window:
-            self.usd_converter_window = USDConverterWindow("USD Converter", width=300, height=140)
+            window_class = self._load_tool("usd_converter", "USDConverterWindow")
+            self.usd_converter_window = window_class("USD Converter", width=400, height=400)
         else:
             self.usd_converter_window.visible = True
 
     def open_batch_rename(self):
         if not self.batch_rename_window:
-            self.batch_rename_window = BatchRenameWindow("Batch Rename", width=300, height=120)
+            window_class = self._load_tool("batch_rename", "BatchRenameWindow")
+            self.batch_rename_window = window_class("Batch Rename", width=400, height=400)
         else:
             self.batch_rename_window.visible = True
 
     def open_rotate_tool(self):
         if not self.rotate_tool_window:
-            self.rotate_tool_window = RotateToolWindow("Rotate Tool", width=500, height=140)
+            window_class = self._load_tool("rotate_tool", "RotateToolWindow")
+            self.rotate_tool_window = window_class("Rotate Tool", width=500, height=300)
+        else:
+            self.rotate_tool_window.visible = True
+
+    def open_load_sets(self):
+        if not self.load_set_window:
+            window_class = self._load_tool("load_sets", "LoadSetWindow")
+            self.load_set_window = window_class("Load Sets", width=500, height=500)
+        else:
+            self.load_set_window.visible = True
+
+    def open_instancing(self):
+        if not self.instancing_window:
+            window_class = self._load_tool("instancing", "InstancingWindow")
+            self.instancing_window = window_class("Instancing", width=500, height=450)
+        else:
+            self.instancing_window.visible = True
+
+    def open_merge(self):
+        if not self.merge_window:
+            window_class = self._load_tool("merge", "MergeWindow")
+            self.merge_window = window_class("Merge by Material", width=400, height=180)
+        else:
+            self.merge_window.visible = True
+
+    def open_mesh_cleanup(self):
+        if not self.mesh_cleanup_window:
+            window_class = self._load_tool("cleanup", "MeshCleanupWindow")
+            self.mesh_cleanup_window = window_class("Mesh Cleanup", width=450, height=400)
+        else:
+            self.mesh_cleanup_window.visible = True
+
+    def open_collapse_hierarchy(self):
+        if not self.collapse_hierarchy_window:
+            window_class = self._load_tool("hierarchy", "CollapseHierarchyWindow")
+            self.collapse_hierarchy_window = window_class("Collapse Hierarchy", width=450, height=400)
+        else:
+            self.collapse_hierarchy_window.visible = True
+
+    def open_texture_budget(self):
+        if not self.texture_budget_window:
+            window_class = self._load_tool("textures", "TextureBudgetWindow")
+            self.texture_budget_window = window_class("Texture Budget", width=500, height=450)
         else:
-            self.rotate_tool_window.visible = True
\ No newline at end of file
+            self.texture_budget_window.visible = True
\ No newline at end of file